@@ -0,0 +1,196 @@
+"""
+Admission Control for /analyze
+Caps the number of analyses in flight and keeps a small bounded wait
+queue in front of them. Requests that cannot be admitted in time are
+either answered with 503 and Retry-After or run in a rules-only "fast
+mode" that skips the ML, graph and database-write stages, so overload
+sheds work predictably instead of growing latency without bound.
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import Dict, Sequence
+
+from starlette.responses import JSONResponse
+
+from config import config
+from metrics import registry
+
+
+ADMIT_FULL = "full"
+ADMIT_FAST = "fast"
+ADMIT_REJECT = "reject"
+
+ADMISSION_DECISIONS_TOTAL = registry.counter(
+    "fraud_admission_decisions_total",
+    "Admission decisions for /analyze (full, fast, reject)",
+    ["decision"]
+)
+ADMISSION_QUEUE_WAIT_SECONDS = registry.histogram(
+    "fraud_admission_queue_wait_seconds",
+    "Time an /analyze request waited in the admission queue"
+)
+
+
+class AdmissionController:
+    """
+    Concurrency limit with a bounded FIFO wait queue.
+
+    Runs on the event loop only, so no locks are needed. A released slot
+    is handed directly to the oldest waiter, so waiting requests are not
+    overtaken by new arrivals.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int = 32,
+        max_queue: int = 64,
+        queue_timeout: float = 0.5,
+        overload_mode: str = ADMIT_FAST,
+        max_fast_in_flight: int = 256,
+        retry_after: int = 1
+    ):
+        """
+        Initialize the controller.
+
+        Args:
+            max_in_flight: Maximum full analyses running at once (0 = no limit)
+            max_queue: Maximum requests waiting for a slot
+            queue_timeout: Seconds a request may wait before it is shed
+            overload_mode: "fast" to degrade shed requests to rules-only, "reject" for 503
+            max_fast_in_flight: Maximum fast-mode analyses at once; beyond this, 503
+            retry_after: Retry-After seconds sent with 503 responses
+        """
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.overload_mode = overload_mode
+        self.max_fast_in_flight = max_fast_in_flight
+        self.retry_after = retry_after
+        self.in_flight = 0
+        self.fast_in_flight = 0
+        self._waiters = deque()
+        self.counts = {ADMIT_FULL: 0, ADMIT_FAST: 0, ADMIT_REJECT: 0}
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def _record(self, decision: str) -> str:
+        self.counts[decision] += 1
+        ADMISSION_DECISIONS_TOTAL.inc(decision)
+        return decision
+
+    def _shed(self) -> str:
+        if self.overload_mode == ADMIT_FAST and self.fast_in_flight < self.max_fast_in_flight:
+            self.fast_in_flight += 1
+            return self._record(ADMIT_FAST)
+        return self._record(ADMIT_REJECT)
+
+    async def acquire(self) -> str:
+        """
+        Wait for a slot.
+
+        Returns:
+            ADMIT_FULL, ADMIT_FAST or ADMIT_REJECT; call release() with the
+            decision once the request finishes (not needed for ADMIT_REJECT)
+        """
+        if self.max_in_flight <= 0:
+            return self._record(ADMIT_FULL)
+        if self.in_flight < self.max_in_flight and not self._waiters:
+            self.in_flight += 1
+            return self._record(ADMIT_FULL)
+        if len(self._waiters) >= self.max_queue or self.queue_timeout <= 0:
+            return self._shed()
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        started = time.perf_counter()
+        try:
+            # release() counts the slot as taken before resolving the future
+            await asyncio.wait_for(waiter, self.queue_timeout)
+            return self._record(ADMIT_FULL)
+        except asyncio.TimeoutError:
+            return self._shed()
+        finally:
+            ADMISSION_QUEUE_WAIT_SECONDS.observe(time.perf_counter() - started)
+            if not waiter.done() or waiter.cancelled():
+                try:
+                    self._waiters.remove(waiter)
+                except ValueError:
+                    pass
+
+    def release(self, decision: str):
+        """Free the slot taken by an admitted request."""
+        if decision == ADMIT_FAST:
+            self.fast_in_flight -= 1
+            return
+        if decision != ADMIT_FULL or self.max_in_flight <= 0:
+            return
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                # Hand the slot over without releasing it
+                waiter.set_result(None)
+                return
+        self.in_flight -= 1
+
+    def get_statistics(self) -> Dict:
+        """Get limits, current load and decision counts."""
+        return {
+            "max_in_flight": self.max_in_flight,
+            "max_queue": self.max_queue,
+            "queue_timeout_s": self.queue_timeout,
+            "overload_mode": self.overload_mode,
+            "in_flight": self.in_flight,
+            "fast_in_flight": self.fast_in_flight,
+            "queued": self.queued,
+            "decisions": dict(self.counts)
+        }
+
+
+class AdmissionMiddleware:
+    """
+    ASGI middleware applying an AdmissionController to selected POST paths.
+
+    Fast-mode requests carry request.state.analysis_mode == "fast"; the
+    handler decides which stages to skip.
+    """
+
+    def __init__(self, app, controller: AdmissionController, paths: Sequence[str] = ("/analyze",)):
+        self.app = app
+        self.controller = controller
+        self.paths = frozenset(paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        decision = await self.controller.acquire()
+        if decision == ADMIT_REJECT:
+            response = JSONResponse(
+                {"detail": "Server is overloaded, please retry shortly"},
+                status_code=503,
+                headers={"Retry-After": str(self.controller.retry_after)}
+            )
+            await response(scope, receive, send)
+            return
+
+        scope.setdefault("state", {})["analysis_mode"] = decision
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(decision)
+
+
+# Global instance
+admission_controller = AdmissionController(
+    max_in_flight=config.ADMISSION_MAX_IN_FLIGHT,
+    max_queue=config.ADMISSION_MAX_QUEUE,
+    queue_timeout=config.ADMISSION_QUEUE_TIMEOUT_SECONDS,
+    overload_mode=config.ADMISSION_OVERLOAD_MODE,
+    max_fast_in_flight=config.ADMISSION_MAX_FAST_IN_FLIGHT,
+    retry_after=config.ADMISSION_RETRY_AFTER_SECONDS
+)
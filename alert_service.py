@@ -1,7 +1,3 @@
-import smtplib
-import requests
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
 from typing import Optional
 from config import config
 
@@ -66,6 +62,11 @@ class AlertService:
         primary_reason: str
     ):
         """Send email alert using SMTP."""
+        # Imported here: alerts are rare and these modules slow down startup
+        import smtplib
+        from email.mime.text import MIMEText
+        from email.mime.multipart import MIMEMultipart
+        
         subject = f"🚨 CRITICAL FRAUD ALERT - {threat_category}"
         
         body = f"""
@@ -111,6 +112,8 @@ class AlertService:
         primary_reason: str
     ):
         """Send webhook alert via HTTP POST."""
+        import requests
+        
         payload = {
             "alert_type": "critical_fraud",
             "phone_number": phone_number,
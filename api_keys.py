@@ -0,0 +1,330 @@
+"""
+Tenant-Scoped API Keys
+API keys are issued per tenant and stored hashed in the api_keys table.
+Active keys are kept in memory, so verifying a key never touches the
+database. The key id embedded in the key selects the entry, and the
+SHA-256 hash of the presented key is compared in constant time.
+
+Each key has a token-bucket quota. Usage counts accumulate in memory; a
+background thread flushes them to the database in batches and reloads
+keys changed by other workers.
+
+Key format: fk_<key id>_<secret>. The 8-character key id is stored in
+clear, to identify the key in listings. The key is stored only as its
+hash.
+"""
+
+import hashlib
+import hmac
+import secrets
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import bindparam
+
+from config import config
+from database import SessionLocal
+from db_models import ApiKey
+from metrics import registry
+
+
+API_KEY_REQUESTS_TOTAL = registry.counter(
+    "fraud_api_key_requests_total",
+    "API key checks by result",
+    ["result"]
+)
+
+KEY_PREFIX = "fk_"
+KEY_ID_LENGTH = 8
+
+
+def hash_api_key(key: str) -> str:
+    """SHA-256 of an API key (keys are random, so a slow hash adds nothing)."""
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+def generate_api_key() -> Tuple[str, str]:
+    """Generate a new API key; returns (key, key id)."""
+    key_id = secrets.token_hex(KEY_ID_LENGTH // 2)
+    return f"{KEY_PREFIX}{key_id}_{secrets.token_urlsafe(32)}", key_id
+
+
+def parse_key_id(key: str) -> Optional[str]:
+    """Get the key id of an issued key, or None for other keys."""
+    end = len(KEY_PREFIX) + KEY_ID_LENGTH
+    if key.startswith(KEY_PREFIX) and len(key) > end + 1 and key[end] == "_":
+        return key[len(KEY_PREFIX):end]
+    return None
+
+
+class ApiKeyEntry:
+    """In-memory state of an API key: identity, quota and token bucket."""
+
+    __slots__ = ("id", "key_id", "key_hash", "tenant", "name", "role",
+                 "rate_per_minute", "burst", "tokens", "updated")
+
+    def __init__(self, id, key_id, key_hash, tenant, name, role, rate_per_minute, burst):
+        self.id = id
+        self.key_id = key_id
+        self.key_hash = key_hash
+        self.tenant = tenant
+        self.name = name
+        self.role = role
+        self.rate_per_minute = rate_per_minute
+        self.burst = burst
+        self.tokens = float(max(burst, 1))
+        self.updated = time.monotonic()
+
+    @classmethod
+    def from_row(cls, row: ApiKey) -> "ApiKeyEntry":
+        return cls(row.id, row.key_id, row.key_hash, row.tenant, row.name or "", row.role,
+                   row.rate_per_minute or 0, row.burst or 0)
+
+    def take(self, now: float, rate_scale: float = 1.0) -> float:
+        """
+        Take one token from the bucket.
+
+        Returns:
+            0 if allowed, otherwise seconds until a token is available
+        """
+        if self.rate_per_minute <= 0:
+            return 0.0
+        rate = self.rate_per_minute / 60.0 * rate_scale
+        capacity = max(self.burst, 1)
+        self.tokens = min(capacity, self.tokens + (now - self.updated) * rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / rate
+
+    def to_dict(self) -> Dict:
+        return {
+            "id": self.id,
+            "key_id": self.key_id,
+            "tenant": self.tenant,
+            "name": self.name,
+            "role": self.role,
+            "rate_per_minute": self.rate_per_minute,
+            "burst": self.burst
+        }
+
+
+class ApiKeyRegistry:
+    """
+    In-memory cache of active API keys with quota enforcement.
+
+    Buckets are per process. With several workers, set
+    API_KEY_QUOTA_WORKERS to the worker count and each worker enforces its
+    share of every key's rate.
+    """
+
+    def __init__(
+        self,
+        legacy_keys: Optional[Dict[str, str]] = None,
+        legacy_rate_per_minute: int = 0,
+        legacy_burst: int = 0,
+        refresh_interval: float = 30.0,
+        flush_interval: float = 10.0,
+        workers: int = 1,
+        session_factory=SessionLocal
+    ):
+        """
+        Initialize the registry.
+
+        Args:
+            legacy_keys: Config keys accepted for the "default" tenant ({key: role})
+            legacy_rate_per_minute: Quota of the config keys (0 = unlimited)
+            legacy_burst: Burst size of the config keys
+            refresh_interval: Seconds between reloads of the api_keys table
+            flush_interval: Seconds between usage count flushes
+            workers: Worker processes sharing each key's quota
+            session_factory: Callable returning a database session
+        """
+        self.refresh_interval = refresh_interval
+        self.flush_interval = flush_interval
+        self.rate_scale = 1.0 / max(workers, 1)
+        self.session_factory = session_factory
+        self._legacy = [
+            (key.encode("utf-8"), ApiKeyEntry(None, f"config-{role}", "", "default", f"{role} config key", role,
+                                              legacy_rate_per_minute, legacy_burst))
+            for key, role in (legacy_keys or {}).items() if key
+        ]
+        self._entries: Dict[str, ApiKeyEntry] = {}
+        self._lock = threading.Lock()
+        self._usage: Dict[int, int] = defaultdict(int)
+        self._last_used: Dict[int, datetime] = {}
+        self._stop = threading.Event()
+        self._thread = None
+        self.last_refresh = 0.0
+
+    def authenticate(self, key: str) -> Optional[ApiKeyEntry]:
+        """Get the entry of a valid API key, or None."""
+        key_id = parse_key_id(key)
+        if key_id is not None:
+            entry = self._entries.get(key_id)
+            if entry is not None and hmac.compare_digest(entry.key_hash, hash_api_key(key)):
+                return entry
+            return None
+        # Compare against every config key so timing does not reveal which one matched
+        presented = key.encode("utf-8")
+        matched = None
+        for legacy_key, entry in self._legacy:
+            if hmac.compare_digest(legacy_key, presented):
+                matched = entry
+        return matched
+
+    def admit(self, entry: ApiKeyEntry) -> float:
+        """
+        Charge one request to a key's quota and usage count.
+
+        Returns:
+            0 if admitted, otherwise seconds the client should wait
+        """
+        with self._lock:
+            retry_after = entry.take(time.monotonic(), self.rate_scale)
+            if retry_after == 0 and entry.id is not None:
+                self._usage[entry.id] += 1
+                self._last_used[entry.id] = datetime.now()
+        API_KEY_REQUESTS_TOTAL.inc("admitted" if retry_after == 0 else "over_quota")
+        return retry_after
+
+    def load(self) -> int:
+        """Reload active keys from the database, keeping bucket state of unchanged keys."""
+        db = self.session_factory()
+        try:
+            rows = db.query(ApiKey).filter(ApiKey.active.is_(True)).all()
+            entries = {}
+            for row in rows:
+                entry = ApiKeyEntry.from_row(row)
+                current = self._entries.get(row.key_id)
+                if current is not None and (current.rate_per_minute, current.burst) == (entry.rate_per_minute, entry.burst):
+                    entry = current
+                    entry.role, entry.name = row.role, row.name or ""
+                entries[row.key_id] = entry
+        finally:
+            db.close()
+        self._entries = entries
+        self.last_refresh = time.time()
+        return len(entries)
+
+    def flush_usage(self) -> int:
+        """Add accumulated usage counts to the database in one batch; returns keys updated."""
+        with self._lock:
+            if not self._usage:
+                return 0
+            usage, self._usage = self._usage, defaultdict(int)
+            last_used, self._last_used = self._last_used, {}
+
+        rows = [
+            {"key_pk": key_pk, "count": count, "last_used": last_used[key_pk]}
+            for key_pk, count in usage.items()
+        ]
+        table = ApiKey.__table__
+        statement = table.update().where(table.c.id == bindparam("key_pk")).values(
+            usage_count=table.c.usage_count + bindparam("count"),
+            last_used_at=bindparam("last_used")
+        )
+        db = self.session_factory()
+        try:
+            db.execute(statement, rows)
+            db.commit()
+        except Exception:
+            db.rollback()
+            # Keep the counts for the next flush
+            with self._lock:
+                for key_pk, count in usage.items():
+                    self._usage[key_pk] += count
+                    self._last_used.setdefault(key_pk, last_used[key_pk])
+            raise
+        finally:
+            db.close()
+        return len(rows)
+
+    def create_key(self, db, tenant: str, name: str = "", role: str = "public",
+                   rate_per_minute: int = 600, burst: int = 60) -> Tuple[str, ApiKey]:
+        """
+        Issue a key and make it usable immediately in this process.
+
+        Returns:
+            (key, row); the key itself is not stored and cannot be shown again
+        """
+        key, key_id = generate_api_key()
+        row = ApiKey(
+            key_id=key_id,
+            key_hash=hash_api_key(key),
+            tenant=tenant,
+            name=name,
+            role=role,
+            rate_per_minute=rate_per_minute,
+            burst=burst,
+            active=True,
+            created_at=datetime.now()
+        )
+        db.add(row)
+        db.commit()
+        db.refresh(row)
+        self._entries = {**self._entries, key_id: ApiKeyEntry.from_row(row)}
+        return key, row
+
+    def revoke_key(self, db, key_pk: int) -> Optional[ApiKey]:
+        """Deactivate a key; returns the row, or None if it does not exist."""
+        row = db.query(ApiKey).filter(ApiKey.id == key_pk).first()
+        if row is None:
+            return None
+        row.active = False
+        db.commit()
+        self._entries = {key_id: entry for key_id, entry in self._entries.items() if key_id != row.key_id}
+        return row
+
+    def pending_usage(self, key_pk: int) -> int:
+        """Requests counted in memory but not yet flushed to the database."""
+        return self._usage.get(key_pk, 0)
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush_usage()
+                if time.time() - self.last_refresh >= self.refresh_interval:
+                    self.load()
+            except Exception as e:
+                print(f"API key registry error: {e}")
+
+    def start(self):
+        """Start the background flush and refresh thread."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="api-keys", daemon=True)
+        self._thread.start()
+
+    def close(self):
+        """Stop the background thread and flush remaining usage counts."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.flush_interval + 5)
+        try:
+            self.flush_usage()
+        except Exception as e:
+            print(f"API key usage flush error: {e}")
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def cached(self, key_id: str) -> Optional[ApiKeyEntry]:
+        """Get the in-memory entry of an active key."""
+        return self._entries.get(key_id)
+
+
+# Global instance
+api_key_registry = ApiKeyRegistry(
+    legacy_keys={config.PUBLIC_API_KEY: "public", config.ADMIN_API_KEY: "admin"},
+    legacy_rate_per_minute=config.LEGACY_API_KEY_RATE_PER_MINUTE,
+    legacy_burst=config.LEGACY_API_KEY_BURST,
+    refresh_interval=config.API_KEY_REFRESH_SECONDS,
+    flush_interval=config.API_KEY_USAGE_FLUSH_SECONDS,
+    workers=config.API_KEY_QUOTA_WORKERS
+)
@@ -1,17 +1,21 @@
 """
 Authentication module for user registration, login, and JWT token management.
 """
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from typing import Optional
+import os
 import re
-import bcrypt
-from jose import JWTError, jwt
+import threading
+import time
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 from pydantic import BaseModel, EmailStr, validator
 from database import get_db
 from db_models import User
+from config import config
+from password_pool import PasswordHashPool, PasswordPoolSaturated
 
 # JWT Configuration
 SECRET_KEY = "your-secret-key-change-in-production-use-env-variable"  # Change in production!
@@ -21,6 +25,12 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24  # 24 hours
 # HTTP Bearer for token authentication
 security = HTTPBearer()
 
+# Dedicated threads for bcrypt so hashing never blocks the event loop
+password_pool = PasswordHashPool(
+    max_workers=config.PASSWORD_POOL_WORKERS,
+    max_queue=config.PASSWORD_POOL_MAX_QUEUE
+)
+
 
 # Pydantic models
 class UserRegister(BaseModel):
@@ -85,11 +95,164 @@ class Token(BaseModel):
 class TokenData(BaseModel):
     username: Optional[str] = None
     role: Optional[str] = None
+    exp: Optional[int] = None
+
+
+class UserPrincipal(BaseModel):
+    """Authenticated user detached from any database session."""
+    id: int
+    username: str
+    email: str
+    role: str
+    created_at: Optional[datetime] = None
+    
+    @classmethod
+    def from_user(cls, user: User) -> "UserPrincipal":
+        """Build a principal from a User row."""
+        return cls(
+            id=user.id,
+            username=user.username,
+            email=user.email,
+            role=user.role,
+            created_at=user.created_at
+        )
+
+
+class AuthCache:
+    """
+    Bounded, TTL-limited cache of verified tokens mapped to user principals.
+    
+    A cache hit skips both JWT signature verification and the user lookup.
+    Entries never outlive the token's own expiry. Changes made in another
+    process (manage_users.py or another worker) are picked up through the
+    modification time of a shared invalidation file, which is checked at
+    most once per second.
+    """
+    
+    def __init__(self, max_entries: int = 10000, ttl_seconds: int = 300, invalidation_file: str = ""):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.invalidation_file = invalidation_file
+        self._entries = OrderedDict()  # {token: (principal, expires_at)}
+        self._tokens_by_user = {}  # {username: set of tokens}
+        self._lock = threading.Lock()
+        self._file_mtime = self._read_file_mtime()
+        self._last_file_check = time.monotonic()
+    
+    def _read_file_mtime(self) -> int:
+        if not self.invalidation_file:
+            return 0
+        try:
+            return os.stat(self.invalidation_file).st_mtime_ns
+        except OSError:
+            return 0
+    
+    def _check_external_invalidation(self):
+        """Clear the cache if another process signalled a user change."""
+        now = time.monotonic()
+        if now - self._last_file_check < 1.0:
+            return
+        self._last_file_check = now
+        mtime = self._read_file_mtime()
+        if mtime != self._file_mtime:
+            self._file_mtime = mtime
+            self.clear()
+    
+    def get(self, token: str) -> Optional[UserPrincipal]:
+        """Get the cached principal for a token, if still valid."""
+        if self.ttl_seconds <= 0:
+            return None
+        self._check_external_invalidation()
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                return None
+            principal, expires_at = entry
+            if time.time() >= expires_at:
+                self._discard(token)
+                return None
+            self._entries.move_to_end(token)
+            return principal
+    
+    def put(self, token: str, principal: UserPrincipal, token_exp: Optional[int] = None):
+        """Cache a verified token until the earlier of TTL and token expiry."""
+        if self.ttl_seconds <= 0:
+            return
+        expires_at = time.time() + self.ttl_seconds
+        if token_exp is not None:
+            expires_at = min(expires_at, token_exp)
+        with self._lock:
+            self._discard(token)
+            self._entries[token] = (principal, expires_at)
+            self._tokens_by_user.setdefault(principal.username, set()).add(token)
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._discard(oldest)
+    
+    def _discard(self, token: str):
+        entry = self._entries.pop(token, None)
+        if entry is None:
+            return
+        username = entry[0].username
+        tokens = self._tokens_by_user.get(username)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._tokens_by_user[username]
+    
+    def invalidate_user(self, username: str):
+        """Drop every cached token belonging to a user."""
+        with self._lock:
+            for token in list(self._tokens_by_user.get(username, ())):
+                self._discard(token)
+    
+    def clear(self):
+        """Drop all cached tokens."""
+        with self._lock:
+            self._entries.clear()
+            self._tokens_by_user.clear()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+auth_cache = AuthCache(
+    max_entries=config.AUTH_CACHE_MAX_ENTRIES,
+    ttl_seconds=config.AUTH_CACHE_TTL_SECONDS,
+    invalidation_file=config.AUTH_CACHE_INVALIDATION_FILE
+)
+
+
+def notify_user_changed(username: Optional[str] = None):
+    """
+    Invalidate cached authentication after a user's role changes or the
+    user is deleted.
+    
+    Clears the user's tokens in this process and touches the shared
+    invalidation file so other workers and processes clear theirs.
+    
+    Args:
+        username: Changed user, or None if many users changed
+    """
+    if username is None:
+        auth_cache.clear()
+    else:
+        auth_cache.invalidate_user(username)
+    
+    if config.AUTH_CACHE_INVALIDATION_FILE:
+        try:
+            with open(config.AUTH_CACHE_INVALIDATION_FILE, "a"):
+                pass
+            os.utime(config.AUTH_CACHE_INVALIDATION_FILE, None)
+        except OSError as e:
+            print(f"Auth cache invalidation error: {str(e)}")
 
 
 # Password utilities
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash using bcrypt."""
+    import bcrypt
+    
     try:
         # Convert password to bytes
         password_bytes = plain_password.encode('utf-8')
@@ -111,6 +274,8 @@ def get_password_hash(password: str) -> str:
     Hash a password with bcrypt.
     Ensures password doesn't exceed 72 bytes (bcrypt limitation).
     """
+    import bcrypt
+    
     try:
         # Check byte length
         password_bytes = password.encode('utf-8')
@@ -140,6 +305,8 @@ def get_password_hash(password: str) -> str:
 # JWT utilities
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Create a JWT access token."""
+    from jose import jwt
+    
     to_encode = data.copy()
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
@@ -152,17 +319,20 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
 
 def decode_access_token(token: str) -> TokenData:
     """Decode and validate a JWT token."""
+    from jose import JWTError, jwt
+    
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         username: str = payload.get("sub")
         role: str = payload.get("role")
+        exp: Optional[int] = payload.get("exp")
         if username is None:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Could not validate credentials",
                 headers={"WWW-Authenticate": "Bearer"},
             )
-        return TokenData(username=username, role=role)
+        return TokenData(username=username, role=role, exp=exp)
     except JWTError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -195,6 +365,40 @@ def authenticate_user(db: Session, username_or_email: str, password: str) -> Opt
     return user
 
 
+async def run_password_task(func, *args):
+    """
+    Run a bcrypt function in the password pool.
+    
+    Raises:
+        HTTPException: 503 with Retry-After if the pool's queue is full
+    """
+    try:
+        return await password_pool.run(func, *args)
+    except PasswordPoolSaturated:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Authentication service is busy, please retry shortly",
+            headers={"Retry-After": "1"},
+        )
+
+
+async def authenticate_user_async(db: Session, username_or_email: str, password: str) -> Optional[User]:
+    """
+    Authenticate a user like authenticate_user, verifying the password in
+    the password pool instead of on the event loop.
+    """
+    user = db.query(User).filter(User.username == username_or_email).first()
+    if not user:
+        user = db.query(User).filter(User.email == username_or_email).first()
+    if not user:
+        return None
+    
+    if not await run_password_task(verify_password, password, user.hashed_password):
+        return None
+    
+    return user
+
+
 def get_user_by_username(db: Session, username: str) -> Optional[User]:
     """Get a user by username."""
     return db.query(User).filter(User.username == username).first()
@@ -221,13 +425,38 @@ def create_user(db: Session, username: str, email: str, password: str, role: str
     return user
 
 
+async def create_user_async(db: Session, username: str, email: str, password: str, role: str = "user") -> User:
+    """Create a new user, hashing the password in the password pool."""
+    hashed_password = await run_password_task(get_password_hash, password)
+    user = User(
+        username=username,
+        email=email,
+        hashed_password=hashed_password,
+        role=role,
+        created_at=datetime.now()
+    )
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+    return user
+
+
 # Dependency for getting current user from token
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: Session = Depends(get_db)
-) -> User:
-    """Get the current authenticated user from JWT token."""
+) -> UserPrincipal:
+    """
+    Get the current authenticated user from JWT token.
+    
+    Verified tokens are served from auth_cache, so repeated requests with
+    the same token need neither signature verification nor a DB query.
+    """
     token = credentials.credentials
+    principal = auth_cache.get(token)
+    if principal is not None:
+        return principal
+    
     token_data = decode_access_token(token)
     user = get_user_by_username(db, token_data.username)
     if user is None:
@@ -236,11 +465,13 @@ async def get_current_user(
             detail="User not found",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    return user
+    principal = UserPrincipal.from_user(user)
+    auth_cache.put(token, principal, token_data.exp)
+    return principal
 
 
 # Dependency for admin-only routes
-async def get_current_admin_user(current_user: User = Depends(get_current_user)) -> User:
+async def get_current_admin_user(current_user: UserPrincipal = Depends(get_current_user)) -> UserPrincipal:
     """Verify that the current user is an admin."""
     if current_user.role != "admin":
         raise HTTPException(
@@ -0,0 +1,494 @@
+"""
+Load Benchmark for the /analyze Endpoint
+Replays a JSONL corpus of FraudRequest bodies against the ASGI app
+in-process or against a running server, and reports latency percentiles,
+throughput and per-stage time inside analyze_message.
+
+Usage:
+    python benchmark.py generate corpus.jsonl --count 5000
+    python benchmark.py run corpus.jsonl --concurrency 16 --requests 2000
+    python benchmark.py run corpus.jsonl --rate 200 --duration 30 --url http://localhost:8000
+
+In-process runs use the DATABASE_URL of the current environment, so point
+it at a scratch database before benchmarking.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from instrumentation import parse_server_timing
+
+
+FRAUD_REQUEST_FIELDS = ("phone_number", "message_content")
+
+SCAM_TEMPLATES = [
+    "URGENT: your {bank} account has been suspended. Verify now at {link} to avoid penalty",
+    "Your {bank} credit card is blocked. Call immediately to unblock or face legal action",
+    "Congratulations! You won a {amount} prize. Send your bank details now to claim",
+    "Final notice: pay {amount} customs fee immediately or your parcel will be returned",
+    "Act fast! Send gift card codes worth {amount} to release your account",
+    "Wire transfer of {amount} pending. Verify your account details at {link}"
+]
+
+LEGITIMATE_TEMPLATES = [
+    "Hi, are we still meeting for lunch tomorrow at {time}?",
+    "The meeting has been moved to {time}. See you there",
+    "Thanks for the documents, I will review them this evening",
+    "Happy birthday! Hope you have a wonderful day",
+    "Can you pick up some groceries on the way home?",
+    "Your appointment is confirmed for {time} on Friday"
+]
+
+FILLERS = {
+    "bank": ["SBI", "HDFC", "Chase", "Barclays", "Wells Fargo"],
+    "link": ["secure-verify.co", "bank-login.net", "account-check.info"],
+    "amount": ["$500", "$1,000", "Rs 25000", "$250"],
+    "time": ["10 AM", "noon", "3 PM", "6:30 PM"]
+}
+
+
+# ----------------------------------------------------------------------------
+# Corpus
+# ----------------------------------------------------------------------------
+
+def generate_corpus(count: int, scam_ratio: float = 0.4, seed: int = 42) -> List[Dict]:
+    """
+    Generate a synthetic corpus of FraudRequest bodies.
+
+    Scam messages are drawn from a small set of campaigns sent from many
+    sender numbers; some senders repeat to exercise rate limiting and
+    history checks.
+
+    Args:
+        count: Number of requests to generate
+        scam_ratio: Fraction of scam messages
+        seed: Random seed for reproducible corpora
+
+    Returns:
+        List of request bodies
+    """
+    rng = random.Random(seed)
+    repeat_senders = [f"+1555{rng.randint(0, 9999999):07d}" for _ in range(20)]
+    corpus = []
+
+    for _ in range(count):
+        is_scam = rng.random() < scam_ratio
+        template = rng.choice(SCAM_TEMPLATES if is_scam else LEGITIMATE_TEMPLATES)
+        message = template.format(**{key: rng.choice(values) for key, values in FILLERS.items()})
+
+        if rng.random() < 0.1:
+            phone = rng.choice(repeat_senders)
+        elif is_scam and rng.random() < 0.05:
+            phone = rng.choice(["1111111111", "9999999999", "5555555555", "12345678"])
+        else:
+            phone = f"+{rng.choice(['1', '44', '91'])}{rng.randint(10 ** 9, 10 ** 10 - 1)}"
+
+        corpus.append({"phone_number": phone, "message_content": message})
+
+    return corpus
+
+
+def load_corpus(path: str) -> List[Dict]:
+    """
+    Load FraudRequest bodies from a JSONL file.
+
+    Lines that are not JSON objects with a FraudRequest field are skipped.
+
+    Args:
+        path: Path to the JSONL file
+
+    Returns:
+        List of request bodies
+    """
+    corpus = []
+    skipped = 0
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                item = json.loads(line)
+            except json.JSONDecodeError:
+                skipped += 1
+                continue
+            if not isinstance(item, dict) or not any(field in item for field in FRAUD_REQUEST_FIELDS):
+                skipped += 1
+                continue
+            corpus.append({field: item.get(field) for field in FRAUD_REQUEST_FIELDS})
+
+    if skipped:
+        print(f"Skipped {skipped} line(s) without FraudRequest fields")
+    return corpus
+
+
+# ----------------------------------------------------------------------------
+# Transports
+# ----------------------------------------------------------------------------
+
+class ASGITransport:
+    """Send requests straight into an ASGI app without a network socket."""
+
+    def __init__(self, app):
+        self.app = app
+        self._lifespan_task = None
+        self._lifespan_queue = None
+        self._lifespan_done = None
+        self._background = set()
+
+    async def start(self):
+        """Run the app's lifespan startup, if it supports one."""
+        self._lifespan_queue = asyncio.Queue()
+        self._lifespan_done = asyncio.Queue()
+        await self._lifespan_queue.put({"type": "lifespan.startup"})
+
+        async def receive():
+            return await self._lifespan_queue.get()
+
+        async def send(message):
+            await self._lifespan_done.put(message)
+
+        scope = {"type": "lifespan", "asgi": {"version": "3.0"}, "state": {}}
+        self._lifespan_task = asyncio.ensure_future(self.app(scope, receive, send))
+        message = await self._lifespan_done.get()
+        if message["type"] == "lifespan.startup.failed":
+            raise RuntimeError(message.get("message", "Lifespan startup failed"))
+
+    async def stop(self):
+        """Wait for background tasks, then run the app's lifespan shutdown."""
+        if self._background:
+            await asyncio.gather(*self._background, return_exceptions=True)
+        if self._lifespan_task is None:
+            return
+        await self._lifespan_queue.put({"type": "lifespan.shutdown"})
+        await self._lifespan_done.get()
+        await self._lifespan_task
+
+    async def post(self, path: str, body: Dict, headers: Dict[str, str]):
+        """
+        POST a JSON body to the app.
+
+        Returns as soon as the response body is complete, like a real
+        client would; background tasks keep running in the app.
+
+        Returns:
+            Tuple of (status code, response headers dict)
+        """
+        payload = json.dumps(body).encode("utf-8")
+        raw_headers = [(b"content-type", b"application/json"),
+                       (b"content-length", str(len(payload)).encode())]
+        raw_headers += [(k.lower().encode(), v.encode()) for k, v in headers.items()]
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "POST",
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": b"",
+            "headers": raw_headers,
+            "client": ("127.0.0.1", 50000),
+            "server": ("benchmark", 80)
+        }
+        sent = False
+        result = {"status": 0, "headers": {}}
+        completed = asyncio.Event()
+
+        async def receive():
+            nonlocal sent
+            if not sent:
+                sent = True
+                return {"type": "http.request", "body": payload, "more_body": False}
+            # Never report a disconnect while the app is still responding
+            await asyncio.Event().wait()
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                result["status"] = message["status"]
+                result["headers"] = {k.decode().lower(): v.decode() for k, v in message["headers"]}
+            elif message["type"] == "http.response.body" and not message.get("more_body", False):
+                completed.set()
+
+        task = asyncio.ensure_future(self.app(scope, receive, send))
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+        # Finish when the response completes or the app fails without one
+        done_waiter = asyncio.ensure_future(completed.wait())
+        await asyncio.wait({task, done_waiter}, return_when=asyncio.FIRST_COMPLETED)
+        done_waiter.cancel()
+        if task.done() and task.exception() is not None and not completed.is_set():
+            raise task.exception()
+        return result["status"], result["headers"]
+
+
+class HTTPTransport:
+    """Send requests to a running server with one session per thread."""
+
+    def __init__(self, base_url: str, concurrency: int):
+        import requests
+        self._requests = requests
+        self.base_url = base_url.rstrip("/")
+        self._local = threading.local()
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="benchmark")
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        self._executor.shutdown(wait=True)
+
+    def _post_sync(self, path: str, body: Dict, headers: Dict[str, str]):
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = self._requests.Session()
+        response = session.post(self.base_url + path, json=body, headers=headers, timeout=30)
+        return response.status_code, {k.lower(): v for k, v in response.headers.items()}
+
+    async def post(self, path: str, body: Dict, headers: Dict[str, str]):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._post_sync, path, body, headers)
+
+
+# ----------------------------------------------------------------------------
+# Runner
+# ----------------------------------------------------------------------------
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(pct / 100.0 * len(sorted_values)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+class BenchmarkResult:
+    """Collected latencies, status codes and stage timings of a run."""
+
+    def __init__(self):
+        self.latencies_ms: List[float] = []
+        self.status_counts: Dict[int, int] = {}
+        self.stage_ms: Dict[str, List[float]] = {}
+        self.errors = 0
+        self.elapsed = 0.0
+
+    def record(self, latency_ms: float, status_code: int, headers: Dict[str, str]):
+        self.latencies_ms.append(latency_ms)
+        self.status_counts[status_code] = self.status_counts.get(status_code, 0) + 1
+        for stage, duration in parse_server_timing(headers.get("server-timing", "")).items():
+            self.stage_ms.setdefault(stage, []).append(duration)
+
+    def summary(self) -> Dict:
+        """Summarise the run as a JSON-serialisable dictionary."""
+        latencies = sorted(self.latencies_ms)
+        stages = {}
+        for stage, values in self.stage_ms.items():
+            values = sorted(values)
+            stages[stage] = {
+                "mean_ms": round(sum(values) / len(values), 3),
+                "p95_ms": round(percentile(values, 95), 3)
+            }
+        return {
+            "requests": len(latencies),
+            "errors": self.errors,
+            "status_codes": self.status_counts,
+            "elapsed_s": round(self.elapsed, 3),
+            "requests_per_second": round(len(latencies) / self.elapsed, 1) if self.elapsed else 0.0,
+            "latency_ms": {
+                "p50": round(percentile(latencies, 50), 3),
+                "p95": round(percentile(latencies, 95), 3),
+                "p99": round(percentile(latencies, 99), 3),
+                "max": round(latencies[-1], 3) if latencies else 0.0
+            },
+            "stages": stages
+        }
+
+
+async def run_benchmark(
+    transport,
+    corpus: List[Dict],
+    total_requests: int,
+    concurrency: int,
+    rate: Optional[float],
+    api_key: str,
+    warmup: int = 0
+) -> BenchmarkResult:
+    """
+    Replay the corpus through a transport.
+
+    Closed loop (rate is None): concurrency workers each send the next
+    request as soon as their previous one completes.
+
+    Open loop (rate given): requests arrive on a fixed schedule regardless
+    of completions, with at most concurrency in flight. Latency is measured
+    from the scheduled arrival time so queueing delay is not hidden.
+
+    Args:
+        transport: ASGITransport or HTTPTransport
+        corpus: Request bodies, cycled if shorter than total_requests
+        total_requests: Number of measured requests
+        concurrency: Maximum requests in flight
+        rate: Arrival rate in requests per second, or None for closed loop
+        api_key: X-API-KEY header value
+        warmup: Number of unmeasured requests sent first
+
+    Returns:
+        BenchmarkResult
+    """
+    headers = {"X-API-KEY": api_key, "X-Debug-Timings": "1"}
+    result = BenchmarkResult()
+
+    for i in range(warmup):
+        await transport.post("/analyze", corpus[i % len(corpus)], headers)
+
+    async def send(index: int, scheduled_at: float):
+        try:
+            status_code, response_headers = await transport.post("/analyze", corpus[index % len(corpus)], headers)
+        except Exception as e:
+            result.errors += 1
+            if result.errors <= 5:
+                print(f"Request error: {e}")
+            return
+        result.record((time.perf_counter() - scheduled_at) * 1000, status_code, response_headers)
+
+    started = time.perf_counter()
+
+    if rate is None:
+        counter = iter(range(total_requests))
+
+        async def worker():
+            for index in counter:
+                await send(index, time.perf_counter())
+
+        await asyncio.gather(*[worker() for _ in range(concurrency)])
+    else:
+        semaphore = asyncio.Semaphore(concurrency)
+        interval = 1.0 / rate
+        tasks = []
+
+        async def limited(index: int, scheduled_at: float):
+            async with semaphore:
+                await send(index, scheduled_at)
+
+        for index in range(total_requests):
+            scheduled_at = started + index * interval
+            delay = scheduled_at - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.ensure_future(limited(index, scheduled_at)))
+        await asyncio.gather(*tasks)
+
+    result.elapsed = time.perf_counter() - started
+    return result
+
+
+def print_summary(summary: Dict):
+    """Print a human-readable benchmark report."""
+    print("\n" + "="*60)
+    print("BENCHMARK RESULTS")
+    print("="*60)
+    print(f"Requests:        {summary['requests']} ({summary['errors']} errors)")
+    print(f"Status codes:    {summary['status_codes']}")
+    print(f"Elapsed:         {summary['elapsed_s']} s")
+    print(f"Throughput:      {summary['requests_per_second']} req/s")
+    latency = summary["latency_ms"]
+    print(f"Latency (ms):    p50={latency['p50']}  p95={latency['p95']}  p99={latency['p99']}  max={latency['max']}")
+
+    if summary["stages"]:
+        print("\nPer-stage time inside analyze_message (ms):")
+        print(f"  {'stage':<18}{'mean':>10}{'p95':>10}")
+        for stage, stats in sorted(summary["stages"].items(), key=lambda item: -item[1]["mean_ms"]):
+            print(f"  {stage:<18}{stats['mean_ms']:>10.3f}{stats['p95_ms']:>10.3f}")
+
+
+def main():
+    """Parse command-line arguments and run the requested command."""
+    parser = argparse.ArgumentParser(description="Replay-based load benchmark for /analyze")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    gen = subparsers.add_parser("generate", help="Write a synthetic JSONL corpus")
+    gen.add_argument("output", help="Output JSONL path")
+    gen.add_argument("--count", type=int, default=1000, help="Number of requests")
+    gen.add_argument("--scam-ratio", type=float, default=0.4, help="Fraction of scam messages")
+    gen.add_argument("--seed", type=int, default=42, help="Random seed")
+
+    run = subparsers.add_parser("run", help="Replay a JSONL corpus against /analyze")
+    run.add_argument("corpus", help="JSONL file of FraudRequest bodies")
+    run.add_argument("--url", help="Base URL of a running server (default: in-process ASGI)")
+    run.add_argument("--concurrency", type=int, default=8, help="Maximum requests in flight")
+    run.add_argument("--requests", type=int, help="Number of measured requests (default: corpus size)")
+    run.add_argument("--rate", type=float, help="Open-loop arrival rate in requests/second")
+    run.add_argument("--duration", type=float, help="Open-loop run length in seconds (with --rate)")
+    run.add_argument("--warmup", type=int, default=10, help="Unmeasured warm-up requests")
+    run.add_argument("--api-key", help="X-API-KEY value (default: PUBLIC_API_KEY)")
+    run.add_argument("--json", dest="json_output", help="Also write the summary to this JSON file")
+
+    args = parser.parse_args()
+
+    if args.command == "generate":
+        corpus = generate_corpus(args.count, args.scam_ratio, args.seed)
+        with open(args.output, "w", encoding="utf-8") as f:
+            for item in corpus:
+                f.write(json.dumps(item) + "\n")
+        print(f"✓ Wrote {len(corpus)} requests to {args.output}")
+        return
+
+    corpus = load_corpus(args.corpus)
+    if not corpus:
+        print("✗ Corpus is empty")
+        sys.exit(1)
+
+    from config import config
+    api_key = args.api_key or config.PUBLIC_API_KEY
+
+    total_requests = args.requests or len(corpus)
+    if args.rate and args.duration:
+        total_requests = int(args.rate * args.duration)
+
+    if args.url:
+        transport = HTTPTransport(args.url, args.concurrency)
+        target = args.url
+    else:
+        from main import app
+        transport = ASGITransport(app)
+        target = "in-process ASGI app"
+
+    mode = f"open loop at {args.rate} req/s" if args.rate else "closed loop"
+    print(f"Replaying {total_requests} requests against {target} ({mode}, concurrency {args.concurrency})")
+
+    async def execute():
+        await transport.start()
+        if not args.url:
+            # Measure the steady state, not requests served while the model loads
+            from startup import startup_tracker
+            deadline = time.monotonic() + 120
+            while not startup_tracker.ready and time.monotonic() < deadline:
+                await asyncio.sleep(0.05)
+        try:
+            return await run_benchmark(
+                transport, corpus, total_requests, args.concurrency,
+                args.rate, api_key, args.warmup
+            )
+        finally:
+            await transport.stop()
+
+    summary = asyncio.run(execute()).summary()
+    print_summary(summary)
+
+    if args.json_output:
+        with open(args.json_output, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+        print(f"\n✓ Summary written to {args.json_output}")
+
+
+if __name__ == "__main__":
+    main()
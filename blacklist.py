@@ -1,7 +1,16 @@
+import threading
+import time
+
+from blacklist_index import PhonePrefixIndex, MATCH_EXACT
+from database import SessionLocal
+from db_models import Blacklist
+from rule_engine import RuleSet, rule_engine
+
+
 class BlacklistChecker:
     """Check phone numbers and messages against blacklist."""
     
-    def __init__(self):
+    def __init__(self, refresh_interval: int = 60, session_factory=SessionLocal):
         # In-memory blacklist of known scam phone numbers
         self.blacklisted_phones = [
             "0000000000",
@@ -10,39 +19,116 @@ class BlacklistChecker:
             "1234567890"
         ]
         
-        # In-memory blacklist of high-risk keywords
-        self.blacklisted_keywords = [
-            "nigerian prince",
-            "wire transfer",
-            "western union",
-            "bitcoin wallet",
-            "send gift card"
-        ]
+        # Prefix index over built-in numbers plus the Blacklist table
+        self.index = PhonePrefixIndex.build((phone, "", MATCH_EXACT) for phone in self.blacklisted_phones)
+        self.refresh_interval = refresh_interval
+        self.session_factory = session_factory
+        self.last_refresh = 0.0
+        self._lock = threading.Lock()
+        self._changes = None  # add/remove calls made while a rebuild is running
+        self._stop = threading.Event()
+        self._thread = None
+    
+    def refresh(self, db):
+        """
+        Rebuild the phone index from the Blacklist table.
+        
+        The new index is built aside and swapped in with a single
+        assignment, so concurrent lookups never see a partial index.
+        Entries added or removed while it was being built are replayed
+        onto it before the swap.
+        
+        Args:
+            db: SQLAlchemy session
+        """
+        with self._lock:
+            self._changes = []
+        try:
+            rows = db.query(Blacklist.phone_number, Blacklist.reason, Blacklist.match_type).all()
+            entries = [(phone, "", MATCH_EXACT) for phone in self.blacklisted_phones]
+            entries.extend((row.phone_number, row.reason or "", row.match_type) for row in rows)
+            index = PhonePrefixIndex.build(entries)
+            with self._lock:
+                for method, args in self._changes:
+                    getattr(index, method)(*args)
+                self.index = index
+        finally:
+            with self._lock:
+                self._changes = None
+        self.last_refresh = time.time()
+    
+    def reload(self):
+        """Rebuild the index from the Blacklist table in a new session."""
+        db = self.session_factory()
+        try:
+            self.refresh(db)
+        finally:
+            db.close()
     
-    def check(self, phone_number: str, message: str) -> dict:
+    def _run(self):
+        while not self._stop.wait(self.refresh_interval):
+            try:
+                self.reload()
+            except Exception as e:
+                print(f"Blacklist refresh error: {e}")
+    
+    def start(self):
+        """
+        Start the background thread rebuilding the index every refresh_interval.
+        
+        Keeps workers that did not handle a blacklist change in sync
+        without scanning the table on the request path.
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="blacklist-refresh", daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        """Stop the background refresh thread."""
+        self._stop.set()
+    
+    def add_entry(self, pattern: str, reason: str = "", match_type: str = None):
+        """Add a number, prefix or range to the in-memory index."""
+        with self._lock:
+            self.index.add(pattern, reason, match_type)
+            if self._changes is not None:
+                self._changes.append(("add", (pattern, reason, match_type)))
+    
+    def remove_entry(self, pattern: str, match_type: str = None):
+        """Remove a number, prefix or range from the in-memory index."""
+        with self._lock:
+            self.index.remove(pattern, match_type)
+            if self._changes is not None:
+                self._changes.append(("remove", (pattern, match_type)))
+    
+    def check(self, phone_number: str, message: str, rules: RuleSet = None) -> dict:
         """
         Check if phone number or message contains blacklisted items.
         
         Args:
             phone_number: The phone number to check
             message: The message content to check
-            
+            rules: Rule set providing the blacklisted keywords (default: the active one)
+        
         Returns:
-            Dictionary with risk_boost and reason
+            Dictionary with risk_boost, reason and match_type
+            (exact, prefix, range, keyword or None)
         """
-        # Clean phone number
         if phone_number:
-            clean_phone = phone_number.replace("-", "").replace(" ", "").replace("(", "").replace(")", "")
-            clean_phone = ''.join(char for char in clean_phone if char.isdigit())
-            
-            if clean_phone in self.blacklisted_phones:
-                return {"risk_boost": 25, "reason": "Phone number is blacklisted"}
-        
-        # Check message for blacklisted keywords
-        if message:
-            message_lower = message.lower()
-            for keyword in self.blacklisted_keywords:
-                if keyword in message_lower:
-                    return {"risk_boost": 25, "reason": f"Blacklisted keyword detected: {keyword}"}
-        
-        return {"risk_boost": 0, "reason": ""}
+            match = self.index.match(phone_number)
+            if match:
+                if match["match_type"] == MATCH_EXACT:
+                    reason = "Phone number is blacklisted"
+                else:
+                    reason = f"Phone number is in blacklisted {match['match_type']}: {match['pattern']}"
+                return {"risk_boost": 25, "reason": reason, "match_type": match["match_type"]}
+        
+        # Check message for blacklisted keywords (part of the versioned rule table)
+        rules = rules or rule_engine.rules
+        keyword = rules.blacklisted_keyword(message)
+        if keyword:
+            return {"risk_boost": rules.blacklist_risk_boost, "reason": f"Blacklisted keyword detected: {keyword}", "match_type": "keyword"}
+        
+        return {"risk_boost": 0, "reason": "", "match_type": None}
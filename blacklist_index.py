@@ -0,0 +1,251 @@
+"""
+Prefix Index for Phone Blacklisting
+Digit trie holding exact numbers, number prefixes (e.g. +1555012*) and
+number ranges (e.g. 15550120-15550129) so a lookup costs O(number length)
+regardless of how many entries are loaded. Ranges only cover numbers as
+long as their endpoints, so a range never blocks longer numbers that share
+its prefixes.
+"""
+
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from phone_normalizer import normalize_phone
+
+
+MATCH_EXACT = "exact"
+MATCH_PREFIX = "prefix"
+MATCH_RANGE = "range"
+MATCH_TYPES = (MATCH_EXACT, MATCH_PREFIX, MATCH_RANGE)
+
+# Rows stored without a match type are only read as ranges when both
+# endpoints are at least this long, so "12345-67890" stays one number
+LEGACY_RANGE_MIN_DIGITS = 7
+
+
+def parse_pattern(pattern: str, match_type: Optional[str] = None) -> Tuple[str, List[str], Optional[int]]:
+    """
+    Parse a stored blacklist pattern into its match type and digit keys.
+
+    Supported forms:
+        "555-123-4567"           exact number
+        "+1555012*"              every number starting with the prefix
+        "15550120-15550129"      inclusive range of equal-length numbers
+
+    Args:
+        pattern: Blacklist entry as stored in the phone_number column
+        match_type: Stored match type; None for rows written before match
+            types were stored, which are classified from the pattern
+
+    Returns:
+        Tuple of (match_type, list of digit keys, width); for ranges the
+        keys are the minimal set of prefixes covering the range and width
+        is the length of the numbers it covers, otherwise width is None
+
+    Raises:
+        ValueError: If the pattern is malformed
+    """
+    pattern = (pattern or "").strip()
+    if match_type is not None and match_type not in MATCH_TYPES:
+        raise ValueError(f"Unknown match type: {match_type}")
+
+    if match_type == MATCH_PREFIX or (match_type is None and pattern.endswith("*")):
+        prefix = normalize_phone(pattern[:-1] if pattern.endswith("*") else pattern)
+        if not prefix:
+            raise ValueError("Prefix pattern must contain at least one digit")
+        return MATCH_PREFIX, [prefix], None
+
+    if match_type in (MATCH_RANGE, None):
+        # A range is two numbers separated by '-' with no other dashes inside,
+        # so that formatted numbers like 555-123-4567 stay exact matches
+        parts = pattern.split("-")
+        min_digits = 1 if match_type == MATCH_RANGE else LEGACY_RANGE_MIN_DIGITS
+        if len(parts) == 2:
+            start, end = normalize_phone(parts[0]), normalize_phone(parts[1])
+            if len(start) >= min_digits and len(start) == len(end) and start <= end:
+                return MATCH_RANGE, range_to_prefixes(start, end), len(start)
+        if match_type == MATCH_RANGE:
+            raise ValueError("Range must be two numbers of equal length, lowest first (e.g. 15550120-15550129)")
+
+    number = normalize_phone(pattern)
+    if not number:
+        raise ValueError("Phone number must contain at least one digit")
+    return MATCH_EXACT, [number], None
+
+
+def range_to_prefixes(start: str, end: str) -> List[str]:
+    """
+    Cover an inclusive range of equal-length digit strings with prefixes.
+
+    Args:
+        start: First number in the range
+        end: Last number in the range (same length as start)
+
+    Returns:
+        Minimal list of digit prefixes whose union is exactly the range
+    """
+    width = len(start)
+    low, high = int(start), int(end)
+    prefixes = []
+
+    while low <= high:
+        # Grow the block while it stays aligned and inside the range
+        size = 0
+        while size < width:
+            block = 10 ** (size + 1)
+            if low % block != 0 or low + block - 1 > high:
+                break
+            size += 1
+        prefix = str(low).zfill(width)[:width - size]
+        prefixes.append(prefix)
+        low += 10 ** size
+
+    return prefixes
+
+
+class _TrieNode:
+    """Single digit node of the prefix index."""
+
+    __slots__ = ("children", "exact", "prefix")
+
+    def __init__(self):
+        self.children = {}
+        self.exact = None   # {pattern: reason} for numbers ending here
+        self.prefix = None  # {pattern: (match_type, reason, width)} for blocks starting here
+
+
+class PhonePrefixIndex:
+    """
+    Trie over canonical phone digits.
+
+    Each node may carry exact-number entries and prefix entries. A lookup
+    walks the digits of the number once, remembering the deepest prefix
+    seen (range blocks only count for numbers of the range's width), and
+    checks for an exact entry at the end.
+    """
+
+    def __init__(self):
+        """Initialize an empty index."""
+        self.root = _TrieNode()
+        self.size = 0
+
+    def _node(self, digits: str, create: bool) -> Optional[_TrieNode]:
+        node = self.root
+        for digit in digits:
+            child = node.children.get(digit)
+            if child is None:
+                if not create:
+                    return None
+                child = node.children[digit] = _TrieNode()
+            node = child
+        return node
+
+    def add(self, pattern: str, reason: str = "", match_type: Optional[str] = None):
+        """
+        Add a blacklist pattern to the index.
+
+        Args:
+            pattern: Exact number, prefix ending in '*', or range 'start-end'
+            reason: Reason shown when the pattern matches
+            match_type: Stored match type (None = classify the pattern)
+        """
+        match_type, keys, width = parse_pattern(pattern, match_type)
+        added = False
+        for key in keys:
+            node = self._node(key, create=True)
+            if match_type == MATCH_EXACT:
+                if node.exact is None:
+                    node.exact = {}
+                entries, value = node.exact, reason
+            else:
+                if node.prefix is None:
+                    node.prefix = {}
+                entries, value = node.prefix, (match_type, reason, width)
+            if pattern not in entries:
+                added = True
+            entries[pattern] = value
+        # Re-adding a stored pattern only updates its reason
+        if added:
+            self.size += 1
+
+    def remove(self, pattern: str, match_type: Optional[str] = None):
+        """
+        Remove a blacklist pattern from the index.
+
+        Args:
+            pattern: Pattern exactly as it was added
+            match_type: Match type it was added with
+        """
+        try:
+            match_type, keys, _ = parse_pattern(pattern, match_type)
+        except ValueError:
+            return
+
+        removed = False
+        for key in keys:
+            node = self._node(key, create=False)
+            if node is None:
+                continue
+            entries = node.exact if match_type == MATCH_EXACT else node.prefix
+            if entries and pattern in entries:
+                del entries[pattern]
+                removed = True
+        if removed:
+            self.size -= 1
+
+    def match(self, phone_number: str) -> Optional[Dict]:
+        """
+        Find the blacklist entry covering a phone number.
+
+        Exact entries win over prefixes; among prefixes the longest wins.
+
+        Args:
+            phone_number: Raw or canonical phone number
+
+        Returns:
+            Dictionary with match_type, pattern and reason, or None
+        """
+        digits = normalize_phone(phone_number)
+        if not digits:
+            return None
+
+        best_prefix = None
+        length = len(digits)
+        node = self.root
+        for digit in digits:
+            node = node.children.get(digit)
+            if node is None:
+                break
+            if node.prefix:
+                for pattern, (match_type, reason, width) in node.prefix.items():
+                    if width is None or width == length:
+                        best_prefix = (pattern, match_type, reason)
+                        break
+        else:
+            if node.exact:
+                pattern, reason = next(iter(node.exact.items()))
+                return {"match_type": MATCH_EXACT, "pattern": pattern, "reason": reason}
+
+        if best_prefix:
+            pattern, match_type, reason = best_prefix
+            return {"match_type": match_type, "pattern": pattern, "reason": reason}
+
+        return None
+
+    @classmethod
+    def build(cls, entries: Iterable[Tuple]) -> "PhonePrefixIndex":
+        """
+        Build an index from (pattern, reason[, match_type]) tuples, skipping malformed ones.
+
+        Args:
+            entries: Iterable of (pattern, reason) or (pattern, reason, match_type)
+
+        Returns:
+            Populated PhonePrefixIndex
+        """
+        index = cls()
+        for entry in entries:
+            try:
+                index.add(*entry)
+            except ValueError:
+                continue
+        return index
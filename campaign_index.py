@@ -0,0 +1,241 @@
+"""
+Campaign Index for Near-Duplicate Message Detection
+Streaming MinHash/LSH index that groups messages sent from different
+numbers into campaigns without pairwise comparisons.
+"""
+
+import re
+import threading
+import time
+import zlib
+from collections import OrderedDict, defaultdict
+from typing import Dict, List, Optional
+
+import numpy as np
+
+
+# Mersenne prime used for the universal hash family (fits products in uint64)
+_PRIME = (1 << 31) - 1
+_WHITESPACE = re.compile(r"\s+")
+
+
+class CampaignIndex:
+    """
+    Locality-sensitive index over message shingles.
+
+    Each message is reduced to a MinHash signature and split into bands.
+    Messages sharing at least one band bucket are candidate near-duplicates,
+    which are confirmed by their estimated Jaccard similarity. Memory is
+    bounded by max_entries and entries expire after ttl_seconds; work per
+    message is bounded by comparing only the most recent max_candidates
+    entries of each bucket and returning the top max_matches senders.
+    """
+
+    def __init__(
+        self,
+        num_perm: int = 64,
+        bands: int = 16,
+        shingle_size: int = 5,
+        threshold: float = 0.5,
+        max_entries: int = 50000,
+        ttl_seconds: int = 7 * 24 * 3600,
+        max_candidates: int = 50,
+        max_matches: int = 10,
+        seed: int = 42
+    ):
+        """
+        Initialize the index.
+
+        Args:
+            num_perm: Number of MinHash permutations (signature length)
+            bands: Number of LSH bands (must divide num_perm)
+            shingle_size: Character shingle length
+            threshold: Minimum estimated Jaccard similarity for a match
+            max_entries: Maximum number of indexed messages
+            ttl_seconds: Time after which indexed messages expire
+            max_candidates: Most recent entries compared per band bucket
+            max_matches: Maximum number of matching senders returned
+            seed: Random seed for the hash family
+        """
+        if num_perm % bands != 0:
+            raise ValueError("num_perm must be divisible by bands")
+
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_candidates = max_candidates
+        self.max_matches = max_matches
+
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, _PRIME, size=num_perm).astype(np.uint64)
+        self._b = rng.randint(0, _PRIME, size=num_perm).astype(np.uint64)
+
+        # entry_id -> {signature, bucket_keys, phone, cluster_id, added_at}
+        self.entries = OrderedDict()
+        # (band_index, band_bytes) -> {entry_id: None} in insertion order
+        self.buckets = defaultdict(dict)
+        self.cluster_sizes = defaultdict(int)
+
+        self._next_entry_id = 0
+        self._next_cluster_id = 0
+        self._lock = threading.Lock()
+
+    def _shingles(self, message: str) -> np.ndarray:
+        """Hash character shingles of a normalised message into 31-bit ints."""
+        text = _WHITESPACE.sub(" ", message.lower()).strip()
+        if len(text) < self.shingle_size:
+            return np.empty(0, dtype=np.uint64)
+
+        k = self.shingle_size
+        shingles = {text[i:i + k] for i in range(len(text) - k + 1)}
+        hashes = [zlib.crc32(s.encode("utf-8")) & _PRIME for s in shingles]
+        return np.fromiter(hashes, dtype=np.uint64, count=len(hashes))
+
+    def signature(self, message: str) -> Optional[np.ndarray]:
+        """
+        Compute the MinHash signature of a message.
+
+        Args:
+            message: Message text
+
+        Returns:
+            Array of num_perm minimum hash values, or None if too short
+        """
+        shingles = self._shingles(message or "")
+        if shingles.size == 0:
+            return None
+
+        # (num_perm, num_shingles) matrix of permuted hashes
+        permuted = (np.outer(self._a, shingles) + self._b[:, None]) % _PRIME
+        return permuted.min(axis=1)
+
+    def _bucket_keys(self, signature: np.ndarray) -> List[tuple]:
+        """Split a signature into per-band bucket keys."""
+        return [
+            (band, signature[band * self.rows:(band + 1) * self.rows].tobytes())
+            for band in range(self.bands)
+        ]
+
+    def _remove(self, entry_id: int):
+        """Remove an entry and its bucket memberships."""
+        entry = self.entries.pop(entry_id)
+        for key in entry["bucket_keys"]:
+            bucket = self.buckets.get(key)
+            if bucket is not None:
+                bucket.pop(entry_id, None)
+                if not bucket:
+                    del self.buckets[key]
+
+        cluster_id = entry["cluster_id"]
+        self.cluster_sizes[cluster_id] -= 1
+        if self.cluster_sizes[cluster_id] <= 0:
+            del self.cluster_sizes[cluster_id]
+
+    def _expire(self, now: float):
+        """Drop entries that are past their TTL or over the size bound."""
+        cutoff = now - self.ttl_seconds
+        while self.entries:
+            oldest_id, oldest = next(iter(self.entries.items()))
+            if oldest["added_at"] >= cutoff and len(self.entries) < self.max_entries:
+                break
+            self._remove(oldest_id)
+
+    def add(self, message: str, phone_number: str = "") -> Dict:
+        """
+        Index a message and return its near-duplicates.
+
+        Args:
+            message: Message text
+            phone_number: Sender phone number (used for graph linkage)
+
+        Returns:
+            Dictionary with cluster_id, cluster_size and matches (at most
+            max_matches {phone_number, similarity} sorted by similarity)
+        """
+        signature = self.signature(message)
+        if signature is None:
+            return {"cluster_id": None, "cluster_size": 0, "matches": []}
+
+        bucket_keys = self._bucket_keys(signature)
+        now = time.time()
+
+        with self._lock:
+            self._expire(now)
+
+            # Gather candidates that share at least one band, newest first, so
+            # a large campaign costs at most bands x max_candidates comparisons
+            candidates = set()
+            for key in bucket_keys:
+                bucket = self.buckets.get(key)
+                if bucket:
+                    for count, candidate_id in enumerate(reversed(bucket)):
+                        if count >= self.max_candidates:
+                            break
+                        candidates.add(candidate_id)
+
+            matches = []
+            if candidates:
+                candidate_entries = [self.entries[entry_id] for entry_id in candidates]
+                stacked = np.stack([entry["signature"] for entry in candidate_entries])
+                similarities = (stacked == signature).mean(axis=1)
+                matches = [
+                    (float(similarity), entry)
+                    for similarity, entry in zip(similarities, candidate_entries)
+                    if similarity >= self.threshold
+                ]
+
+            matches.sort(key=lambda m: m[0], reverse=True)
+
+            # Join the cluster of the closest match, otherwise start a new one
+            if matches:
+                cluster_id = matches[0][1]["cluster_id"]
+            else:
+                self._next_cluster_id += 1
+                cluster_id = f"campaign-{self._next_cluster_id}"
+
+            entry_id = self._next_entry_id
+            self._next_entry_id += 1
+            self.entries[entry_id] = {
+                "signature": signature,
+                "bucket_keys": bucket_keys,
+                "phone_number": phone_number,
+                "cluster_id": cluster_id,
+                "added_at": now
+            }
+            for key in bucket_keys:
+                self.buckets[key][entry_id] = None
+            self.cluster_sizes[cluster_id] += 1
+
+            # Report each sender once with its best similarity, top matches only
+            seen_phones = set()
+            result_matches = []
+            for similarity, entry in matches:
+                if len(result_matches) >= self.max_matches:
+                    break
+                match_phone = entry["phone_number"]
+                if match_phone in seen_phones:
+                    continue
+                seen_phones.add(match_phone)
+                result_matches.append({
+                    "phone_number": match_phone,
+                    "similarity": round(similarity, 2)
+                })
+
+            return {
+                "cluster_id": cluster_id,
+                "cluster_size": self.cluster_sizes[cluster_id],
+                "matches": result_matches
+            }
+
+    def get_statistics(self) -> Dict:
+        """Get index statistics."""
+        return {
+            "indexed_messages": len(self.entries),
+            "buckets": len(self.buckets),
+            "clusters": len(self.cluster_sizes),
+            "multi_message_clusters": sum(1 for size in self.cluster_sizes.values() if size > 1)
+        }
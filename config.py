@@ -5,6 +5,15 @@ Loads settings from environment variables with fallback defaults for local devel
 
 import os
 
+# Directory of this module, used to anchor default file locations
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def _path_setting(name: str, default: str) -> str:
+    """Read a file or directory setting; relative paths are resolved against BASE_DIR."""
+    value = os.getenv(name, default)
+    return os.path.join(BASE_DIR, value) if value else value
+
 
 class Config:
     """Application configuration loaded from environment variables."""
@@ -13,6 +22,17 @@ class Config:
     PUBLIC_API_KEY = os.getenv("PUBLIC_API_KEY", "public123")
     ADMIN_API_KEY = os.getenv("ADMIN_API_KEY", "admin123")
     
+    # Tenant API keys: quotas are token buckets (requests per minute plus a
+    # burst) enforced in each worker, which gets 1/API_KEY_QUOTA_WORKERS of
+    # the rate; the config keys above get the legacy quota (0 = unlimited)
+    API_KEY_DEFAULT_RATE_PER_MINUTE = int(os.getenv("API_KEY_DEFAULT_RATE_PER_MINUTE", "600"))
+    API_KEY_DEFAULT_BURST = int(os.getenv("API_KEY_DEFAULT_BURST", "60"))
+    LEGACY_API_KEY_RATE_PER_MINUTE = int(os.getenv("LEGACY_API_KEY_RATE_PER_MINUTE", "0"))
+    LEGACY_API_KEY_BURST = int(os.getenv("LEGACY_API_KEY_BURST", "0"))
+    API_KEY_QUOTA_WORKERS = int(os.getenv("API_KEY_QUOTA_WORKERS", "1"))
+    API_KEY_REFRESH_SECONDS = float(os.getenv("API_KEY_REFRESH_SECONDS", "30"))
+    API_KEY_USAGE_FLUSH_SECONDS = float(os.getenv("API_KEY_USAGE_FLUSH_SECONDS", "10"))
+    
     # Alert Settings - Email
     ALERT_EMAIL_ENABLED = os.getenv("ALERT_EMAIL_ENABLED", "false").lower() == "true"
     SMTP_HOST = os.getenv("SMTP_HOST", "smtp.gmail.com")
@@ -31,6 +51,135 @@ class Config:
     HOST = os.getenv("HOST", "0.0.0.0")
     PORT = int(os.getenv("PORT", "8000"))
     
+    # Return per-stage Server-Timing headers from /analyze on every request
+    DEBUG_TIMINGS = os.getenv("DEBUG_TIMINGS", "false").lower() == "true"
+    
+    # Log an import-time breakdown (python -X importtime) after startup
+    STARTUP_IMPORT_REPORT = os.getenv("STARTUP_IMPORT_REPORT", "false").lower() == "true"
+    
+    # Output directory for admin-triggered profiles
+    PROFILE_OUTPUT_DIR = _path_setting("PROFILE_OUTPUT_DIR", "profiles")
+    # Armed X-Request-IDs that see no request within this time are dropped
+    PROFILE_ARM_TTL_SECONDS = float(os.getenv("PROFILE_ARM_TTL_SECONDS", "300"))
+    
+    # Admission control for /analyze: at most ADMISSION_MAX_IN_FLIGHT full
+    # analyses run at once (0 disables the limit) and ADMISSION_MAX_QUEUE more
+    # wait up to ADMISSION_QUEUE_TIMEOUT_SECONDS; the rest run rules-only
+    # ("fast") or, with ADMISSION_OVERLOAD_MODE=reject, get 503 + Retry-After
+    ADMISSION_MAX_IN_FLIGHT = int(os.getenv("ADMISSION_MAX_IN_FLIGHT", "32"))
+    ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "64"))
+    ADMISSION_QUEUE_TIMEOUT_SECONDS = float(os.getenv("ADMISSION_QUEUE_TIMEOUT_SECONDS", "0.5"))
+    ADMISSION_OVERLOAD_MODE = os.getenv("ADMISSION_OVERLOAD_MODE", "fast").lower()
+    ADMISSION_MAX_FAST_IN_FLIGHT = int(os.getenv("ADMISSION_MAX_FAST_IN_FLIGHT", "256"))
+    ADMISSION_RETRY_AFTER_SECONDS = int(os.getenv("ADMISSION_RETRY_AFTER_SECONDS", "1"))
+    
+    # JSON rule table for keywords, points, risk bands and explanations
+    # (empty = built-in rules; see rule_engine.py for the format). With
+    # RULE_SOURCE=db, rule sets published through /admin/rules are stored in
+    # the database and the file only applies until the first publish; with
+    # RULE_SOURCE=file the file itself is watched and rewritten on publish.
+    # Workers check for a new version every RULE_RELOAD_SECONDS
+    RULE_TABLE_PATH = _path_setting("RULE_TABLE_PATH", "")
+    RULE_SOURCE = os.getenv("RULE_SOURCE", "db").lower()
+    RULE_RELOAD_SECONDS = float(os.getenv("RULE_RELOAD_SECONDS", "10"))
+    
+    # Deferred enrichment of /analyze results (database log, blacklist upsert,
+    # graph updates, dashboard broadcast) on background workers; jobs for one
+    # phone number run in order. ENRICHMENT_WORKERS=0 runs it inline. A job
+    # that finds its queue full runs on one of ENRICHMENT_OVERFLOW_WORKERS threads
+    ENRICHMENT_WORKERS = int(os.getenv("ENRICHMENT_WORKERS", "2"))
+    ENRICHMENT_MAX_QUEUE = int(os.getenv("ENRICHMENT_MAX_QUEUE", "10000"))
+    ENRICHMENT_OVERFLOW_WORKERS = int(os.getenv("ENRICHMENT_OVERFLOW_WORKERS", "4"))
+    # Critical-risk alerts (email, webhook) run on their own workers
+    ALERT_WORKERS = int(os.getenv("ALERT_WORKERS", "2"))
+    ALERT_MAX_QUEUE = int(os.getenv("ALERT_MAX_QUEUE", "1000"))
+    
+    # Authentication cache (verified JWTs -> user principals)
+    AUTH_CACHE_TTL_SECONDS = int(os.getenv("AUTH_CACHE_TTL_SECONDS", "300"))
+    AUTH_CACHE_MAX_ENTRIES = int(os.getenv("AUTH_CACHE_MAX_ENTRIES", "10000"))
+    # Touched by manage_users.py on role changes and deletions; anchored to
+    # BASE_DIR so the CLI and the server agree whatever their working directory
+    AUTH_CACHE_INVALIDATION_FILE = _path_setting("AUTH_CACHE_INVALIDATION_FILE", "auth_cache.invalidate")
+    
+    # Password hashing pool (bcrypt runs off the event loop)
+    PASSWORD_POOL_WORKERS = int(os.getenv("PASSWORD_POOL_WORKERS", "4"))
+    PASSWORD_POOL_MAX_QUEUE = int(os.getenv("PASSWORD_POOL_MAX_QUEUE", "32"))
+    
+    # Blacklist index refresh from the database (seconds)
+    BLACKLIST_REFRESH_SECONDS = int(os.getenv("BLACKLIST_REFRESH_SECONDS", "60"))
+    
+    # Seconds between knowledge graph analytics snapshot refreshes
+    GRAPH_SNAPSHOT_INTERVAL_SECONDS = float(os.getenv("GRAPH_SNAPSHOT_INTERVAL_SECONDS", "30"))
+    
+    # Relationship types ignored by components, communities and PageRank
+    # (pattern hubs and shared client IPs, such as an integrator's gateway,
+    # would otherwise join every sender into one group)
+    GRAPH_COMPONENT_EXCLUDED_RELATIONSHIPS = [
+        relationship.strip()
+        for relationship in os.getenv("GRAPH_COMPONENT_EXCLUDED_RELATIONSHIPS", "exhibits_pattern,seen_from_ip").split(",")
+        if relationship.strip()
+    ]
+    
+    # Maximum label propagation rounds for community detection
+    GRAPH_COMMUNITY_MAX_ITERATIONS = int(os.getenv("GRAPH_COMMUNITY_MAX_ITERATIONS", "10"))
+    
+    # Graph risk model used by /analyze: "propagation" (default) walks the
+    # graph per request; "pagerank" opts in to a precomputed personalized
+    # PageRank score instead
+    GRAPH_RISK_MODEL = os.getenv("GRAPH_RISK_MODEL", "propagation").lower()
+    PAGERANK_DAMPING = float(os.getenv("PAGERANK_DAMPING", "0.85"))
+    PAGERANK_SEED_MIN_RISK = int(os.getenv("PAGERANK_SEED_MIN_RISK", "86"))
+    PAGERANK_MAX_ITERATIONS = int(os.getenv("PAGERANK_MAX_ITERATIONS", "100"))
+    # Fraction of the 0-100 graph risk score added to the final score
+    PAGERANK_RISK_WEIGHT = float(os.getenv("PAGERANK_RISK_WEIGHT", "0.2"))
+    
+    # Knowledge graph persistence (append-only log + compacted snapshots);
+    # set GRAPH_STORE_DIR to an empty string to keep the graph in memory only
+    GRAPH_STORE_DIR = _path_setting("GRAPH_STORE_DIR", "data/graph")
+    GRAPH_STORE_FLUSH_SECONDS = float(os.getenv("GRAPH_STORE_FLUSH_SECONDS", "1"))
+    GRAPH_STORE_COMPACT_SECONDS = float(os.getenv("GRAPH_STORE_COMPACT_SECONDS", "3600"))
+    GRAPH_STORE_COMPACT_MIN_BYTES = int(os.getenv("GRAPH_STORE_COMPACT_MIN_BYTES", str(64 * 1024 * 1024)))
+    
+    # Knowledge graph retention: edge weights halve every half-life since the
+    # edge was last reinforced (0 disables decay); a background pass prunes
+    # weak or expired edges and expired entities, keeping at most
+    # GRAPH_MAX_NODES entities (0 disables a limit)
+    GRAPH_EDGE_HALF_LIFE_HOURS = float(os.getenv("GRAPH_EDGE_HALF_LIFE_HOURS", "168"))
+    GRAPH_EDGE_MIN_WEIGHT = float(os.getenv("GRAPH_EDGE_MIN_WEIGHT", "0.05"))
+    GRAPH_EDGE_TTL_HOURS = float(os.getenv("GRAPH_EDGE_TTL_HOURS", "720"))
+    GRAPH_NODE_TTL_HOURS = float(os.getenv("GRAPH_NODE_TTL_HOURS", "2160"))
+    GRAPH_MAX_NODES = int(os.getenv("GRAPH_MAX_NODES", "1000000"))
+    GRAPH_PRUNE_INTERVAL_SECONDS = float(os.getenv("GRAPH_PRUNE_INTERVAL_SECONDS", "3600"))
+    
+    # Highest-risk entities kept ranked for /graph (larger limits fall back to a full scan)
+    GRAPH_TOP_RISK_CAPACITY = int(os.getenv("GRAPH_TOP_RISK_CAPACITY", "1000"))
+    
+    # Domain reputation index (SQLite file built offline with
+    # "python domain_reputation.py import"); a matched domain adds
+    # DOMAIN_REPUTATION_RISK_WEIGHT times its 0-100 score to the risk score
+    DOMAIN_REPUTATION_PATH = _path_setting("DOMAIN_REPUTATION_PATH", "data/domain_reputation.db")
+    DOMAIN_REPUTATION_RISK_WEIGHT = float(os.getenv("DOMAIN_REPUTATION_RISK_WEIGHT", "0.4"))
+    DOMAIN_REPUTATION_CHECK_SECONDS = float(os.getenv("DOMAIN_REPUTATION_CHECK_SECONDS", "5"))
+    
+    # IP intelligence: CIDR blocklist files (one list per file) and an
+    # ip2asn-style TSV of ASN ranges, reloaded when the files change
+    IP_BLOCKLIST_DIR = _path_setting("IP_BLOCKLIST_DIR", "data/ip_blocklists")
+    IP_ASN_FILE = _path_setting("IP_ASN_FILE", "data/ip2asn.tsv")
+    IP_BLOCKLIST_SCORE = int(os.getenv("IP_BLOCKLIST_SCORE", "25"))
+    IP_FLAGGED_ASNS = [int(asn) for asn in os.getenv("IP_FLAGGED_ASNS", "").replace("AS", "").split(",") if asn.strip()]
+    IP_FLAGGED_ASN_SCORE = int(os.getenv("IP_FLAGGED_ASN_SCORE", "10"))
+    IP_INTEL_RELOAD_SECONDS = float(os.getenv("IP_INTEL_RELOAD_SECONDS", "60"))
+    
+    # Campaign Clustering (MinHash/LSH)
+    CAMPAIGN_NUM_PERM = int(os.getenv("CAMPAIGN_NUM_PERM", "64"))
+    CAMPAIGN_BANDS = int(os.getenv("CAMPAIGN_BANDS", "16"))
+    CAMPAIGN_SIMILARITY_THRESHOLD = float(os.getenv("CAMPAIGN_SIMILARITY_THRESHOLD", "0.5"))
+    CAMPAIGN_MAX_ENTRIES = int(os.getenv("CAMPAIGN_MAX_ENTRIES", "50000"))
+    CAMPAIGN_TTL_SECONDS = int(os.getenv("CAMPAIGN_TTL_SECONDS", str(7 * 24 * 3600)))
+    # Per-message work bounds: entries compared per LSH bucket, senders returned
+    CAMPAIGN_MAX_CANDIDATES = int(os.getenv("CAMPAIGN_MAX_CANDIDATES", "50"))
+    CAMPAIGN_MAX_MATCHES = int(os.getenv("CAMPAIGN_MAX_MATCHES", "10"))
+    
     @classmethod
     def is_production(cls) -> bool:
         """Check if running in production mode."""
@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from config import config
@@ -19,6 +19,24 @@ Base = declarative_base()
 def init_db():
     """Initialize database and create all tables."""
     Base.metadata.create_all(bind=engine)
+    _add_missing_columns()
+
+# Columns added to existing tables after their first release
+_ADDED_COLUMNS = {
+    "blacklist": {"match_type": "VARCHAR"}
+}
+
+def _add_missing_columns():
+    """Add columns that create_all() does not add to tables that already exist."""
+    inspector = inspect(engine)
+    with engine.begin() as connection:
+        for table, columns in _ADDED_COLUMNS.items():
+            if not inspector.has_table(table):
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table)}
+            for name, column_type in columns.items():
+                if name not in existing:
+                    connection.execute(text(f"ALTER TABLE {table} ADD COLUMN {name} {column_type}"))
 
 # Dependency to get database session
 def get_db():
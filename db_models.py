@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy import Boolean, Column, Integer, String, Text, DateTime
 from datetime import datetime
 from database import Base
 
@@ -23,6 +23,7 @@ class Blacklist(Base):
     id = Column(Integer, primary_key=True, index=True)
     phone_number = Column(String, unique=True, index=True)
     reason = Column(String)
+    match_type = Column(String, nullable=True)  # exact, prefix or range; NULL on rows from before match types were stored
     added_at = Column(DateTime, default=datetime.now)
 
 
@@ -36,3 +37,32 @@ class User(Base):
     hashed_password = Column(String, nullable=False)
     role = Column(String, default="user")  # user or admin
     created_at = Column(DateTime, default=datetime.now)
+
+
+class ApiKey(Base):
+    """Table to store tenant API keys (only a hash of the secret is kept)."""
+    __tablename__ = "api_keys"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    key_id = Column(String, unique=True, index=True, nullable=False)
+    key_hash = Column(String, nullable=False)
+    tenant = Column(String, index=True, nullable=False)
+    name = Column(String, default="")
+    role = Column(String, default="public")  # public or admin
+    rate_per_minute = Column(Integer, default=600)
+    burst = Column(Integer, default=60)
+    active = Column(Boolean, default=True)
+    usage_count = Column(Integer, default=0)
+    created_at = Column(DateTime, default=datetime.now)
+    last_used_at = Column(DateTime, nullable=True)
+
+
+class RuleSetVersion(Base):
+    """Table to store published rule tables (the newest row is active)."""
+    __tablename__ = "rule_sets"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    version = Column(String, index=True, nullable=False)
+    table_json = Column(Text, nullable=False)
+    published_by = Column(String, default="")
+    published_at = Column(DateTime, default=datetime.now)
@@ -1,11 +1,12 @@
+from rule_engine import RuleSet, rule_engine
+
+
 class ScamDetectionEngine:
     """Simple scam detection engine that analyzes messages for fraud indicators."""
     
-    def __init__(self):
-        # Define keyword categories
-        self.urgency_keywords = ["urgent", "immediately", "now", "act fast"]
-        self.financial_keywords = ["bank", "account", "verify", "credit", "debit"]
-        self.threat_keywords = ["suspended", "blocked", "penalty", "legal action"]
+    def __init__(self, rules: RuleSet = None):
+        # Keyword categories come from the rule table
+        self.rules = rules or rule_engine.rules
     
     def analyze(self, message: str) -> dict:
         """
@@ -16,29 +17,6 @@ class ScamDetectionEngine:
             
         Returns:
             Dictionary with matched keywords by category
+            (urgency_matches, financial_matches, threat_matches with the built-in rules)
         """
-        # Convert message to lowercase for case-insensitive matching
-        message_lower = message.lower()
-        
-        # Find matching keywords in each category
-        urgency_matches = []
-        for keyword in self.urgency_keywords:
-            if keyword in message_lower:
-                urgency_matches.append(keyword)
-        
-        financial_matches = []
-        for keyword in self.financial_keywords:
-            if keyword in message_lower:
-                financial_matches.append(keyword)
-        
-        threat_matches = []
-        for keyword in self.threat_keywords:
-            if keyword in message_lower:
-                threat_matches.append(keyword)
-        
-        # Return results
-        return {
-            "urgency_matches": urgency_matches,
-            "financial_matches": financial_matches,
-            "threat_matches": threat_matches
-        }
+        return self.rules.detect(message)
@@ -0,0 +1,405 @@
+"""
+Domain Reputation Index
+Lookup of known phishing, malware and scam domains (or trusted ones) in a
+compact on-disk SQLite file, so the index can hold tens of millions of
+domains without loading them into memory. A domain is stored as a 64-bit
+hash in the table's integer primary key: the table is its own covering
+index, a lookup is one B-tree search over memory-mapped pages, and each
+entry takes roughly 20 bytes on disk.
+
+The index is built offline from feed files and swapped in atomically;
+running servers pick up the new file within a few seconds:
+
+    python domain_reputation.py import feeds/phishing.txt --category phishing --score 95
+    python domain_reputation.py import feeds/*.csv --replace
+    python domain_reputation.py lookup login.secure-bank.example.xyz
+
+Feed lines may be a bare domain, a URL, a hosts-file entry
+("0.0.0.0 bad.example") or CSV "domain,score,category"; blank lines and
+"#" comments are skipped.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from config import config
+from metrics import registry
+
+
+DOMAIN_REPUTATION_LOOKUPS_TOTAL = registry.counter(
+    "fraud_domain_reputation_lookups_total",
+    "Domain reputation lookups by result",
+    ["result"]
+)
+
+SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS domains (hash INTEGER PRIMARY KEY, score INTEGER NOT NULL, category INTEGER NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS categories (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE)",
+    "CREATE TABLE IF NOT EXISTS metadata (key TEXT PRIMARY KEY, value TEXT)",
+)
+
+# Labels looked up per domain (the domain itself and its parents)
+MAX_LABELS = 10
+
+
+def normalize_domain(value: str) -> str:
+    """Lowercase a domain or URL host and drop a scheme, path, port, wildcard or "www." prefix."""
+    value = (value or "").strip().lower()
+    if "://" in value:
+        value = value.split("://", 1)[1]
+    value = value.split("/", 1)[0].split("?", 1)[0].split("#", 1)[0]
+    value = value.rsplit("@", 1)[-1].split(":", 1)[0].strip(".")
+    for prefix in ("*.", "www."):
+        if value.startswith(prefix):
+            value = value[len(prefix):]
+    return value
+
+
+def domain_hash(domain: str) -> int:
+    """64-bit key of a normalised domain (signed, to fit an SQLite integer)."""
+    return int.from_bytes(hashlib.blake2b(domain.encode("utf-8"), digest_size=8).digest(), "big", signed=True)
+
+
+def candidate_domains(domain: str) -> List[str]:
+    """
+    The domain and its parent domains, most specific first.
+
+    Top-level domains on their own are never candidates, so
+    "a.b.evil.com" gives ["a.b.evil.com", "b.evil.com", "evil.com"].
+    """
+    labels = normalize_domain(domain).split(".")[-MAX_LABELS:]
+    if len(labels) < 2 or not all(labels):
+        return []
+    return [".".join(labels[i:]) for i in range(len(labels) - 1)]
+
+
+def parse_feed_line(line: str, score: int, category: str) -> Optional[Tuple[str, int, str]]:
+    """
+    Parse one feed line into (domain, score, category).
+
+    Args:
+        line: Feed line
+        score: Score used when the line has none
+        category: Category used when the line has none
+
+    Returns:
+        Parsed entry, or None for blank, comment and unparseable lines
+    """
+    line = line.split("#", 1)[0].strip()
+    if not line:
+        return None
+    if "," in line:
+        fields = [field.strip() for field in line.split(",")]
+        domain = fields[0]
+        if len(fields) > 1 and fields[1]:
+            try:
+                score = int(float(fields[1]))
+            except ValueError:
+                return None
+        if len(fields) > 2 and fields[2]:
+            category = fields[2]
+    else:
+        fields = line.split()
+        # hosts-file format: "0.0.0.0 bad.example"
+        domain = fields[1] if len(fields) > 1 and fields[0] in ("0.0.0.0", "127.0.0.1", "::") else fields[0]
+    domain = normalize_domain(domain)
+    if "." not in domain or " " in domain or domain in ("localhost", "localhost.localdomain"):
+        return None
+    return domain, max(0, min(score, 100)), category.strip().lower()
+
+
+def read_feed(path: str, score: int, category: str) -> Iterator[Tuple[str, int, str]]:
+    """Yield the entries of a feed file."""
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        for line in f:
+            entry = parse_feed_line(line, score, category)
+            if entry is not None:
+                yield entry
+
+
+def import_feeds(
+    path: str,
+    feed_paths: Iterable[str],
+    score: int = 90,
+    category: str = "malicious",
+    replace: bool = False,
+    batch_size: int = 100000
+) -> Dict:
+    """
+    Build or extend an index file from feed files.
+
+    The index is written to a temporary copy and moved over `path` when
+    complete, so readers never see a partial import. Later entries for a
+    domain overwrite earlier ones.
+
+    Args:
+        path: Index file
+        feed_paths: Feed files to import
+        score: Score (0-100) for lines that have none
+        category: Category for lines that have none
+        replace: Start from an empty index instead of the existing one
+        batch_size: Entries inserted per batch
+
+    Returns:
+        Import statistics
+    """
+    started = time.perf_counter()
+    feed_paths = list(feed_paths)
+    temporary = path + ".tmp"
+    if os.path.exists(temporary):
+        os.remove(temporary)
+    if not replace and os.path.exists(path):
+        shutil.copyfile(path, temporary)
+
+    conn = sqlite3.connect(temporary)
+    imported = 0
+    try:
+        # Offline build of a private copy: no journal needed
+        conn.execute("PRAGMA journal_mode = OFF")
+        conn.execute("PRAGMA synchronous = OFF")
+        conn.execute("PRAGMA cache_size = -262144")
+        for statement in SCHEMA:
+            conn.execute(statement)
+        category_ids = {name: category_id for category_id, name in conn.execute("SELECT id, name FROM categories")}
+
+        def category_id(name: str) -> int:
+            if name not in category_ids:
+                category_ids[name] = conn.execute("INSERT INTO categories (name) VALUES (?)", (name,)).lastrowid
+            return category_ids[name]
+
+        def flush(batch: list):
+            # Sorted keys fill B-tree pages in order instead of at random
+            batch.sort(key=lambda row: row[0])
+            conn.executemany("INSERT OR REPLACE INTO domains (hash, score, category) VALUES (?, ?, ?)", batch)
+            batch.clear()
+
+        batch = []
+        for feed_path in feed_paths:
+            for domain, entry_score, entry_category in read_feed(feed_path, score, category):
+                batch.append((domain_hash(domain), entry_score, category_id(entry_category)))
+                imported += 1
+                if len(batch) >= batch_size:
+                    flush(batch)
+            flush(batch)
+
+        entries = conn.execute("SELECT COUNT(*) FROM domains").fetchone()[0]
+        metadata = {
+            "entries": str(entries),
+            "imported_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "last_import": json.dumps([os.path.basename(feed_path) for feed_path in feed_paths])
+        }
+        conn.executemany("INSERT OR REPLACE INTO metadata (key, value) VALUES (?, ?)", metadata.items())
+        conn.commit()
+    finally:
+        conn.close()
+    os.replace(temporary, path)
+
+    return {
+        "path": path,
+        "lines_imported": imported,
+        "entries": entries,
+        "categories": len(category_ids),
+        "file_bytes": os.path.getsize(path),
+        "duration_s": round(time.perf_counter() - started, 1)
+    }
+
+
+class DomainReputationIndex:
+    """
+    Read-only view of a domain reputation index file.
+
+    Each thread gets its own SQLite connection. The file is re-checked at
+    most every check_interval seconds and reopened when an import has
+    replaced it. A missing file is an empty index.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        risk_weight: float = 0.4,
+        check_interval: float = 5.0,
+        mmap_bytes: int = 256 * 1024 * 1024
+    ):
+        """
+        Initialize the index.
+
+        Args:
+            path: Index file built by import_feeds
+            risk_weight: Fraction of a matched domain's score added to the risk score
+            check_interval: Seconds between checks for a replaced index file
+            mmap_bytes: Bytes of the file SQLite may memory-map per connection
+        """
+        self.path = path
+        self.risk_weight = risk_weight
+        self.check_interval = check_interval
+        self.mmap_bytes = mmap_bytes
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._file_id = None
+        self._checked_at = 0.0
+        self._generation = 0
+        self._categories: Dict[int, str] = {}
+
+    def _check_file(self):
+        """Note a replaced index file so connections reopen."""
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval:
+            return
+        with self._lock:
+            self._checked_at = now
+            try:
+                stat = os.stat(self.path)
+                file_id = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+            except OSError:
+                file_id = None
+            if file_id != self._file_id:
+                self._file_id = file_id
+                self._generation += 1
+                self._categories = {}
+
+    def _connection(self) -> Optional[sqlite3.Connection]:
+        """Get this thread's connection to the current index file."""
+        self._check_file()
+        if self._file_id is None:
+            return None
+        local = self._local
+        if getattr(local, "generation", None) != self._generation:
+            if getattr(local, "conn", None) is not None:
+                local.conn.close()
+            local.conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False)
+            local.conn.execute(f"PRAGMA mmap_size = {int(self.mmap_bytes)}")
+            local.generation = self._generation
+            if not self._categories:
+                self._categories = dict(local.conn.execute("SELECT id, name FROM categories"))
+        return local.conn
+
+    def lookup(self, domain: str) -> Optional[Dict]:
+        """
+        Look up a domain and its parent domains.
+
+        The most specific listed domain wins, so a listed subdomain
+        overrides its parent (e.g. a trusted parent with a phishing
+        subdomain).
+
+        Args:
+            domain: Domain, host or URL
+
+        Returns:
+            {"domain", "matched_domain", "score", "category"} or None
+        """
+        candidates = candidate_domains(domain)
+        if not candidates:
+            return None
+        conn = self._connection()
+        if conn is None:
+            return None
+
+        hashes = [domain_hash(candidate) for candidate in candidates]
+        try:
+            rows = conn.execute(
+                f"SELECT hash, score, category FROM domains WHERE hash IN ({','.join('?' * len(hashes))})",
+                hashes
+            ).fetchall()
+        except sqlite3.Error as e:
+            print(f"Domain reputation lookup error: {e}")
+            return None
+
+        found = {row[0]: row for row in rows}
+        for candidate, key in zip(candidates, hashes):
+            if key in found:
+                _, score, category = found[key]
+                DOMAIN_REPUTATION_LOOKUPS_TOTAL.inc("hit")
+                return {
+                    "domain": candidates[0],
+                    "matched_domain": candidate,
+                    "score": score,
+                    "category": self._categories.get(category, "unknown")
+                }
+        DOMAIN_REPUTATION_LOOKUPS_TOTAL.inc("miss")
+        return None
+
+    def check(self, domains: Iterable[str]) -> Dict:
+        """
+        Check the domains found in a message.
+
+        Args:
+            domains: Domains or URLs
+
+        Returns:
+            Dictionary with risk_boost and reason from the worst match,
+            and the list of matches
+        """
+        matches = [match for match in map(self.lookup, domains) if match is not None]
+        flagged = [match for match in matches if match["score"] > 0]
+        if not flagged:
+            return {"risk_boost": 0, "reason": "", "matches": matches}
+        worst = max(flagged, key=lambda match: match["score"])
+        return {
+            "risk_boost": int(round(worst["score"] * self.risk_weight)),
+            "reason": f"Links to known {worst['category']} domain {worst['matched_domain']} (reputation score {worst['score']})",
+            "matches": matches
+        }
+
+    def get_statistics(self) -> Dict:
+        """Get the index file size and import metadata."""
+        conn = self._connection()
+        if conn is None:
+            return {"path": self.path, "available": False}
+        return {
+            "path": self.path,
+            "available": True,
+            "file_bytes": os.path.getsize(self.path),
+            **dict(conn.execute("SELECT key, value FROM metadata"))
+        }
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Build and query the domain reputation index")
+    parser.add_argument("--index", default=config.DOMAIN_REPUTATION_PATH, help="Index file")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    import_command = commands.add_parser("import", help="Import feed files into the index")
+    import_command.add_argument("feeds", nargs="+", help="Feed files")
+    import_command.add_argument("--score", type=int, default=90, help="Score for lines without one (0-100)")
+    import_command.add_argument("--category", default="malicious", help="Category for lines without one")
+    import_command.add_argument("--replace", action="store_true", help="Discard existing entries")
+
+    lookup_command = commands.add_parser("lookup", help="Look up domains or URLs")
+    lookup_command.add_argument("domains", nargs="+")
+
+    commands.add_parser("stats", help="Show index statistics")
+    args = parser.parse_args(argv)
+
+    if args.command == "import":
+        directory = os.path.dirname(args.index)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        result = import_feeds(args.index, args.feeds, args.score, args.category, args.replace)
+        print(json.dumps(result, indent=2))
+        return
+
+    index = DomainReputationIndex(args.index)
+    if args.command == "lookup":
+        for domain in args.domains:
+            print(f"{domain}: {json.dumps(index.lookup(domain))}")
+    else:
+        print(json.dumps(index.get_statistics(), indent=2))
+
+
+# Global instance
+domain_reputation = DomainReputationIndex(
+    config.DOMAIN_REPUTATION_PATH,
+    risk_weight=config.DOMAIN_REPUTATION_RISK_WEIGHT,
+    check_interval=config.DOMAIN_REPUTATION_CHECK_SECONDS
+)
+
+
+if __name__ == "__main__":
+    main()
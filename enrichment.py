@@ -0,0 +1,202 @@
+"""
+Deferred Enrichment Queue
+Runs the slow, non-scoring work of /analyze (database log, blacklist
+upsert, knowledge graph updates and dashboard broadcasts) on background
+threads after the response has been sent, so request latency depends
+only on scoring. Alerts go through a separate queue, so a slow SMTP
+server or webhook never holds back the database records.
+
+Jobs are sharded by key (the phone number) over single-threaded workers:
+jobs with the same key always run on the same worker, in submission
+order, while different keys are processed in parallel. Each shard's queue
+is bounded; when it is full the job is handed to a small overflow thread
+pool instead, so fraud records are never lost under load and submit()
+never blocks the event loop (at the cost of ordering for that job).
+"""
+
+import queue
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+from config import config
+from metrics import registry
+
+
+ENRICHMENT_JOBS_TOTAL = registry.counter(
+    "fraud_enrichment_jobs_total",
+    "Deferred jobs by queue and result (completed, failed, overflow = handed to the overflow pool on a full queue)",
+    ["queue", "result"]
+)
+ENRICHMENT_QUEUE_WAIT_SECONDS = registry.histogram(
+    "fraud_enrichment_queue_wait_seconds",
+    "Time a deferred job waited for its worker",
+    ["queue"]
+)
+ENRICHMENT_JOB_SECONDS = registry.histogram(
+    "fraud_enrichment_job_seconds",
+    "Time spent running a deferred job",
+    ["queue"]
+)
+
+# Sentinel telling a worker to exit once its queue is drained
+_STOP = object()
+
+
+class EnrichmentQueue:
+    """
+    Keyed background job queue with per-key ordering.
+
+    With workers=0 jobs run inline in submit(), which keeps the old
+    synchronous behaviour (useful for tests and debugging).
+    """
+
+    def __init__(
+        self,
+        workers: int = 2,
+        max_queue: int = 10000,
+        name: str = "enrichment",
+        overflow_workers: int = 4
+    ):
+        """
+        Initialize the queue; call start() to launch the workers.
+
+        Args:
+            workers: Number of worker threads (0 = run jobs inline)
+            max_queue: Maximum queued jobs, split evenly across workers
+            name: Thread name prefix and metrics label
+            overflow_workers: Threads running jobs that found their queue full
+        """
+        self.workers = max(workers, 0)
+        self.max_queue = max_queue
+        self.name = name
+        self.overflow_workers = max(overflow_workers, 1)
+        self._overflow: Optional[ThreadPoolExecutor] = None
+        shard_size = max(max_queue // self.workers, 1) if self.workers else 0
+        self._queues: List[queue.Queue] = [queue.Queue(maxsize=shard_size) for _ in range(self.workers)]
+        self._threads: List[threading.Thread] = []
+        self._lock = threading.Lock()
+        self.counts = {"completed": 0, "failed": 0, "overflow": 0}
+
+    def _shard(self, key: str) -> int:
+        # crc32 is stable across processes, unlike hash() of a str
+        return zlib.crc32((key or "").encode("utf-8")) % self.workers
+
+    def _count(self, result: str):
+        with self._lock:
+            self.counts[result] += 1
+        ENRICHMENT_JOBS_TOTAL.inc(self.name, result)
+
+    def _execute(self, fn: Callable, args: tuple, kwargs: dict):
+        started = time.perf_counter()
+        try:
+            fn(*args, **kwargs)
+            self._count("completed")
+        except Exception as e:
+            self._count("failed")
+            print(f"Enrichment job {getattr(fn, '__name__', fn)} failed: {e}")
+        finally:
+            ENRICHMENT_JOB_SECONDS.observe(time.perf_counter() - started, self.name)
+
+    def submit(self, key: str, fn: Callable, *args, **kwargs) -> bool:
+        """
+        Queue a job behind earlier jobs with the same key.
+
+        Args:
+            key: Ordering key (jobs with equal keys run one at a time, in order)
+            fn: Blocking function to run on the worker
+            *args, **kwargs: Arguments for fn
+
+        Returns:
+            False if the key's queue was full and the job went to the overflow pool
+        """
+        if not self.workers:
+            self._execute(fn, args, kwargs)
+            return True
+        try:
+            self._queues[self._shard(key)].put_nowait((time.perf_counter(), fn, args, kwargs))
+            return True
+        except queue.Full:
+            self._count("overflow")
+            with self._lock:
+                if self._overflow is None:
+                    self._overflow = ThreadPoolExecutor(self.overflow_workers, thread_name_prefix=f"{self.name}-overflow")
+                overflow = self._overflow
+            overflow.submit(self._execute, fn, args, kwargs)
+            return False
+
+    def _run(self, jobs: queue.Queue):
+        while True:
+            item = jobs.get()
+            try:
+                if item is _STOP:
+                    return
+                submitted, fn, args, kwargs = item
+                ENRICHMENT_QUEUE_WAIT_SECONDS.observe(time.perf_counter() - submitted, self.name)
+                self._execute(fn, args, kwargs)
+            finally:
+                jobs.task_done()
+
+    def start(self):
+        """Start the worker threads."""
+        if any(thread.is_alive() for thread in self._threads):
+            return
+        self._threads = [
+            threading.Thread(target=self._run, args=(jobs,), name=f"{self.name}-{shard}", daemon=True)
+            for shard, jobs in enumerate(self._queues)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def join(self):
+        """Block until every job queued so far has run."""
+        for jobs in self._queues:
+            jobs.join()
+
+    def stop(self, timeout: Optional[float] = 30.0):
+        """Run the remaining queued and overflow jobs, then stop the workers."""
+        with self._lock:
+            overflow, self._overflow = self._overflow, None
+        if overflow is not None:
+            overflow.shutdown(wait=True)
+        if not self._threads:
+            return
+        for jobs in self._queues:
+            # Blocks while a full shard drains, so no queued job is lost
+            jobs.put(_STOP)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for thread in self._threads:
+            thread.join(None if deadline is None else max(deadline - time.monotonic(), 0))
+        self._threads = []
+
+    @property
+    def pending(self) -> int:
+        """Jobs waiting for a worker."""
+        return sum(jobs.qsize() for jobs in self._queues)
+
+    def get_statistics(self) -> Dict:
+        """Get worker count, queue depth and job counts."""
+        with self._lock:
+            counts = dict(self.counts)
+        return {
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "pending": self.pending,
+            "jobs": counts
+        }
+
+
+# Global instances
+enrichment_queue = EnrichmentQueue(
+    workers=config.ENRICHMENT_WORKERS,
+    max_queue=config.ENRICHMENT_MAX_QUEUE,
+    overflow_workers=config.ENRICHMENT_OVERFLOW_WORKERS
+)
+alert_queue = EnrichmentQueue(
+    workers=config.ALERT_WORKERS,
+    max_queue=config.ALERT_MAX_QUEUE,
+    name="alerts",
+    overflow_workers=config.ENRICHMENT_OVERFLOW_WORKERS
+)
@@ -0,0 +1,166 @@
+"""
+Entity Extraction
+Pulls URLs and domains, email addresses, UPI payment handles, IBANs and
+crypto wallet addresses out of message text in a single regex pass, so
+they can be linked in the knowledge graph across phones and channels.
+"""
+
+import hashlib
+import re
+from typing import Dict, List
+from urllib.parse import urlsplit
+
+
+ENTITY_URL = "url"
+ENTITY_DOMAIN = "domain"
+ENTITY_EMAIL = "email"
+ENTITY_UPI = "upi"
+ENTITY_IBAN = "iban"
+ENTITY_WALLET = "wallet"
+
+# Top-level domains accepted for bare domains without a scheme or "www."
+# (any TLD is accepted with one), to avoid matching sentences like "now.Click"
+_BARE_DOMAIN_TLDS = (
+    "com|net|org|info|biz|io|co|me|app|online|site|xyz|top|club|link|live|shop|store|"
+    "click|vip|icu|buzz|cc|tk|ml|ga|cf|gq|ly|in|uk|us|ca|au|de|fr|ru|cn|br|ng|pk|bd|ke|za"
+)
+_HOST = r"(?:[a-z0-9](?:[a-z0-9-]{0,61}[a-z0-9])?\.)+"
+_PATH = r"(?:[/?#][^\s<>\"']*)?"
+_BASE58 = "[1-9A-HJ-NP-Za-km-z]"
+
+# One alternation, tried left to right at each position: emails before UPI
+# handles (which look like emails without a TLD) and URLs before bare domains.
+# The leading lookbehind rejects positions inside a token before any
+# alternative is tried, which keeps the scan fast on ordinary text.
+_ENTITY_PATTERN = re.compile(
+    rf"(?<![\w.%+-])(?:"
+    rf"(?P<url>(?i:https?://[^\s<>\"']+|www\.{_HOST}[a-z]{{2,24}}{_PATH}))"
+    rf"|(?P<email>(?i:\b[a-z0-9._%+-]+@{_HOST}[a-z]{{2,24}}\b))"
+    rf"|(?P<upi>(?i:\b[a-z0-9._-]{{2,64}}@[a-z][a-z0-9]{{1,63}}\b)(?!\.?[\w@]))"
+    rf"|(?P<domain>(?i:\b{_HOST}(?:{_BARE_DOMAIN_TLDS})\b{_PATH}))"
+    rf"|(?P<iban>\b[A-Z]{{2}}\d{{2}}(?: ?[A-Z0-9]{{4}}){{2,7}}(?: ?[A-Z0-9]{{1,3}})?\b)"
+    rf"|(?P<eth>\b0x[0-9a-fA-F]{{40}}\b)"
+    rf"|(?P<btc>\b(?:[13]{_BASE58}{{25,34}}|(?i:bc1[ac-hj-np-z02-9]{{11,71}}))\b)"
+    rf"|(?P<tron>\bT{_BASE58}{{33}}\b)"
+    rf")"
+)
+
+_TRAILING_PUNCTUATION = ".,;:!?)]}'\""
+_BASE58_DIGITS = {char: i for i, char in enumerate("123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz")}
+_BECH32_DIGITS = {char: i for i, char in enumerate("qpzry9x8gf2tvdw0s3jn54khce6mua7l")}
+_BECH32_GENERATORS = (0x3b6a57b2, 0x26508e6d, 0x1ea119fa, 0x3d4233dd, 0x2a1462b3)
+
+
+def _bech32_term(top: int) -> int:
+    term = 0
+    for i, generator in enumerate(_BECH32_GENERATORS):
+        if (top >> i) & 1:
+            term ^= generator
+    return term
+
+
+# XOR of the generator terms selected by each 5-bit value shifted out
+_BECH32_TABLE = [_bech32_term(top) for top in range(32)]
+
+
+def _base58check_valid(address: str) -> bool:
+    """Validate the 4-byte double-SHA256 checksum of a Base58Check address."""
+    number = 0
+    for char in address:
+        number = number * 58 + _BASE58_DIGITS[char]
+    leading_zeros = len(address) - len(address.lstrip("1"))
+    data = b"\x00" * leading_zeros + number.to_bytes((number.bit_length() + 7) // 8, "big")
+    if len(data) != 25:
+        return False
+    return hashlib.sha256(hashlib.sha256(data[:-4]).digest()).digest()[:4] == data[-4:]
+
+
+def _bech32_valid(address: str) -> bool:
+    """Validate the checksum of a bech32 or bech32m segwit address."""
+    address = address.lower()
+    hrp, _, data = address.rpartition("1")
+    values = [ord(char) >> 5 for char in hrp] + [0] + [ord(char) & 31 for char in hrp]
+    values += [_BECH32_DIGITS[char] for char in data]
+    checksum = 1
+    for value in values:
+        checksum = ((checksum & 0x1ffffff) << 5 ^ value) ^ _BECH32_TABLE[checksum >> 25]
+    return checksum in (1, 0x2bc830a3)
+
+
+def _iban_valid(iban: str) -> bool:
+    """Validate the ISO 13616 mod-97 check digits of an IBAN."""
+    rearranged = iban[4:] + iban[:4]
+    return int("".join(str(int(char, 36)) for char in rearranged)) % 97 == 1
+
+
+def _normalize_url(value: str):
+    """Get the URL (fragment dropped, scheme and host lowercased) and the host of a match."""
+    parts = urlsplit(value if "://" in value else "http://" + value)
+    netloc = parts.netloc.lower()
+    url = f"{parts.scheme.lower()}://{netloc}{parts.path}" + (f"?{parts.query}" if parts.query else "")
+    return url, parts.hostname or netloc
+
+
+class EntityExtractor:
+    """Extract typed identifiers from message text."""
+
+    def __init__(self, max_entities: int = 20):
+        """
+        Initialize the extractor.
+
+        Args:
+            max_entities: Maximum number of entities returned per message
+        """
+        self.max_entities = max_entities
+
+    def extract(self, message: str) -> List[Dict[str, str]]:
+        """
+        Extract entities from a message.
+
+        URLs also yield their domain. Values are normalised (hosts and
+        emails lowercased, IBANs without spaces) and de-duplicated;
+        candidates failing an IBAN or Bitcoin checksum are dropped.
+
+        Args:
+            message: Message text
+
+        Returns:
+            List of {"type", "value"} in order of appearance
+        """
+        if not message:
+            return []
+
+        entities = []
+        seen = set()
+
+        def add(entity_type: str, value: str):
+            if (entity_type, value) not in seen and len(entities) < self.max_entities:
+                seen.add((entity_type, value))
+                entities.append({"type": entity_type, "value": value})
+
+        for match in _ENTITY_PATTERN.finditer(message):
+            kind = match.lastgroup
+            value = match.group()
+            if kind in ("url", "domain"):
+                url, host = _normalize_url(value.rstrip(_TRAILING_PUNCTUATION))
+                if kind == "url":
+                    add(ENTITY_URL, url)
+                add(ENTITY_DOMAIN, host[4:] if host.startswith("www.") else host)
+            elif kind in ("email", "upi"):
+                add(ENTITY_EMAIL if kind == "email" else ENTITY_UPI, value.lower())
+            elif kind == "iban":
+                iban = value.replace(" ", "")
+                if _iban_valid(iban):
+                    add(ENTITY_IBAN, iban)
+            elif kind == "btc":
+                if _bech32_valid(value) if value[:3].lower() == "bc1" else _base58check_valid(value):
+                    add(ENTITY_WALLET, value.lower() if value[:3].lower() == "bc1" else value)
+            elif kind == "eth":
+                add(ENTITY_WALLET, value.lower())
+            elif kind == "tron" and _base58check_valid(value):
+                add(ENTITY_WALLET, value)
+        return entities
+
+
+# Global instance
+entity_extractor = EntityExtractor()
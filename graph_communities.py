@@ -0,0 +1,251 @@
+"""
+Fraud Ring Detection
+Connected components (maintained incrementally by the graph's union-find)
+and label-propagation communities over the analytics snapshot, summarised
+by size, total risk and highest-risk members.
+"""
+
+import threading
+import time
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from config import config
+from graph_service import FraudKnowledgeGraph, freeze_array
+from graph_snapshot import GraphSnapshot, GraphSnapshotManager, graph_snapshots
+from metrics import registry
+
+
+GRAPH_COMMUNITY_SECONDS = registry.histogram(
+    "fraud_graph_community_detection_seconds",
+    "Time spent on a label propagation community pass"
+)
+
+# Weight of a node's own label, so ties keep the current label and
+# synchronous updates do not oscillate between two labels
+SELF_WEIGHT = 1e-6
+
+
+def summarize_groups(
+    labels: np.ndarray,
+    risk: np.ndarray,
+    node_type: np.ndarray,
+    node_values: List[str],
+    limit: int = 20,
+    min_size: int = 2,
+    top_members: int = 5
+) -> Dict:
+    """
+    Summarise node groups (components or communities).
+
+    Only entity nodes are counted; relationship endpoints that were never
+    added as entities are ignored.
+
+    Args:
+        labels: Group label per node id
+        risk: Risk score per node id
+        node_type: Entity type code per node id (-1 for non-entities)
+        node_values: Entity value per node id
+        limit: Maximum number of groups returned, largest total risk first
+        min_size: Smallest group size returned
+        top_members: Highest-risk members listed per group
+
+    Returns:
+        Dictionary with the number of groups and the group summaries
+    """
+    n = min(len(labels), len(risk), len(node_type), len(node_values))
+    labels, risk, is_entity = labels[:n], risk[:n].astype(np.float64), node_type[:n] >= 0
+
+    sizes = np.bincount(labels, weights=is_entity, minlength=n).astype(np.int64)
+    total_risk = np.bincount(labels, weights=np.where(is_entity, risk, 0.0), minlength=n)
+
+    candidates = np.flatnonzero(sizes >= max(min_size, 1))
+    selected = candidates[np.argsort(-total_risk[candidates], kind="stable")[:limit]]
+
+    # Highest-risk entity members of the selected groups, grouped by label
+    member_ids = np.flatnonzero(np.isin(labels, selected) & is_entity)
+    member_ids = member_ids[np.lexsort((-risk[member_ids], labels[member_ids]))]
+    members: Dict[int, List[Dict]] = {}
+    for node_id in member_ids:
+        group = members.setdefault(int(labels[node_id]), [])
+        if len(group) < top_members:
+            group.append({"id": node_values[node_id], "risk_score": int(risk[node_id])})
+
+    return {
+        "total_groups": int(np.count_nonzero(sizes)),
+        "groups": [
+            {
+                "group_id": int(label),
+                "size": int(sizes[label]),
+                "total_risk": int(total_risk[label]),
+                "max_risk": members[int(label)][0]["risk_score"] if members.get(int(label)) else 0,
+                "top_members": members.get(int(label), [])
+            }
+            for label in selected
+        ]
+    }
+
+
+def label_propagation(
+    snapshot: GraphSnapshot,
+    excluded_relationships: Sequence[str] = (),
+    max_iterations: int = 10
+) -> Dict:
+    """
+    Weighted label propagation over a snapshot.
+
+    Every node starts in its own community and adopts the label with the
+    largest total edge weight among its neighbours (ties go to the current
+    label, then the smallest label). Each round updates a random half of
+    the nodes and then the other half, which avoids the oscillation of
+    fully synchronous updates. Stops when a round changes no label or
+    after max_iterations rounds.
+
+    Args:
+        snapshot: Graph snapshot
+        excluded_relationships: Relationship types ignored
+        max_iterations: Maximum number of rounds
+
+    Returns:
+        Dictionary with the label array and the number of rounds run
+    """
+    n = snapshot.num_nodes
+    labels = np.arange(n, dtype=np.int64)
+    excluded = [code for code, name in enumerate(snapshot.relationship_types) if name in excluded_relationships]
+    keep = ~np.isin(snapshot.relationship, excluded)
+
+    rows = snapshot.row_of_slot()[keep].astype(np.int64)
+    neighbours = snapshot.indices[keep]
+    active = np.unique(rows)
+    slot_rows = np.concatenate([rows, active])
+    slot_weights = np.concatenate([snapshot.weights[keep].astype(np.float64), np.full(len(active), SELF_WEIGHT)])
+
+    slot_labels = np.concatenate([neighbours, active])
+    rng = np.random.default_rng(0)
+
+    iterations = 0
+    for iterations in range(1, max_iterations + 1):
+        in_first_half = rng.random(n) < 0.5
+        changed = 0
+        for half in (in_first_half, ~in_first_half):
+            selected = half[slot_rows]
+            if not selected.any():
+                continue
+            keys = slot_rows[selected] * n + labels[slot_labels[selected]]
+            order = np.argsort(keys)
+            keys = keys[order]
+
+            # Total weight per distinct (row, label), sorted by row then label
+            starts = np.flatnonzero(np.concatenate([[True], keys[1:] != keys[:-1]]))
+            weight_sums = np.add.reduceat(slot_weights[selected][order], starts)
+            keys = keys[starts]
+            key_rows, key_labels = keys // n, keys % n
+
+            # Best label per row: largest weight, then smallest label
+            row_starts = np.flatnonzero(np.concatenate([[True], key_rows[1:] != key_rows[:-1]]))
+            row_max = np.maximum.reduceat(weight_sums, row_starts)
+            row_max = np.repeat(row_max, np.diff(np.append(row_starts, len(keys))))
+            is_max = np.flatnonzero(weight_sums >= row_max)
+            max_rows = key_rows[is_max]
+            best = is_max[np.concatenate([[True], max_rows[1:] != max_rows[:-1]])]
+
+            changed += np.count_nonzero(labels[key_rows[best]] != key_labels[best])
+            labels[key_rows[best]] = key_labels[best]
+        if changed == 0:
+            break
+
+    return {"labels": labels, "iterations": iterations}
+
+
+class CommunityDetector:
+    """
+    Caches the community labels of the latest graph snapshot.
+
+    Communities are recomputed at most once per snapshot, normally by the
+    snapshot manager's background thread right after a refresh.
+    """
+
+    def __init__(
+        self,
+        snapshots: GraphSnapshotManager,
+        excluded_relationships: Sequence[str] = (),
+        max_iterations: int = 10
+    ):
+        """
+        Initialize the detector.
+
+        Args:
+            snapshots: Snapshot manager of the graph
+            excluded_relationships: Relationship types ignored
+            max_iterations: Maximum label propagation rounds
+        """
+        self.snapshots = snapshots
+        self.excluded_relationships = tuple(excluded_relationships)
+        self.max_iterations = max_iterations
+        self._lock = threading.Lock()
+        self._snapshot: Optional[GraphSnapshot] = None
+        self._result: Optional[Dict] = None
+
+    def update(self, snapshot: GraphSnapshot) -> Dict:
+        """Compute communities for a snapshot unless already cached."""
+        with self._lock:
+            if self._snapshot is not snapshot:
+                started = time.perf_counter()
+                self._result = label_propagation(snapshot, self.excluded_relationships, self.max_iterations)
+                GRAPH_COMMUNITY_SECONDS.observe(time.perf_counter() - started)
+                self._snapshot = snapshot
+            return {**self._result, "snapshot": snapshot}
+
+    def get(self) -> Dict:
+        """Get labels, rounds run and the snapshot they were computed on."""
+        return self.update(self.snapshots.get())
+
+    def summarize(self, limit: int = 20, min_size: int = 2, top_members: int = 5) -> Dict:
+        """Summaries of the communities with the highest total risk."""
+        result = self.get()
+        snapshot = result["snapshot"]
+        summary = summarize_groups(
+            result["labels"], snapshot.risk, snapshot.node_type, snapshot.node_values,
+            limit, min_size, top_members
+        )
+        return {
+            "total_communities": summary["total_groups"],
+            "iterations": result["iterations"],
+            "snapshot_age_s": round(time.time() - snapshot.built_at, 1),
+            "communities": summary["groups"]
+        }
+
+
+def summarize_components(
+    graph: FraudKnowledgeGraph,
+    limit: int = 20,
+    min_size: int = 2,
+    top_members: int = 5
+) -> Dict:
+    """
+    Summaries of the connected components with the highest total risk.
+
+    Membership comes from the graph's incremental union-find, so it
+    reflects every relationship added so far.
+    """
+    summary = summarize_groups(
+        graph.components.labels(),
+        freeze_array(graph.node_risk, np.float32),
+        freeze_array(graph.node_type, np.int8),
+        graph.node_values,
+        limit, min_size, top_members
+    )
+    return {
+        "total_components": summary["total_groups"],
+        "components": summary["groups"]
+    }
+
+
+# Global instance
+community_detector = CommunityDetector(
+    graph_snapshots,
+    excluded_relationships=config.GRAPH_COMPONENT_EXCLUDED_RELATIONSHIPS,
+    max_iterations=config.GRAPH_COMMUNITY_MAX_ITERATIONS
+)
+graph_snapshots.add_listener(community_detector.update)
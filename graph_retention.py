@@ -0,0 +1,140 @@
+"""
+Knowledge Graph Retention
+Background pass that prunes decayed or expired edges and stale entities
+from the knowledge graph, so its memory stays bounded while it keeps
+ingesting, and reports what each pass reclaimed.
+"""
+
+import threading
+import time
+from typing import Dict, Optional
+
+from config import config
+from graph_service import FraudKnowledgeGraph, fraud_graph
+from graph_store import graph_store
+from metrics import registry
+from runtime_metrics import estimate_container_bytes
+
+
+GRAPH_PRUNED_TOTAL = registry.counter(
+    "fraud_graph_pruned_total",
+    "Knowledge graph nodes and edges removed by retention pruning",
+    ["kind"]
+)
+GRAPH_PRUNE_SECONDS = registry.histogram(
+    "fraud_graph_prune_seconds",
+    "Time spent on a knowledge graph pruning pass"
+)
+
+
+def estimate_graph_bytes(graph: FraudKnowledgeGraph) -> int:
+    """Estimated memory held by a graph's node and edge dicts, indexes and arrays."""
+    arrays = (graph.node_type, graph.node_risk, graph.node_incidents, graph.node_seen,
+              graph.edge_src, graph.edge_dst, graph.edge_type, graph.edge_weight, graph.edge_updated,
+              graph.components.parent, graph.components.size)
+    return (
+        estimate_container_bytes(graph.nodes) + estimate_container_bytes(graph.edges)
+        + estimate_container_bytes(graph.node_index) + estimate_container_bytes(graph._edge_index)
+        + estimate_container_bytes(graph.node_values)
+        + sum(len(values) * values.itemsize for values in arrays)
+    )
+
+
+class GraphRetention:
+    """
+    Periodically prunes a FraudKnowledgeGraph.
+
+    After a pass that removed anything, the graph store (if any) is
+    compacted so the removed nodes and edges are not replayed from the
+    log on the next start.
+    """
+
+    def __init__(
+        self,
+        graph: FraudKnowledgeGraph,
+        store=None,
+        interval: float = 3600.0,
+        min_weight: float = 0.05,
+        edge_ttl: float = 0.0,
+        node_ttl: float = 0.0,
+        max_nodes: int = 0
+    ):
+        """
+        Initialize the retention pass.
+
+        Args:
+            graph: Graph to prune
+            store: Optional GraphStore persisting the graph
+            interval: Seconds between pruning passes
+            min_weight: Smallest decayed edge weight kept
+            edge_ttl: Seconds after which an edge that was not reinforced expires (0 = never)
+            node_ttl: Seconds after which an entity that was not seen expires (0 = never)
+            max_nodes: Maximum number of entities kept (0 = unlimited)
+        """
+        self.graph = graph
+        self.store = store
+        self.interval = interval
+        self.min_weight = min_weight
+        self.edge_ttl = edge_ttl
+        self.node_ttl = node_ttl
+        self.max_nodes = max_nodes
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.last_run: Optional[Dict] = None
+
+    def run_once(self) -> Dict:
+        """Prune the graph now and report what was reclaimed."""
+        with self._lock:
+            started = time.perf_counter()
+            bytes_before = estimate_graph_bytes(self.graph)
+            result = self.graph.prune(self.min_weight, self.edge_ttl, self.node_ttl, self.max_nodes)
+            duration = time.perf_counter() - started
+            GRAPH_PRUNE_SECONDS.observe(duration)
+            GRAPH_PRUNED_TOTAL.inc("nodes", amount=result["nodes_removed"] + result["endpoints_removed"])
+            GRAPH_PRUNED_TOTAL.inc("edges", amount=result["edges_removed"])
+
+            removed_any = result["nodes_removed"] or result["endpoints_removed"] or result["edges_removed"]
+            if removed_any and self.store is not None:
+                self.store.compact()
+
+            self.last_run = {
+                **result,
+                "estimated_bytes_reclaimed": max(bytes_before - estimate_graph_bytes(self.graph), 0),
+                "duration_ms": round(duration * 1000, 1),
+                "finished_at": time.strftime("%Y-%m-%dT%H:%M:%S")
+            }
+            return self.last_run
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                result = self.run_once()
+                if result["nodes_removed"] or result["edges_removed"]:
+                    print(f"Graph retention: {result}")
+            except Exception as e:
+                print(f"Graph retention error: {e}")
+
+    def start(self):
+        """Start the background pruning thread."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="graph-retention", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the background pruning thread."""
+        self._stop.set()
+
+
+# Global instance
+graph_retention = GraphRetention(
+    fraud_graph,
+    store=graph_store,
+    interval=config.GRAPH_PRUNE_INTERVAL_SECONDS,
+    min_weight=config.GRAPH_EDGE_MIN_WEIGHT,
+    edge_ttl=config.GRAPH_EDGE_TTL_HOURS * 3600,
+    node_ttl=config.GRAPH_NODE_TTL_HOURS * 3600,
+    max_nodes=config.GRAPH_MAX_NODES
+)
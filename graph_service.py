@@ -3,9 +3,188 @@ Knowledge Graph Service for Fraud Detection
 Supports Neo4j-style structure with in-memory fallback
 """
 
+from array import array
 from datetime import datetime
-from typing import List, Dict, Optional
+from heapq import heappop, heappush
+from itertools import compress
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+import importlib.util
 import json
+import threading
+import time
+
+import numpy as np
+
+from config import config
+
+
+def freeze_array(values: array, dtype) -> np.ndarray:
+    """Copy a growable array into a NumPy array without exporting its buffer."""
+    # Slicing copies while holding the GIL, so the live array is never
+    # locked against appends by a NumPy view
+    return np.frombuffer(values[:], dtype=dtype)
+
+
+def decayed_weight(weight, age_seconds, half_life: float):
+    """
+    Edge weight after exponential decay.
+    
+    Works on scalars and NumPy arrays. The weight halves every half_life
+    seconds since the edge was last reinforced; half_life 0 disables decay.
+    """
+    if not half_life:
+        return weight
+    return weight * np.exp2(-np.maximum(age_seconds, 0.0) / half_life)
+
+
+def _timestamp(iso_time: Optional[str]) -> float:
+    return datetime.fromisoformat(iso_time).timestamp() if iso_time else 0.0
+
+
+class UnionFind:
+    """
+    Disjoint sets over integer ids, maintained incrementally.
+    
+    Union by size with path halving keeps find() close to O(1), so
+    connected components are always current as edges are added.
+    """
+    
+    def __init__(self):
+        self.parent = array("i")
+        self.size = array("i")
+        self.count = 0  # Number of disjoint sets
+    
+    def add(self) -> int:
+        """Add a singleton set and return its id."""
+        new_id = len(self.parent)
+        self.parent.append(new_id)
+        self.size.append(1)
+        self.count += 1
+        return new_id
+    
+    def find(self, x: int) -> int:
+        """Get the representative id of x's set."""
+        parent = self.parent
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+    
+    def union(self, a: int, b: int) -> bool:
+        """Merge the sets of a and b; returns False if already merged."""
+        a, b = self.find(a), self.find(b)
+        if a == b:
+            return False
+        if self.size[a] < self.size[b]:
+            a, b = b, a
+        self.parent[b] = a
+        self.size[a] += self.size[b]
+        self.count -= 1
+        return True
+    
+    @classmethod
+    def from_edges(cls, n: int, src: np.ndarray, dst: np.ndarray) -> "UnionFind":
+        """
+        Build the sets of n ids joined by edges (src[k], dst[k]).
+        
+        Vectorised: roots are repeatedly hooked onto the smallest root
+        they share an edge with, then paths are compressed, until every
+        edge lies within one set.
+        """
+        labels = np.arange(n, dtype=np.int32)
+        while len(src):
+            source_roots, target_roots = labels[src], labels[dst]
+            crossing = source_roots != target_roots
+            if not crossing.any():
+                break
+            source_roots, target_roots = source_roots[crossing], target_roots[crossing]
+            lowest = np.minimum(source_roots, target_roots)
+            np.minimum.at(labels, source_roots, lowest)
+            np.minimum.at(labels, target_roots, lowest)
+            while True:
+                grandparent = labels[labels]
+                if np.array_equal(grandparent, labels):
+                    break
+                labels = grandparent
+        
+        sets = cls()
+        sets.parent = array("i", labels.tobytes())
+        # Only the sizes of representatives are ever read
+        sets.size = array("i", np.bincount(labels, minlength=n).astype(np.int32).tobytes())
+        sets.count = int(np.count_nonzero(labels == np.arange(n)))
+        return sets
+    
+    def labels(self) -> np.ndarray:
+        """Representative id of every element, resolved with vectorised pointer jumping."""
+        parent = freeze_array(self.parent, np.int32)
+        while True:
+            grandparent = parent[parent]
+            if np.array_equal(grandparent, parent):
+                return parent
+            parent = grandparent
+
+
+class TopRiskIndex:
+    """
+    The `capacity` highest-risk entities, kept current as risk scores change.
+    
+    A bounded min-heap of (risk, -node id) whose root is the weakest member:
+    a rising score replaces the root only when it beats it, so an update
+    costs O(log capacity). Superseded heap entries are skipped lazily. Ties
+    favour the lower node id.
+    
+    A member whose score decreases may no longer belong, so the index is
+    then marked stale and must be rebuilt.
+    """
+    
+    def __init__(self, capacity: int = 1000):
+        self.capacity = capacity
+        self.members: Dict[int, float] = {}  # node id -> risk score
+        self._heap: List[Tuple[float, int]] = []
+        self.stale = False
+    
+    def _is_current(self, entry: Tuple[float, int]) -> bool:
+        return self.members.get(-entry[1]) == entry[0]
+    
+    def _weakest(self) -> Tuple[float, int]:
+        while not self._is_current(self._heap[0]):
+            heappop(self._heap)
+        return self._heap[0]
+    
+    def update(self, node_id: int, risk: float):
+        """Record the new risk score of an entity."""
+        current = self.members.get(node_id)
+        if current is not None:
+            if risk != current:
+                self.stale = self.stale or risk < current
+                self.members[node_id] = risk
+                heappush(self._heap, (risk, -node_id))
+                if len(self._heap) > 2 * self.capacity + 16:
+                    # Drop superseded entries
+                    self._heap = [entry for entry in self._heap if self._is_current(entry)]
+                    self._heap.sort()
+            return
+        
+        if len(self.members) < self.capacity:
+            self.members[node_id] = risk
+            heappush(self._heap, (risk, -node_id))
+        elif self.capacity and (risk, -node_id) > self._weakest():
+            weakest = heappop(self._heap)
+            del self.members[-weakest[1]]
+            self.members[node_id] = risk
+            heappush(self._heap, (risk, -node_id))
+    
+    def top(self, k: int) -> List[int]:
+        """Ids of the k highest-risk entities (k <= capacity), highest first."""
+        return sorted(self.members, key=lambda node_id: (-self.members[node_id], node_id))[:k]
+    
+    def rebuild(self, risk: np.ndarray, is_entity: np.ndarray):
+        """Recompute the members from risk and entity-flag arrays indexed by node id."""
+        ids = np.flatnonzero(is_entity)
+        ids = ids[np.lexsort((ids, -risk[ids]))][:self.capacity]
+        self.members = dict(zip(ids.tolist(), risk[ids].tolist()))
+        self._heap = sorted((value, -node_id) for node_id, value in self.members.items())
+        self.stale = False
 
 
 class FraudKnowledgeGraph:
@@ -14,20 +193,100 @@ class FraudKnowledgeGraph:
     Uses in-memory storage with optional Neo4j backend.
     """
     
-    def __init__(self):
-        """Initialize the knowledge graph with in-memory storage."""
+    def __init__(
+        self,
+        component_excluded_relationships: Sequence[str] = ("exhibits_pattern",),
+        edge_half_life: float = 0.0,
+        top_risk_capacity: int = 1000
+    ):
+        """
+        Initialize the knowledge graph with in-memory storage.
+        
+        Args:
+            component_excluded_relationships: Relationship types that do not
+                join connected components (e.g. links to shared pattern hubs)
+            edge_half_life: Seconds for an edge weight to halve since the
+                edge was last reinforced (0 disables decay)
+            top_risk_capacity: Number of highest-risk entities kept ranked
+                for visualization
+        """
         # In-memory storage
         self.nodes = {}  # {entity_value: node_data}
-        self.edges = []  # [{source, target, relationship_type, weight}]
+        self.edges = []  # [{source, target, relationship_type, weight, updated_at}]
+        self._edge_index: Dict[Tuple[str, str, str], int] = {}  # (source, target, type) -> edge position
+        
+        # Columnar mirror with integer node ids for the analytics snapshot
+        # (graph_snapshot.py). Ids are assigned in insertion order and also
+        # cover relationship endpoints that are not nodes (type -1).
+        self.node_index: Dict[str, int] = {}
+        self.node_values: List[str] = []
+        self.node_type = array("b")
+        self.node_risk = array("f")
+        self.node_incidents = array("i")
+        self.node_seen = array("d")  # last_seen as a Unix timestamp
+        self.edge_src = array("i")
+        self.edge_dst = array("i")
+        self.edge_type = array("b")
+        self.edge_weight = array("f")  # weight as of edge_updated
+        self.edge_updated = array("d")
+        self.entity_types: List[str] = []
+        self.relationship_types: List[str] = []
+        # Edge positions touching each node id
+        self.adjacency: List[List[int]] = []
+        
+        # Highest-risk entities and rendered visualization payloads
+        self.top_risk = TopRiskIndex(top_risk_capacity)
+        self._visualization_cache: Dict[int, Tuple[int, Dict]] = {}  # limit -> (version, payload)
+        
+        # Connected components over entity-to-entity relationships
+        self.components = UnionFind()
+        self.component_excluded_relationships = set(component_excluded_relationships)
+        
+        # Stored weights decay lazily: readers apply the decay for the
+        # time elapsed since each edge's updated_at
+        self.edge_half_life = edge_half_life
+        
+        # Bumped on every mutation / on new nodes and edges only / when
+        # pruning renumbers the node ids
+        self.version = 0
+        self.structure_version = 0
+        self.generation = 0
+        
+        # Serialises mutations with pruning and snapshot copies, which run
+        # in background threads
+        self.lock = threading.Lock()
         
-        # Try to import Neo4j (optional)
-        self.neo4j_available = False
+        # Optional mutation log (graph_store.GraphStore): receives the new
+        # state of every node and edge that changes
+        self.journal = None
+        
+        # Check for Neo4j (optional) without paying for its import at startup
+        self.neo4j_available = importlib.util.find_spec("neo4j") is not None
+        # Note: Connection would be initialized here if Neo4j is configured
+    
+    def _node_id(self, value: str) -> int:
+        """Get the integer id of an entity value, assigning the next one if new."""
+        node_id = self.node_index.get(value)
+        if node_id is None:
+            node_id = len(self.node_values)
+            self.node_index[value] = node_id
+            self.node_values.append(value)
+            self.node_type.append(-1)
+            self.node_risk.append(0.0)
+            self.node_incidents.append(0)
+            self.node_seen.append(0.0)
+            self.adjacency.append([])
+            self.components.add()
+            self.structure_version += 1
+        return node_id
+    
+    @staticmethod
+    def _type_code(name: str, names: List[str]) -> int:
         try:
-            from neo4j import GraphDatabase
-            self.neo4j_available = True
-            # Note: Connection would be initialized here if Neo4j is configured
-        except ImportError:
-            pass
+            return names.index(name)
+        except ValueError:
+            names.append(name)
+            return len(names) - 1
     
     def add_entity(self, entity_type: str, value: str, risk_score: int):
         """
@@ -38,22 +297,85 @@ class FraudKnowledgeGraph:
             value: Entity value (phone number, email address, etc.)
             risk_score: Risk score (0-100)
         """
-        if value in self.nodes:
-            # Update existing node
-            node = self.nodes[value]
-            node["risk_score"] = max(node["risk_score"], risk_score)
-            node["incident_count"] += 1
-            node["last_seen"] = datetime.now().isoformat()
-        else:
-            # Create new node
-            self.nodes[value] = {
-                "id": value,
-                "entity_type": entity_type,
-                "risk_score": risk_score,
-                "incident_count": 1,
-                "last_seen": datetime.now().isoformat(),
-                "created_at": datetime.now().isoformat()
-            }
+        now = datetime.now().isoformat()
+        with self.lock:
+            if value in self.nodes:
+                # Update existing node
+                node = self.nodes[value]
+                node["risk_score"] = max(node["risk_score"], risk_score)
+                node["incident_count"] += 1
+                node["last_seen"] = now
+            else:
+                # Create new node
+                self.nodes[value] = {
+                    "id": value,
+                    "entity_type": entity_type,
+                    "risk_score": risk_score,
+                    "incident_count": 1,
+                    "last_seen": now,
+                    "created_at": now
+                }
+            
+            self._index_node(self.nodes[value])
+            if self.journal is not None:
+                self.journal.record_node(self.nodes[value])
+    
+    def _index_node(self, node: Dict):
+        """Mirror a node's attributes into the columnar arrays."""
+        node_id = self._node_id(node["id"])
+        self.node_type[node_id] = self._type_code(node["entity_type"], self.entity_types)
+        self.node_risk[node_id] = node["risk_score"]
+        self.node_incidents[node_id] = node["incident_count"]
+        self.node_seen[node_id] = _timestamp(node.get("last_seen"))
+        self.top_risk.update(node_id, node["risk_score"])
+        self.version += 1
+    
+    def _append_edge(self, edge: Dict):
+        """Store a new edge and mirror it into the columnar arrays."""
+        key = (edge["source"], edge["target"], edge["relationship_type"])
+        position = len(self.edges)
+        self._edge_index[key] = position
+        source_id = self._node_id(edge["source"])
+        target_id = self._node_id(edge["target"])
+        if edge["relationship_type"] not in self.component_excluded_relationships:
+            self.components.union(source_id, target_id)
+        self.edge_src.append(source_id)
+        self.edge_dst.append(target_id)
+        self.edge_type.append(self._type_code(edge["relationship_type"], self.relationship_types))
+        self.edge_weight.append(edge["weight"])
+        self.edge_updated.append(_timestamp(edge.get("updated_at") or edge.get("created_at")))
+        self.structure_version += 1
+        self.edges.append(edge)
+        # Indexed last, so lock-free readers never see a position before its edge
+        self.adjacency[source_id].append(position)
+        if target_id != source_id:
+            self.adjacency[target_id].append(position)
+    
+    def restore_node(self, node: Dict):
+        """Set a node's full state (used when replaying persisted mutations)."""
+        with self.lock:
+            self.nodes[node["id"]] = node
+            self._index_node(node)
+    
+    def restore_edge(self, edge: Dict):
+        """Set an edge's full state (used when replaying persisted mutations)."""
+        with self.lock:
+            self.version += 1
+            position = self._edge_index.get((edge["source"], edge["target"], edge["relationship_type"]))
+            if position is None:
+                self._append_edge(edge)
+            else:
+                self.edges[position] = edge
+                self.edge_weight[position] = edge["weight"]
+                self.edge_updated[position] = _timestamp(edge.get("updated_at") or edge.get("created_at"))
+    
+    def effective_weight(self, edge: Dict, now: Optional[float] = None) -> float:
+        """Current weight of an edge after decay since it was last reinforced."""
+        if not self.edge_half_life:
+            return edge["weight"]
+        now = time.time() if now is None else now
+        updated = _timestamp(edge.get("updated_at") or edge.get("created_at"))
+        return float(decayed_weight(edge["weight"], now - updated, self.edge_half_life))
     
     def add_relationship(self, source_value: str, target_value: str, relationship_type: str, weight: float = 1.0):
         """
@@ -65,59 +387,147 @@ class FraudKnowledgeGraph:
             relationship_type: Type of relationship (similar_pattern, same_network, etc.)
             weight: Relationship strength (0-1)
         """
-        # Check if relationship already exists
-        for edge in self.edges:
-            if (edge["source"] == source_value and 
-                edge["target"] == target_value and 
-                edge["relationship_type"] == relationship_type):
-                # Update weight
-                edge["weight"] = min(edge["weight"] + 0.1, 1.0)
-                return
-        
-        # Add new relationship
-        self.edges.append({
-            "source": source_value,
-            "target": target_value,
-            "relationship_type": relationship_type,
-            "weight": weight,
-            "created_at": datetime.now().isoformat()
-        })
+        now = datetime.now()
+        with self.lock:
+            self.version += 1
+            
+            # Check if relationship already exists
+            key = (source_value, target_value, relationship_type)
+            position = self._edge_index.get(key)
+            if position is not None:
+                # Reinforce the decayed weight and restart its decay
+                edge = self.edges[position]
+                edge["weight"] = min(self.effective_weight(edge, now.timestamp()) + 0.1, 1.0)
+                edge["updated_at"] = now.isoformat()
+                self.edge_weight[position] = edge["weight"]
+                self.edge_updated[position] = now.timestamp()
+            else:
+                # Add new relationship
+                edge = {
+                    "source": source_value,
+                    "target": target_value,
+                    "relationship_type": relationship_type,
+                    "weight": weight,
+                    "created_at": now.isoformat(),
+                    "updated_at": now.isoformat()
+                }
+                self._append_edge(edge)
+            
+            if self.journal is not None:
+                self.journal.record_edge(edge)
     
-    def get_connected_entities(self, entity_value: str, depth: int = 2) -> List[Dict]:
+    def get_connected_entities(self, entity_value: str, depth: int = 2, max_results: Optional[int] = None) -> List[Dict]:
         """
         Get entities connected to the given entity up to specified depth.
         
         Args:
             entity_value: Starting entity value
             depth: Maximum traversal depth
+            max_results: Maximum number of nodes visited (None = unlimited)
             
         Returns:
-            List of connected entities with their data
+            List of connected entities with their data, nearest first
         """
-        if entity_value not in self.nodes:
-            return []
+        return [
+            self.nodes[record["id"]]
+            for record in self.iter_ego_network(entity_value, depth, max_nodes=max_results)
+            if record["type"] == "node" and record["id"] in self.nodes
+        ]
+    
+    def iter_ego_network(
+        self,
+        entity_value: str,
+        depth: int = 2,
+        relationship_types: Optional[Sequence[str]] = None,
+        min_weight: float = 0.0,
+        max_nodes: Optional[int] = 100
+    ) -> Iterator[Dict]:
+        """
+        Walk the neighbourhood of an entity breadth-first over the adjacency lists.
         
-        visited = set()
-        result = []
+        Yields a record per node ({"type": "node", "id", "depth", ...}) the
+        first time it is reached and a record per traversed edge
+        ({"type": "edge", ...}) after both of its endpoints, then a final
+        {"type": "summary"} record. The walk stops as soon as max_nodes
+        nodes have been yielded, so a hub with many neighbours costs no
+        more than the records returned.
         
-        def traverse(current_value, current_depth):
-            if current_depth > depth or current_value in visited:
-                return
-            
-            visited.add(current_value)
-            
-            if current_value in self.nodes:
-                result.append(self.nodes[current_value])
-            
-            # Find connected nodes
-            for edge in self.edges:
-                if edge["source"] == current_value:
-                    traverse(edge["target"], current_depth + 1)
-                elif edge["target"] == current_value:
-                    traverse(edge["source"], current_depth + 1)
+        Safe to consume from another thread without the graph lock: the
+        containers are captured up front, and mutations only append to them
+        while pruning replaces them.
+        
+        Args:
+            entity_value: Starting entity value
+            depth: Maximum number of hops from the entity
+            relationship_types: Relationship types followed (None = all)
+            min_weight: Smallest decayed edge weight followed
+            max_nodes: Maximum number of nodes yielded (None = unlimited)
+        """
+        adjacency, edges, node_index, nodes = self.adjacency, self.edges, self.node_index, self.nodes
+        start = node_index.get(entity_value)
+        if start is None or entity_value not in nodes:
+            return
+        
+        types = set(relationship_types) if relationship_types else None
+        now = time.time()
+        
+        def node_record(value: str, hops: int) -> Dict:
+            node = nodes.get(value)
+            return {
+                "type": "node",
+                "id": value,
+                "depth": hops,
+                "entity_type": node["entity_type"] if node else None,
+                "risk_score": node["risk_score"] if node else 0,
+                "incident_count": node["incident_count"] if node else 0,
+                "last_seen": node["last_seen"] if node else None
+            }
+        
+        values = {start: entity_value}  # Visited node ids
+        traversed = set()  # Edge positions already yielded
+        truncated = False
+        yield node_record(entity_value, 0)
+        
+        frontier = [start]
+        for hops in range(1, depth + 1):
+            next_frontier = []
+            for node_id in frontier:
+                value = values[node_id]
+                for position in adjacency[node_id]:
+                    if position in traversed:
+                        continue
+                    edge = edges[position]
+                    if types is not None and edge["relationship_type"] not in types:
+                        continue
+                    weight = self.effective_weight(edge, now)
+                    if weight < min_weight:
+                        continue
+                    
+                    neighbour = edge["target"] if edge["source"] == value else edge["source"]
+                    neighbour_id = node_index[neighbour]
+                    if neighbour_id not in values:
+                        if max_nodes is not None and len(values) >= max_nodes:
+                            truncated = True
+                            break
+                        values[neighbour_id] = neighbour
+                        next_frontier.append(neighbour_id)
+                        yield node_record(neighbour, hops)
+                    
+                    traversed.add(position)
+                    yield {
+                        "type": "edge",
+                        "source": edge["source"],
+                        "target": edge["target"],
+                        "relationship_type": edge["relationship_type"],
+                        "weight": round(weight, 4)
+                    }
+                if truncated:
+                    break
+            if truncated or not next_frontier:
+                break
+            frontier = next_frontier
         
-        traverse(entity_value, 0)
-        return result
+        yield {"type": "summary", "nodes": len(values), "edges": len(traversed), "truncated": truncated}
     
     def propagate_risk(self, entity_value: str, decay_factor: float = 0.7) -> int:
         """
@@ -130,12 +540,17 @@ class FraudKnowledgeGraph:
         Returns:
             Number of entities affected
         """
+        with self.lock:
+            return self._propagate_risk(entity_value, decay_factor)
+    
+    def _propagate_risk(self, entity_value: str, decay_factor: float) -> int:
         if entity_value not in self.nodes:
             return 0
         
         source_risk = self.nodes[entity_value]["risk_score"]
         affected = 0
         visited = set([entity_value])
+        now = time.time()
         
         def propagate(current_value, current_risk, depth):
             nonlocal affected
@@ -144,7 +559,8 @@ class FraudKnowledgeGraph:
                 return
             
             # Find connected nodes
-            for edge in self.edges:
+            for position in self.adjacency[self.node_index[current_value]]:
+                edge = self.edges[position]
                 next_value = None
                 if edge["source"] == current_value and edge["target"] not in visited:
                     next_value = edge["target"]
@@ -153,43 +569,78 @@ class FraudKnowledgeGraph:
                 
                 if next_value and next_value in self.nodes:
                     visited.add(next_value)
-                    propagated_risk = int(current_risk * decay_factor * edge["weight"])
+                    propagated_risk = int(current_risk * decay_factor * self.effective_weight(edge, now))
                     
                     # Update risk if higher
                     if propagated_risk > self.nodes[next_value]["risk_score"]:
                         self.nodes[next_value]["risk_score"] = propagated_risk
+                        self.node_risk[self.node_index[next_value]] = propagated_risk
+                        self.top_risk.update(self.node_index[next_value], propagated_risk)
+                        if self.journal is not None:
+                            self.journal.record_node(self.nodes[next_value])
                         affected += 1
                     
                     # Continue propagation
                     propagate(next_value, propagated_risk, depth + 1)
         
         propagate(entity_value, source_risk, 0)
+        if affected:
+            self.version += 1
         return affected
     
+    def top_risk_entities(self, limit: int) -> List[int]:
+        """Node ids of the highest-risk entities, highest first (ties: lowest id first)."""
+        if limit <= self.top_risk.capacity and not self.top_risk.stale:
+            return self.top_risk.top(limit)
+        
+        risk = freeze_array(self.node_risk, np.float32)
+        is_entity = freeze_array(self.node_type, np.int8) >= 0
+        if self.top_risk.stale:
+            self.top_risk.rebuild(risk, is_entity)
+        if limit <= self.top_risk.capacity:
+            return self.top_risk.top(limit)
+        ids = np.flatnonzero(is_entity)
+        return ids[np.lexsort((ids, -risk[ids]))][:limit].tolist()
+    
     def get_graph_data_for_visualization(self, limit: int = 100) -> Dict:
         """
         Get graph data formatted for visualization.
         
+        The payload is cached per limit until the graph changes; callers
+        must not modify it.
+        
         Args:
             limit: Maximum number of nodes to return
             
         Returns:
             Dictionary with nodes and edges for visualization
         """
+        limit = max(limit, 0)
+        with self.lock:
+            cached = self._visualization_cache.get(limit)
+            if cached is not None and cached[0] == self.version:
+                return cached[1]
+            version = self.version
+            payload = self._render_visualization(limit)
+            if len(self._visualization_cache) >= 8:
+                self._visualization_cache.clear()
+            self._visualization_cache[limit] = (version, payload)
+            return payload
+    
+    def _render_visualization(self, limit: int) -> Dict:
         # Get top nodes by risk score
-        sorted_nodes = sorted(
-            self.nodes.values(),
-            key=lambda x: x["risk_score"],
-            reverse=True
-        )[:limit]
-        
-        node_ids = {node["id"] for node in sorted_nodes}
-        
-        # Filter edges to only include nodes in the result
-        filtered_edges = [
-            edge for edge in self.edges
-            if edge["source"] in node_ids and edge["target"] in node_ids
-        ]
+        top_ids = self.top_risk_entities(limit)
+        sorted_nodes = [self.nodes[self.node_values[node_id]] for node_id in top_ids]
+        
+        # Edges between selected nodes, found through their adjacency lists
+        selected = set(top_ids)
+        positions = {
+            position
+            for node_id in top_ids
+            for position in self.adjacency[node_id]
+            if self.edge_src[position] in selected and self.edge_dst[position] in selected
+        }
+        filtered_edges = [self.edges[position] for position in sorted(positions)]
         
         # Format nodes for visualization
         vis_nodes = [
@@ -204,12 +655,13 @@ class FraudKnowledgeGraph:
         ]
         
         # Format edges for visualization
+        now = time.time()
         vis_edges = [
             {
                 "source": edge["source"],
                 "target": edge["target"],
                 "relationship_type": edge["relationship_type"],
-                "weight": edge["weight"]
+                "weight": round(self.effective_weight(edge, now), 4)
             }
             for edge in filtered_edges
         ]
@@ -219,16 +671,137 @@ class FraudKnowledgeGraph:
             "edges": vis_edges
         }
     
+    def prune(
+        self,
+        min_weight: float = 0.0,
+        edge_ttl: float = 0.0,
+        node_ttl: float = 0.0,
+        max_nodes: int = 0,
+        now: Optional[float] = None
+    ) -> Dict:
+        """
+        Remove stale nodes and edges and renumber the survivors.
+        
+        An edge is removed when its decayed weight falls below min_weight,
+        when it has not been reinforced for edge_ttl seconds, or when either
+        endpoint is removed. An entity is removed when it has not been seen
+        for node_ttl seconds or, beyond max_nodes entities, when it is among
+        the least recently seen. Endpoints that are not entities (such as
+        pattern hubs) are kept only while an edge references them.
+        
+        Node ids, the columnar arrays and the connected components are
+        rebuilt, so structure_version and generation change. Runs under
+        the graph lock; mutations wait for it to finish.
+        
+        Args:
+            min_weight: Smallest decayed edge weight kept
+            edge_ttl: Seconds since last reinforcement after which an edge expires (0 = never)
+            node_ttl: Seconds since last seen after which an entity expires (0 = never)
+            max_nodes: Maximum number of entities kept (0 = unlimited)
+            now: Reference Unix time (default: now)
+            
+        Returns:
+            Counts of removed and remaining nodes and edges
+        """
+        now = time.time() if now is None else now
+        with self.lock:
+            m = len(self.edges)
+            node_type = freeze_array(self.node_type, np.int8)
+            node_seen = freeze_array(self.node_seen, np.float64)
+            src = freeze_array(self.edge_src, np.int32)
+            dst = freeze_array(self.edge_dst, np.int32)
+            edge_type = freeze_array(self.edge_type, np.int8)
+            edge_weight = freeze_array(self.edge_weight, np.float32)
+            edge_updated = freeze_array(self.edge_updated, np.float64)
+            
+            edge_age = now - edge_updated
+            keep_edge = decayed_weight(edge_weight.astype(np.float64), edge_age, self.edge_half_life) >= min_weight
+            if edge_ttl:
+                keep_edge &= edge_age <= edge_ttl
+            
+            is_entity = node_type >= 0
+            keep_entity = is_entity.copy()
+            if node_ttl:
+                keep_entity &= now - node_seen <= node_ttl
+            kept_entities = np.flatnonzero(keep_entity)
+            if max_nodes and len(kept_entities) > max_nodes:
+                excess = len(kept_entities) - max_nodes
+                keep_entity[kept_entities[np.argpartition(node_seen[kept_entities], excess)[:excess]]] = False
+            
+            removed_entity = is_entity & ~keep_entity
+            keep_edge &= ~removed_entity[src] & ~removed_entity[dst]
+            keep_node = keep_entity.copy()
+            keep_node[src[keep_edge]] = True
+            keep_node[dst[keep_edge]] = True
+            
+            result = {
+                "nodes_removed": int(np.count_nonzero(removed_entity)),
+                "endpoints_removed": int(np.count_nonzero(~is_entity & ~keep_node)),
+                "edges_removed": int(m - np.count_nonzero(keep_edge))
+            }
+            if result["nodes_removed"] or result["endpoints_removed"] or result["edges_removed"]:
+                new_id = (np.cumsum(keep_node) - 1).astype(np.int32)
+                
+                self.node_values = list(compress(self.node_values, keep_node.tolist()))
+                self.node_index = dict(zip(self.node_values, range(len(self.node_values))))
+                self.nodes = {value: self.nodes[value] for value in compress(self.node_values, keep_entity[keep_node].tolist())}
+                self.node_type = array("b", node_type[keep_node].tobytes())
+                self.node_risk = array("f", freeze_array(self.node_risk, np.float32)[keep_node].tobytes())
+                self.node_incidents = array("i", freeze_array(self.node_incidents, np.int32)[keep_node].tobytes())
+                self.node_seen = array("d", node_seen[keep_node].tobytes())
+                
+                self.edges = list(compress(self.edges, keep_edge.tolist()))
+                self._edge_index = {
+                    (edge["source"], edge["target"], edge["relationship_type"]): position
+                    for position, edge in enumerate(self.edges)
+                }
+                src, dst, edge_type = new_id[src[keep_edge]], new_id[dst[keep_edge]], edge_type[keep_edge]
+                self.edge_src = array("i", src.tobytes())
+                self.edge_dst = array("i", dst.tobytes())
+                self.edge_type = array("b", edge_type.tobytes())
+                self.edge_weight = array("f", edge_weight[keep_edge].tobytes())
+                self.edge_updated = array("d", edge_updated[keep_edge].tobytes())
+                
+                # Adjacency lists in edge order, as appends would have built them
+                rows = np.concatenate([src, dst[src != dst]])
+                positions = np.concatenate([np.arange(len(src)), np.flatnonzero(src != dst)])
+                positions = positions[np.lexsort((positions, rows))].tolist()
+                bounds = np.cumsum(np.bincount(rows, minlength=len(self.node_values))).tolist()
+                self.adjacency = [positions[start:end] for start, end in zip([0] + bounds[:-1], bounds)]
+                
+                self.top_risk.rebuild(freeze_array(self.node_risk, np.float32), node_type[keep_node] >= 0)
+                
+                excluded = [
+                    code for code, name in enumerate(self.relationship_types)
+                    if name in self.component_excluded_relationships
+                ]
+                joins = ~np.isin(edge_type, excluded)
+                self.components = UnionFind.from_edges(len(self.node_values), src[joins], dst[joins])
+                
+                self.version += 1
+                self.structure_version += 1
+                self.generation += 1
+            
+            result["nodes"] = len(self.nodes)
+            result["edges"] = len(self.edges)
+            return result
+    
     def get_statistics(self) -> Dict:
         """Get graph statistics."""
+        types = freeze_array(self.node_type, np.int8)
+        risk = freeze_array(self.node_risk, np.float32)[:len(types)][types >= 0]
         return {
             "total_nodes": len(self.nodes),
             "total_edges": len(self.edges),
-            "high_risk_nodes": sum(1 for n in self.nodes.values() if n["risk_score"] > 70),
-            "medium_risk_nodes": sum(1 for n in self.nodes.values() if 30 < n["risk_score"] <= 70),
-            "low_risk_nodes": sum(1 for n in self.nodes.values() if n["risk_score"] <= 30)
+            "high_risk_nodes": int(np.count_nonzero(risk > 70)),
+            "medium_risk_nodes": int(np.count_nonzero((risk > 30) & (risk <= 70))),
+            "low_risk_nodes": int(np.count_nonzero(risk <= 30))
         }
 
 
 # Global instance
-fraud_graph = FraudKnowledgeGraph()
+fraud_graph = FraudKnowledgeGraph(
+    component_excluded_relationships=config.GRAPH_COMPONENT_EXCLUDED_RELATIONSHIPS,
+    edge_half_life=config.GRAPH_EDGE_HALF_LIFE_HOURS * 3600,
+    top_risk_capacity=config.GRAPH_TOP_RISK_CAPACITY
+)
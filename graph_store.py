@@ -0,0 +1,357 @@
+"""
+Knowledge Graph Persistence
+Append-only mutation log plus periodic compacted snapshots for the
+in-memory FraudKnowledgeGraph. On startup the snapshot is loaded and the
+log written since then is replayed, so recovery time follows the size of
+the graph rather than its full history.
+
+Files in the store directory:
+    graph.snapshot   every node and edge at the last compaction
+    graph.log        mutations since then
+    graph.log.1      previous log while a compaction is in progress
+
+Both files hold the same records: a header of payload length and CRC32
+(little-endian uint32 each) followed by the payload. Records carry the full
+new state of a node or edge, so replaying one twice is harmless. A torn
+record at the end of the log (crash mid-write) is detected and truncated.
+"""
+
+import os
+import struct
+import threading
+import time
+import zlib
+from typing import Dict, Iterator, Optional, Tuple
+
+from config import config
+from metrics import registry
+
+
+RECORD_HEADER = struct.Struct("<II")
+NODE_FIELDS = struct.Struct("<BiI")   # record type, risk score, incident count
+EDGE_FIELDS = struct.Struct("<Bd")    # record type, weight
+STRING_LENGTH = struct.Struct("<H")
+
+RECORD_NODE = 1
+RECORD_EDGE = 2
+
+SNAPSHOT_FILE = "graph.snapshot"
+LOG_FILE = "graph.log"
+ROTATED_LOG_FILE = "graph.log.1"
+
+GRAPH_STORE_RECORDS_TOTAL = registry.counter(
+    "fraud_graph_store_records_total",
+    "Graph mutations appended to the persistence log"
+)
+GRAPH_STORE_COMPACTION_SECONDS = registry.histogram(
+    "fraud_graph_store_compaction_seconds",
+    "Time spent writing a compacted graph snapshot"
+)
+
+
+def _pack_strings(*values: str) -> bytes:
+    parts = []
+    for value in values:
+        data = (value or "").encode("utf-8")[:65535]
+        parts.append(STRING_LENGTH.pack(len(data)))
+        parts.append(data)
+    return b"".join(parts)
+
+
+def _unpack_strings(payload: bytes, offset: int, count: int) -> Tuple[list, int]:
+    values = []
+    for _ in range(count):
+        (length,) = STRING_LENGTH.unpack_from(payload, offset)
+        offset += STRING_LENGTH.size
+        values.append(payload[offset:offset + length].decode("utf-8"))
+        offset += length
+    return values, offset
+
+
+def encode_node(node: Dict) -> bytes:
+    """Encode a node's full state as a framed record."""
+    payload = NODE_FIELDS.pack(RECORD_NODE, int(node["risk_score"]), int(node["incident_count"])) + _pack_strings(
+        node["id"], node["entity_type"], node.get("last_seen"), node.get("created_at")
+    )
+    return RECORD_HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+def encode_edge(edge: Dict) -> bytes:
+    """Encode an edge's full state as a framed record."""
+    payload = EDGE_FIELDS.pack(RECORD_EDGE, float(edge["weight"])) + _pack_strings(
+        edge["source"], edge["target"], edge["relationship_type"], edge.get("created_at"), edge.get("updated_at")
+    )
+    return RECORD_HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+def decode_record(payload: bytes) -> Tuple[int, Dict]:
+    """Decode a record payload into (record type, node or edge dict)."""
+    record_type = payload[0]
+    if record_type == RECORD_NODE:
+        _, risk_score, incident_count = NODE_FIELDS.unpack_from(payload, 0)
+        (value, entity_type, last_seen, created_at), _ = _unpack_strings(payload, NODE_FIELDS.size, 4)
+        return RECORD_NODE, {
+            "id": value,
+            "entity_type": entity_type,
+            "risk_score": risk_score,
+            "incident_count": incident_count,
+            "last_seen": last_seen,
+            "created_at": created_at
+        }
+    if record_type == RECORD_EDGE:
+        _, weight = EDGE_FIELDS.unpack_from(payload, 0)
+        (source, target, relationship_type, created_at), offset = _unpack_strings(payload, EDGE_FIELDS.size, 4)
+        # Records written before edge decay have no updated_at
+        (updated_at,), _ = _unpack_strings(payload, offset, 1) if offset < len(payload) else ([created_at], offset)
+        return RECORD_EDGE, {
+            "source": source,
+            "target": target,
+            "relationship_type": relationship_type,
+            "weight": weight,
+            "created_at": created_at,
+            "updated_at": updated_at
+        }
+    raise ValueError(f"Unknown graph record type {record_type}")
+
+
+def read_records(path: str) -> Iterator[Tuple[int, Dict]]:
+    """
+    Read records from a log or snapshot file.
+
+    Stops at the first incomplete or corrupt record; the valid length read
+    so far is available afterwards as the generator's return value.
+    """
+    valid_length = 0
+    with open(path, "rb") as f:
+        while True:
+            header = f.read(RECORD_HEADER.size)
+            if len(header) < RECORD_HEADER.size:
+                break
+            length, checksum = RECORD_HEADER.unpack(header)
+            payload = f.read(length)
+            if len(payload) < length or zlib.crc32(payload) != checksum:
+                break
+            yield decode_record(payload)
+            valid_length += RECORD_HEADER.size + length
+    return valid_length
+
+
+class GraphStore:
+    """
+    Durable storage for a FraudKnowledgeGraph.
+
+    Attach it as the graph's journal after load(); every node or edge
+    change is then appended to the log. A background thread flushes the
+    log and compacts it into a new snapshot. One process should own a
+    store directory at a time.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        flush_interval: float = 1.0,
+        compact_interval: float = 3600.0,
+        compact_min_bytes: int = 64 * 1024 * 1024
+    ):
+        """
+        Initialize the store.
+
+        Args:
+            directory: Directory holding the snapshot and log files
+            flush_interval: Seconds between log flushes (fsync)
+            compact_interval: Seconds between compactions
+            compact_min_bytes: Log size that triggers an early compaction
+        """
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.compact_interval = compact_interval
+        self.compact_min_bytes = compact_min_bytes
+        self.graph = None
+        self._log = None
+        self._log_bytes = 0
+        self._lock = threading.Lock()
+        self._compact_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.last_compaction = time.time()
+        self.last_load: Optional[Dict] = None
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    # Recovery
+
+    def _replay(self, path: str, graph) -> int:
+        """Apply every valid record of a file; truncate a torn tail. Returns records applied."""
+        if not os.path.exists(path):
+            return 0
+        applied = 0
+        records = read_records(path)
+        while True:
+            try:
+                record_type, state = next(records)
+            except StopIteration as done:
+                valid_length = done.value
+                break
+            if record_type == RECORD_NODE:
+                graph.restore_node(state)
+            else:
+                graph.restore_edge(state)
+            applied += 1
+        if valid_length < os.path.getsize(path):
+            print(f"Graph store: truncating torn record at byte {valid_length} of {path}")
+            with open(path, "r+b") as f:
+                f.truncate(valid_length)
+        return applied
+
+    def load(self, graph) -> Dict:
+        """
+        Restore a graph from the snapshot and logs, then start journaling its mutations.
+
+        Args:
+            graph: Empty FraudKnowledgeGraph
+
+        Returns:
+            Statistics of the load
+        """
+        started = time.perf_counter()
+        os.makedirs(self.directory, exist_ok=True)
+        snapshot_records = self._replay(self._path(SNAPSHOT_FILE), graph)
+        log_records = self._replay(self._path(ROTATED_LOG_FILE), graph)
+        log_records += self._replay(self._path(LOG_FILE), graph)
+
+        self.graph = graph
+        self._log = open(self._path(LOG_FILE), "ab")
+        self._log_bytes = self._log.tell()
+        graph.journal = self
+
+        self.last_load = {
+            "snapshot_records": snapshot_records,
+            "log_records": log_records,
+            "nodes": len(graph.nodes),
+            "edges": len(graph.edges),
+            "duration_ms": round((time.perf_counter() - started) * 1000, 1)
+        }
+        print(f"Graph store: restored {self.last_load}")
+        return self.last_load
+
+    # Journal interface used by FraudKnowledgeGraph
+
+    def _append(self, record: bytes):
+        with self._lock:
+            if self._log is None:
+                return
+            self._log.write(record)
+            self._log_bytes += len(record)
+        GRAPH_STORE_RECORDS_TOTAL.inc()
+
+    def record_node(self, node: Dict):
+        """Append a node's new state to the log."""
+        self._append(encode_node(node))
+
+    def record_edge(self, edge: Dict):
+        """Append an edge's new state to the log."""
+        self._append(encode_edge(edge))
+
+    # Background flush and compaction
+
+    def flush(self):
+        """Write buffered records to disk."""
+        with self._lock:
+            if self._log is None:
+                return
+            self._log.flush()
+            os.fsync(self._log.fileno())
+
+    def compact(self) -> Dict:
+        """
+        Write a snapshot of the current graph and drop the log it covers.
+
+        The log is rotated first, so mutations made while the snapshot is
+        being written land in the new log and are replayed after it.
+        """
+        with self._compact_lock:
+            if self.graph is None:
+                return {}
+            started = time.perf_counter()
+
+            with self._lock:
+                self._log.flush()
+                os.fsync(self._log.fileno())
+                self._log.close()
+                os.replace(self._path(LOG_FILE), self._path(ROTATED_LOG_FILE))
+                self._log = open(self._path(LOG_FILE), "ab")
+                self._log_bytes = 0
+
+            # list() copies without running Python code, so it does not race
+            # with the event loop adding nodes or edges
+            nodes = list(self.graph.nodes.values())
+            edges = list(self.graph.edges)
+
+            temporary = self._path(SNAPSHOT_FILE + ".tmp")
+            with open(temporary, "wb") as f:
+                for node in nodes:
+                    f.write(encode_node(node))
+                for edge in edges:
+                    f.write(encode_edge(edge))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temporary, self._path(SNAPSHOT_FILE))
+            os.remove(self._path(ROTATED_LOG_FILE))
+
+            self.last_compaction = time.time()
+            duration = time.perf_counter() - started
+            GRAPH_STORE_COMPACTION_SECONDS.observe(duration)
+            return {
+                "nodes": len(nodes),
+                "edges": len(edges),
+                "snapshot_bytes": os.path.getsize(self._path(SNAPSHOT_FILE)),
+                "duration_ms": round(duration * 1000, 1)
+            }
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+                if (time.time() - self.last_compaction >= self.compact_interval
+                        or self._log_bytes >= self.compact_min_bytes):
+                    self.compact()
+            except Exception as e:
+                print(f"Graph store error: {e}")
+
+    def start(self):
+        """Start the background flush and compaction thread."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="graph-store", daemon=True)
+        self._thread.start()
+
+    def close(self):
+        """Stop the background thread and flush the log."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.flush_interval + 5)
+        self.flush()
+        with self._lock:
+            if self._log is not None:
+                self._log.close()
+                self._log = None
+
+    def get_statistics(self) -> Dict:
+        """Get log size and load/compaction details."""
+        return {
+            "directory": self.directory,
+            "log_bytes": self._log_bytes,
+            "last_compaction": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.last_compaction)),
+            "last_load": self.last_load
+        }
+
+
+# Global instance (disabled when GRAPH_STORE_DIR is empty)
+graph_store = GraphStore(
+    config.GRAPH_STORE_DIR,
+    flush_interval=config.GRAPH_STORE_FLUSH_SECONDS,
+    compact_interval=config.GRAPH_STORE_COMPACT_SECONDS,
+    compact_min_bytes=config.GRAPH_STORE_COMPACT_MIN_BYTES
+) if config.GRAPH_STORE_DIR else None
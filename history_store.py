@@ -1,6 +1,8 @@
 from collections import defaultdict
 from typing import List, Dict
 
+from phone_normalizer import normalize_phone
+
 
 class HistoryStore:
     """Store fraud analysis history in memory."""
@@ -20,9 +22,7 @@ class HistoryStore:
         if not phone_number:
             return
         
-        # Clean phone number
-        clean_phone = phone_number.replace("-", "").replace(" ", "").replace("(", "").replace(")", "")
-        clean_phone = ''.join(char for char in clean_phone if char.isdigit())
+        clean_phone = normalize_phone(phone_number)
         
         # Add to history (keep last 10 entries per phone)
         self.history[clean_phone].append(analysis_result)
@@ -65,8 +65,6 @@ class HistoryStore:
         if not phone_number:
             return []
         
-        # Clean phone number
-        clean_phone = phone_number.replace("-", "").replace(" ", "").replace("(", "").replace(")", "")
-        clean_phone = ''.join(char for char in clean_phone if char.isdigit())
+        clean_phone = normalize_phone(phone_number)
         
         return self.history.get(clean_phone, [])
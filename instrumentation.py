@@ -0,0 +1,91 @@
+"""
+Request Instrumentation
+Lightweight per-stage timing for the analysis pipeline, aggregated into
+fixed-memory histograms exported on /metrics.
+"""
+
+from time import perf_counter_ns
+from typing import Dict, List, Tuple
+
+from metrics import registry
+
+
+ANALYZE_STAGE_SECONDS = registry.histogram(
+    "fraud_analyze_stage_seconds",
+    "Time spent in each analyze_message stage",
+    ["stage"]
+)
+ANALYZE_DURATION_SECONDS = registry.histogram(
+    "fraud_analyze_duration_seconds",
+    "Total time spent inside analyze_message"
+)
+
+
+class StageTimer:
+    """
+    Times consecutive stages of a single request.
+
+    Each call to mark() records the time elapsed since the previous mark
+    (or since the timer was created) under the given stage name.
+    """
+
+    __slots__ = ("stages", "_started", "_last")
+
+    def __init__(self):
+        self.stages: List[Tuple[str, int]] = []
+        self._started = perf_counter_ns()
+        self._last = self._started
+
+    def mark(self, stage: str):
+        """
+        Close the current stage.
+
+        Args:
+            stage: Name of the stage that just finished
+        """
+        now = perf_counter_ns()
+        self.stages.append((stage, now - self._last))
+        self._last = now
+
+    def total_ns(self) -> int:
+        """Get the time from creation to the last mark in nanoseconds."""
+        return self._last - self._started
+
+    def publish(self):
+        """Record every stage and the total into the analyze histograms."""
+        for stage, duration in self.stages:
+            ANALYZE_STAGE_SECONDS.observe(duration / 1e9, stage)
+        ANALYZE_DURATION_SECONDS.observe(self.total_ns() / 1e9)
+
+    def to_dict(self) -> Dict[str, float]:
+        """Get stage durations in milliseconds."""
+        return {stage: duration / 1e6 for stage, duration in self.stages}
+
+    def to_server_timing(self) -> str:
+        """Format stage durations as a Server-Timing header value."""
+        parts = [f"{stage};dur={duration / 1e6:.3f}" for stage, duration in self.stages]
+        parts.append(f"total;dur={self.total_ns() / 1e6:.3f}")
+        return ", ".join(parts)
+
+
+def parse_server_timing(header: str) -> Dict[str, float]:
+    """
+    Parse a Server-Timing header into stage durations.
+
+    Args:
+        header: Header value such as "detection;dur=0.120, ml;dur=1.500"
+
+    Returns:
+        Dictionary of stage name to duration in milliseconds
+    """
+    result = {}
+    for metric in (header or "").split(","):
+        name, _, params = metric.strip().partition(";")
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "dur" and name:
+                try:
+                    result[name] = float(value)
+                except ValueError:
+                    pass
+    return result
@@ -1,47 +1,255 @@
+"""
+IP Intelligence
+Scores client IPs (IPv4 and IPv6) against built-in loopback and private
+ranges, threat-intel CIDR blocklists and ASN ranges. Lists are loaded from
+local files into IPRangeIndex interval arrays; a background thread rebuilds
+them when the files change and swaps the new indexes in atomically.
+
+Blocklist files (every *.txt, *.csv, *.netset or *.ipset file in the
+blocklist directory; the file name is the list name) hold one CIDR, address
+or "first-last" range per line, optionally followed by ",score,category".
+"#" and ";" start comments.
+
+The ASN file is an ip2asn-style TSV: first, last, AS number, country code
+and AS description per line.
+"""
+
+import os
+import threading
+import time
+from typing import Dict, Iterator, Optional, Sequence, Tuple
+
+from ip_index import IPRangeIndex, parse_address, parse_range
+
+
+# (range, risk adjustment, reason) scored for every client
+BUILTIN_RANGES = [
+    ("127.0.0.0/8", 15, "Localhost access detected"),
+    ("::1/128", 15, "Localhost access detected"),
+    ("10.0.0.0/8", 10, "Private network IP (10.x.x.x)"),
+    ("172.16.0.0/12", 10, "Private network IP (172.16-31.x.x)"),
+    ("192.168.0.0/16", 10, "Private network IP (192.168.x.x)"),
+    ("fc00::/7", 10, "Private network IP (fc00::/7)"),
+]
+
+BLOCKLIST_EXTENSIONS = (".txt", ".csv", ".netset", ".ipset")
+
+
+def read_blocklist(path: str, score: int) -> Iterator[Tuple[int, int, int, Tuple[int, str, str]]]:
+    """
+    Yield (version, first, last, (score, reason, list name)) for each entry of a blocklist file.
+
+    Malformed lines are skipped.
+    """
+    name = os.path.splitext(os.path.basename(path))[0]
+    # Entries share payload tuples, so memory does not grow per line
+    payloads = {}
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        for line in f:
+            if "#" in line or ";" in line:
+                line = line.split("#", 1)[0].split(";", 1)[0]
+            line = line.strip()
+            if not line:
+                continue
+            entry_score, category = score, name
+            try:
+                if "," in line or "\t" in line:
+                    fields = [field.strip() for field in line.replace("\t", ",").split(",")]
+                    line = fields[0]
+                    if len(fields) > 1 and fields[1]:
+                        entry_score = int(fields[1])
+                    if len(fields) > 2 and fields[2]:
+                        category = fields[2]
+                version, first, last = parse_range(line.split()[0])
+            except ValueError:
+                continue
+            payload = payloads.get((entry_score, category))
+            if payload is None:
+                payload = payloads[entry_score, category] = (entry_score, f"IP address on {category} blocklist", name)
+            yield version, first, last, payload
+
+
+def read_asn_ranges(path: str) -> Iterator[Tuple[int, int, int, Tuple[int, str, str]]]:
+    """Yield (version, first, last, (asn, country, description)) for each routed range of an ASN file."""
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        for line in f:
+            fields = line.rstrip("\n").split("\t")
+            if len(fields) < 3 or not fields[2].isdigit() or fields[2] == "0":
+                continue
+            first, last = parse_address(fields[0]), parse_address(fields[1])
+            if first is None or last is None or first[0] != last[0]:
+                continue
+            country = fields[3] if len(fields) > 3 else ""
+            description = fields[4] if len(fields) > 4 else ""
+            yield first[0], first[1], last[1], (int(fields[2]), country, description)
+
+
 class IPAnalyzer:
     """Analyze IP addresses for suspicious patterns."""
-    
+
+    def __init__(
+        self,
+        blocklist_dir: str = "",
+        asn_file: str = "",
+        blocklist_score: int = 25,
+        flagged_asns: Sequence[int] = (),
+        flagged_asn_score: int = 10,
+        reload_interval: float = 60.0
+    ):
+        """
+        Initialize the analyzer with the built-in ranges only; call load() to read the lists.
+
+        Args:
+            blocklist_dir: Directory of CIDR blocklist files ("" = none)
+            asn_file: ip2asn-style TSV of ASN ranges ("" = none)
+            blocklist_score: Risk adjustment for blocklist entries without a score
+            flagged_asns: AS numbers whose traffic is suspicious (e.g. bulletproof hosting)
+            flagged_asn_score: Risk adjustment for traffic from a flagged ASN
+            reload_interval: Seconds between checks for changed list files
+        """
+        self.blocklist_dir = blocklist_dir
+        self.asn_file = asn_file
+        self.blocklist_score = blocklist_score
+        self.flagged_asns = set(flagged_asns)
+        self.flagged_asn_score = flagged_asn_score
+        self.reload_interval = reload_interval
+        # Replaced together, so a lookup never mixes old and new lists
+        self._indexes = (self._build_blocklist([]), IPRangeIndex())
+        self._file_state = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.last_load: Optional[Dict] = None
+
+    @staticmethod
+    def _build_blocklist(paths, score: int = 0) -> IPRangeIndex:
+        ranges = [parse_range(cidr) + ((adjustment, reason, ""),) for cidr, adjustment, reason in BUILTIN_RANGES]
+        for path in paths:
+            ranges.extend(read_blocklist(path, score))
+        # The highest risk adjustment wins where ranges overlap
+        return IPRangeIndex.build(ranges, priority=lambda payload: payload[0])
+
+    def _blocklist_paths(self):
+        if not self.blocklist_dir or not os.path.isdir(self.blocklist_dir):
+            return []
+        return sorted(
+            os.path.join(self.blocklist_dir, name) for name in os.listdir(self.blocklist_dir)
+            if name.lower().endswith(BLOCKLIST_EXTENSIONS)
+        )
+
+    def _current_file_state(self):
+        paths = self._blocklist_paths() + ([self.asn_file] if self.asn_file and os.path.exists(self.asn_file) else [])
+        state = []
+        for path in paths:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            state.append((path, stat.st_mtime_ns, stat.st_size))
+        return tuple(state)
+
+    def load(self) -> Dict:
+        """
+        Build the blocklist and ASN indexes from the list files and swap them in.
+
+        Returns:
+            Statistics of the load
+        """
+        with self._lock:
+            started = time.perf_counter()
+            file_state = self._current_file_state()
+            paths = self._blocklist_paths()
+            blocklist = self._build_blocklist(paths, self.blocklist_score)
+            asn_index = IPRangeIndex()
+            if self.asn_file and os.path.exists(self.asn_file):
+                asn_index = IPRangeIndex.build(read_asn_ranges(self.asn_file))
+            self._indexes = (blocklist, asn_index)
+            self._file_state = file_state
+
+            self.last_load = {
+                "blocklists": [os.path.basename(path) for path in paths],
+                "blocklist_ranges": blocklist.range_count - len(BUILTIN_RANGES),
+                "blocklist_segments": len(blocklist),
+                "asn_ranges": asn_index.range_count,
+                "memory_bytes": blocklist.memory_bytes() + asn_index.memory_bytes(),
+                "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+                "loaded_at": time.strftime("%Y-%m-%dT%H:%M:%S")
+            }
+            return self.last_load
+
+    def reload_if_changed(self) -> bool:
+        """Reload the lists if any file was added, removed or modified since the last load."""
+        if self._current_file_state() == self._file_state:
+            return False
+        result = self.load()
+        print(f"IP intelligence lists reloaded: {result}")
+        return True
+
+    def _run(self):
+        while not self._stop.wait(self.reload_interval):
+            try:
+                self.reload_if_changed()
+            except Exception as e:
+                print(f"IP intelligence reload error: {e}")
+
+    def start(self):
+        """Start the background thread reloading changed list files."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="ip-intel-reload", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the background reload thread."""
+        self._stop.set()
+
     def analyze(self, ip_address: str) -> dict:
         """
         Analyze an IP address and return risk score adjustment with reason.
-        
+
         Args:
             ip_address: The IP address to analyze
-            
+
         Returns:
-            Dictionary with risk_adjustment and reason
+            Dictionary with risk_adjustment and reason, plus the matched
+            blocklist and the address's ASN details when known
         """
+        result = {"risk_adjustment": 0, "reason": "", "blocklist": None, "asn": None, "as_org": None, "country": None}
         if not ip_address:
-            return {"risk_adjustment": 0, "reason": ""}
-        
-        risk_adjustment = 0
+            return result
+        if ip_address == "localhost":
+            return {**result, "risk_adjustment": 15, "reason": "Localhost access detected"}
+
+        parsed = parse_address(ip_address)
+        if parsed is None:
+            return result
+        blocklist, asn_index = self._indexes
         reasons = []
-        
-        # Check for localhost
-        if ip_address in ["127.0.0.1", "localhost", "::1"]:
-            risk_adjustment += 15
-            reasons.append("Localhost access detected")
-        
-        # Check for private IP ranges
-        # 10.0.0.0 - 10.255.255.255
-        if ip_address.startswith("10."):
-            risk_adjustment += 10
-            reasons.append("Private network IP (10.x.x.x)")
-        
-        # 172.16.0.0 - 172.31.255.255
-        if ip_address.startswith("172."):
-            parts = ip_address.split(".")
-            if len(parts) >= 2 and parts[1].isdigit():
-                second_octet = int(parts[1])
-                if 16 <= second_octet <= 31:
-                    risk_adjustment += 10
-                    reasons.append("Private network IP (172.16-31.x.x)")
-        
-        # 192.168.0.0 - 192.168.255.255
-        if ip_address.startswith("192.168."):
-            risk_adjustment += 10
-            reasons.append("Private network IP (192.168.x.x)")
-        
-        reason = "; ".join(reasons) if reasons else ""
-        
-        return {"risk_adjustment": risk_adjustment, "reason": reason}
+
+        listed = blocklist.lookup(*parsed)
+        if listed is not None:
+            adjustment, reason, list_name = listed
+            result["risk_adjustment"] += adjustment
+            result["blocklist"] = list_name or None
+            reasons.append(reason)
+
+        network = asn_index.lookup(*parsed)
+        if network is not None:
+            asn, country, description = network
+            result.update(asn=asn, as_org=description, country=country)
+            if asn in self.flagged_asns:
+                result["risk_adjustment"] += self.flagged_asn_score
+                reasons.append(f"Traffic from flagged network AS{asn} ({description})")
+
+        result["reason"] = "; ".join(reasons)
+        return result
+
+    def get_statistics(self) -> Dict:
+        """Get list directories and details of the last load."""
+        return {
+            "blocklist_dir": self.blocklist_dir,
+            "asn_file": self.asn_file,
+            "flagged_asns": sorted(self.flagged_asns),
+            "last_load": self.last_load
+        }
@@ -0,0 +1,173 @@
+"""
+IP Range Index
+Sorted, disjoint integer intervals per address family searched with
+bisect, so matching an address against millions of CIDR blocks or ASN
+ranges costs O(log n). Overlapping input ranges are split into disjoint
+segments when the index is built; each segment keeps the best range
+covering it.
+"""
+
+import heapq
+import socket
+from array import array
+from bisect import bisect_right
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+
+_IPV4_MAPPED_PREFIX = b"\x00" * 10 + b"\xff\xff"
+
+
+def parse_address(text: str) -> Optional[Tuple[int, int]]:
+    """
+    Parse an IP address into (version, integer).
+
+    IPv4-mapped IPv6 addresses (::ffff:10.0.0.1) are treated as IPv4.
+
+    Returns:
+        (4 or 6, address as int), or None if the text is not an IP address
+    """
+    text = text.strip()
+    try:
+        if ":" not in text:
+            return 4, int.from_bytes(socket.inet_pton(socket.AF_INET, text), "big")
+        packed = socket.inet_pton(socket.AF_INET6, text.split("%", 1)[0])
+    except (OSError, ValueError):
+        return None
+    if packed.startswith(_IPV4_MAPPED_PREFIX):
+        return 4, int.from_bytes(packed[12:], "big")
+    return 6, int.from_bytes(packed, "big")
+
+
+def parse_range(text: str) -> Tuple[int, int, int]:
+    """
+    Parse an address range.
+
+    Supported forms: "10.0.0.0/8", "2001:db8::/32", "1.2.3.4" and
+    "1.2.3.4-1.2.3.9" (inclusive). Host bits of a CIDR are ignored.
+
+    Returns:
+        (version, first address, last address) as integers
+
+    Raises:
+        ValueError: If the range is malformed
+    """
+    text = text.strip()
+    if "-" in text:
+        first_text, last_text = text.split("-", 1)
+        first, last = parse_address(first_text), parse_address(last_text)
+        if first is None or last is None or first[0] != last[0] or first[1] > last[1]:
+            raise ValueError(f"Invalid address range: {text}")
+        return first[0], first[1], last[1]
+
+    address_text, slash, prefix_text = text.partition("/")
+    address = parse_address(address_text)
+    if address is None or (slash and not prefix_text.isdigit()):
+        raise ValueError(f"Invalid address: {text}")
+    version, value = address
+    # IPv4-mapped addresses keep their IPv6 prefix length
+    bits = 32 if version == 4 and ":" not in address_text else 128
+    prefix = int(prefix_text) if slash else bits
+    if prefix > bits:
+        raise ValueError(f"Invalid prefix length: {text}")
+    if version == 4 and bits == 128:
+        prefix = max(prefix - 96, 0)
+        bits = 32
+    host_mask = (1 << (bits - prefix)) - 1
+    return version, value & ~host_mask, value | host_mask
+
+
+class IPRangeIndex:
+    """
+    Disjoint address intervals mapped to payloads.
+
+    IPv4 bounds are kept in compact unsigned 32-bit arrays; IPv6 bounds
+    (128-bit) in lists of ints. Equal payloads are stored once.
+    """
+
+    def __init__(self):
+        self._starts: Dict[int, Any] = {4: array("I"), 6: []}
+        self._ends: Dict[int, Any] = {4: array("I"), 6: []}
+        self._values: Dict[int, array] = {4: array("i"), 6: array("i")}
+        self.payloads: List[Hashable] = []
+        self.range_count = 0
+
+    @classmethod
+    def build(
+        cls,
+        ranges: Iterable[Tuple[int, int, int, Hashable]],
+        priority: Optional[Callable[[Hashable], float]] = None
+    ) -> "IPRangeIndex":
+        """
+        Build an index from possibly overlapping ranges.
+
+        Where ranges overlap, the payload with the highest priority wins;
+        ties go to the narrower range.
+
+        Args:
+            ranges: (version, first, last, payload) tuples
+            priority: Priority of a payload (default: all equal)
+
+        Returns:
+            New IPRangeIndex
+        """
+        index = cls()
+        payload_ids: Dict[Hashable, int] = {}
+        by_version: Dict[int, list] = {4: [], 6: []}
+        for version, first, last, payload in ranges:
+            payload_id = payload_ids.get(payload)
+            if payload_id is None:
+                payload_id = payload_ids[payload] = len(index.payloads)
+                index.payloads.append(payload)
+            rank = -priority(payload) if priority is not None else 0
+            by_version[version].append((first, last, rank, payload_id))
+            index.range_count += 1
+
+        for version, version_ranges in by_version.items():
+            index._add_segments(version, version_ranges)
+        return index
+
+    def _add_segments(self, version: int, ranges: list):
+        """Sweep ranges in address order, emitting disjoint segments of the best active range."""
+        starts, ends, values = self._starts[version], self._ends[version], self._values[version]
+        ranges.sort()
+        # Active ranges ordered by (rank, width); expired ones are dropped lazily
+        active = []
+        i, n = 0, len(ranges)
+        position = ranges[0][0] if ranges else 0
+        while i < n or active:
+            if not active:
+                position = max(position, ranges[i][0])
+            while i < n and ranges[i][0] <= position:
+                first, last, rank, payload_id = ranges[i]
+                heapq.heappush(active, (rank, last - first, last, payload_id))
+                i += 1
+            while active and active[0][2] < position:
+                heapq.heappop(active)
+            if not active:
+                continue
+            _, _, last, payload_id = active[0]
+            # The best range may change where the next range starts
+            end = min(last, ranges[i][0] - 1) if i < n else last
+            if values and values[-1] == payload_id and ends[-1] + 1 == position:
+                ends[-1] = end
+            else:
+                starts.append(position)
+                ends.append(end)
+                values.append(payload_id)
+            position = end + 1
+
+    def lookup(self, version: int, address: int) -> Optional[Hashable]:
+        """Get the payload of the segment containing an address, if any."""
+        starts = self._starts[version]
+        position = bisect_right(starts, address) - 1
+        if position >= 0 and address <= self._ends[version][position]:
+            return self.payloads[self._values[version][position]]
+        return None
+
+    def __len__(self) -> int:
+        return len(self._values[4]) + len(self._values[6])
+
+    def memory_bytes(self) -> int:
+        """Approximate bytes held by the interval bounds and segment values."""
+        # IPv6 bounds: a list slot plus a 128-bit int object each
+        return len(self._values[4]) * 12 + len(self._values[6]) * (4 + 2 * 44)
@@ -1,12 +1,14 @@
-from fastapi import FastAPI, Request, Depends, WebSocket, WebSocketDisconnect, BackgroundTasks, HTTPException, status
+from fastapi import FastAPI, Request, Response, Depends, WebSocket, WebSocketDisconnect, HTTPException, status
 from fastapi.templating import Jinja2Templates
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, FileResponse, JSONResponse, StreamingResponse
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 from models import FraudRequest, FraudResponse
 from detection_engine import ScamDetectionEngine
 from risk_scorer import RiskScorer
 from explainable_ai import ExplainableAI
+from rule_engine import rule_engine
 from phone_analyzer import PhoneAnalyzer
 from ml_model import MLModel
 from ip_analyzer import IPAnalyzer
@@ -15,23 +17,86 @@ from rate_limiter import RateLimiter
 from logger import FraudLogger
 from history_store import HistoryStore
 from datetime import datetime, timedelta
-from database import get_db, init_db
-from db_models import FraudLog, Blacklist, User
+from database import get_db, init_db, SessionLocal, engine
+from db_models import FraudLog, Blacklist, ApiKey
 from security import verify_api_key, verify_admin_key
+from api_keys import api_key_registry
 from alert_service import AlertService
 from config import config
 from graph_service import fraud_graph
+from graph_snapshot import graph_snapshots
+from graph_communities import community_detector, summarize_components
+from graph_pagerank import pagerank_scorer
+from graph_store import graph_store
+from graph_retention import graph_retention
+from campaign_index import CampaignIndex
+from entity_extractor import entity_extractor, ENTITY_DOMAIN
+from domain_reputation import domain_reputation
+from blacklist_index import parse_pattern, MATCH_EXACT, MATCH_PREFIX, MATCH_RANGE
+from phone_normalizer import normalize_phone
+from instrumentation import StageTimer
+from metrics import registry as metrics_registry, CONTENT_TYPE_LATEST
+from runtime_metrics import register_runtime_metrics
+from profiler import sampling_profiler, RequestProfilerMiddleware
+from admission import admission_controller, AdmissionMiddleware, ADMIT_FULL, ADMIT_FAST
+from enrichment import enrichment_queue, alert_queue
+from startup import startup_tracker, import_time_breakdown, format_breakdown
 from auth import (
-    UserRegister, UserLogin, Token,
-    authenticate_user, create_user, create_access_token,
+    UserRegister, UserLogin, Token, UserPrincipal,
+    authenticate_user_async, create_user_async, create_access_token,
     get_user_by_username, get_user_by_email,
-    get_current_user, get_current_admin_user
+    get_current_user, get_current_admin_user, notify_user_changed,
+    auth_cache, password_pool
 )
+from contextlib import asynccontextmanager
 from typing import List
+import asyncio
+import hashlib
 import json
 import os
 
-app = FastAPI(title="Cyber Fraud Detection System")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Initialise heavy components without delaying liveness.
+    
+    Tables are created and the knowledge graph is restored before serving;
+    the blacklist index, tenant API keys, IP intelligence lists, the
+    published rule set and the ML model load in parallel background
+    threads and /ready reports when they finish.
+    """
+    await asyncio.to_thread(startup_tracker.run, "database", init_db)
+    if graph_store is not None:
+        # Must finish before requests start mutating the graph
+        await asyncio.to_thread(startup_tracker.run, "graph", graph_store.load, fraud_graph)
+        graph_store.start()
+    startup_tracker.run_in_background("blacklist", _load_blacklist)
+    startup_tracker.run_in_background("api_keys", _load_api_keys)
+    startup_tracker.run_in_background("ip_intel", _load_ip_intel)
+    startup_tracker.run_in_background("rules", _load_rules)
+    startup_tracker.run_in_background("ml_model", ml_model.load)
+    if config.STARTUP_IMPORT_REPORT:
+        startup_tracker.run_in_background("import_report", _report_import_times, required=False)
+    graph_snapshots.start()
+    graph_retention.start()
+    enrichment_queue.start()
+    alert_queue.start()
+    yield
+    # Drain queued enrichment before the graph store and database go away
+    await asyncio.to_thread(enrichment_queue.stop)
+    await asyncio.to_thread(alert_queue.stop)
+    api_key_registry.close()
+    ip_analyzer.stop()
+    rule_engine.stop()
+    blacklist_checker.stop()
+    graph_retention.stop()
+    graph_snapshots.stop()
+    if graph_store is not None:
+        graph_store.close()
+
+
+app = FastAPI(title="Cyber Fraud Detection System", lifespan=lifespan)
 
 # Configure CORS for frontend - Allow both local and production origins
 allowed_origins = [
@@ -55,20 +120,190 @@ app.add_middleware(
     expose_headers=["*"],
 )
 
+# cProfile capture of individually armed requests (see /admin/profile)
+app.add_middleware(RequestProfilerMiddleware, profiler=sampling_profiler)
+
+# Cap concurrent /analyze requests; shed the overflow to fast mode or 503
+app.add_middleware(AdmissionMiddleware, controller=admission_controller)
+
 # Configure Jinja2 templates
 templates = Jinja2Templates(directory="templates")
 
-# Initialize database and create tables on startup
-init_db()
-
-# Initialize all components once at startup
-ml_model = MLModel()
-ip_analyzer = IPAnalyzer()
-blacklist_checker = BlacklistChecker()
+# Initialize all components once at startup (heavy loading happens in lifespan)
+ml_model = MLModel(lazy=True)
+ip_analyzer = IPAnalyzer(
+    blocklist_dir=config.IP_BLOCKLIST_DIR,
+    asn_file=config.IP_ASN_FILE,
+    blocklist_score=config.IP_BLOCKLIST_SCORE,
+    flagged_asns=config.IP_FLAGGED_ASNS,
+    flagged_asn_score=config.IP_FLAGGED_ASN_SCORE,
+    reload_interval=config.IP_INTEL_RELOAD_SECONDS
+)
+blacklist_checker = BlacklistChecker(refresh_interval=config.BLACKLIST_REFRESH_SECONDS)
 rate_limiter = RateLimiter()
 fraud_logger = FraudLogger()
 history_store = HistoryStore()
 alert_service = AlertService()
+campaign_index = CampaignIndex(
+    num_perm=config.CAMPAIGN_NUM_PERM,
+    bands=config.CAMPAIGN_BANDS,
+    threshold=config.CAMPAIGN_SIMILARITY_THRESHOLD,
+    max_entries=config.CAMPAIGN_MAX_ENTRIES,
+    ttl_seconds=config.CAMPAIGN_TTL_SECONDS,
+    max_candidates=config.CAMPAIGN_MAX_CANDIDATES,
+    max_matches=config.CAMPAIGN_MAX_MATCHES
+)
+
+# Import-time breakdown of this module, filled in when STARTUP_IMPORT_REPORT is on
+import_report = None
+
+
+def _load_blacklist():
+    """Load blacklisted numbers, prefixes and ranges, then refresh them in the background."""
+    blacklist_checker.reload()
+    blacklist_checker.start()
+
+
+def _load_api_keys():
+    """Load active tenant API keys into memory, then start usage flushing."""
+    api_key_registry.load()
+    api_key_registry.start()
+
+
+def _load_ip_intel():
+    """Load IP blocklists and ASN ranges, then watch the files for changes."""
+    ip_analyzer.load()
+    ip_analyzer.start()
+
+
+def _load_rules():
+    """Compile the published rule set, then watch the rule store for new versions."""
+    print(f"Rule set loaded: {rule_engine.load()}")
+    rule_engine.start()
+
+
+def _report_import_times():
+    """Measure this module's import time in a child interpreter and log it."""
+    global import_report
+    import_report = import_time_breakdown("main")
+    print(format_breakdown(import_report))
+
+
+def _enrich_analysis(result: dict, loop: asyncio.AbstractEventLoop):
+    """
+    Record an /analyze result (runs on an enrichment worker).
+    
+    Logs it to the database, blacklists Critical senders, pushes
+    dashboard stats and links the sender, its identifiers and its
+    campaign in the knowledge graph.
+    """
+    phone = result["phone"]
+    final_score = result["risk_score"]
+    db = SessionLocal()
+    try:
+        # Step 7: Save to database
+        db.add(FraudLog(
+            phone_number=phone,
+            risk_score=final_score,
+            risk_level=result["risk_level"],
+            threat_category=result["threat_category"],
+            confidence=result["confidence"],
+            timestamp=result["timestamp"]
+        ))
+        db.commit()
+        
+        # Step 8: Add to blacklist if Critical
+        _auto_blacklist(db, result, loop)
+        
+        # Step 9: Broadcast to WebSocket clients
+        if manager.active_connections:
+            asyncio.run_coroutine_threadsafe(manager.broadcast(_dashboard_update(db)), loop)
+    finally:
+        db.close()
+    
+    # Step 10: Add to knowledge graph
+    if phone:
+        # Add phone number to graph
+        fraud_graph.add_entity("phone", phone, final_score)
+    
+        # If high risk, propagate risk to connected entities (the PageRank
+        # model does this in the background from the graph snapshot instead)
+        if final_score > 70 and config.GRAPH_RISK_MODEL == "propagation":
+            fraud_graph.propagate_risk(phone, decay_factor=0.7)
+    
+        # Create relationships based on patterns
+        for threat in result["threat_matches"]:
+            fraud_graph.add_relationship(phone, f"pattern:{threat}", "exhibits_pattern", 0.8)
+    
+        # Link senders of near-duplicate messages through one node per campaign,
+        # so a campaign of N messages adds O(N) edges rather than one per pair
+        if result["campaign_matches"]:
+            campaign_node = f"campaign:{result['campaign_id']}"
+            fraud_graph.add_entity("campaign", campaign_node, final_score)
+            fraud_graph.add_relationship(phone, campaign_node, "same_campaign", result["campaign_matches"][0]["similarity"])
+            for match in result["campaign_matches"]:
+                if match["phone_number"] and match["phone_number"] != phone:
+                    fraud_graph.add_relationship(match["phone_number"], campaign_node, "same_campaign", match["similarity"])
+    
+    # Link extracted identifiers to the sender and the client IP, so senders
+    # sharing a wallet, handle or domain end up connected
+    if result["extracted_entities"]:
+        client_ip = result["client_ip"]
+        ip_node = f"ip:{client_ip}" if client_ip else None
+        if ip_node:
+            fraud_graph.add_entity("ip", ip_node, final_score)
+        for entity in result["extracted_entities"]:
+            entity_node = f"{entity['type']}:{entity['value']}"
+            fraud_graph.add_entity(entity["type"], entity_node, final_score)
+            if phone:
+                fraud_graph.add_relationship(phone, entity_node, "mentions", 0.9)
+            if ip_node:
+                fraud_graph.add_relationship(ip_node, entity_node, "seen_from_ip", 0.5)
+
+
+
+def _auto_blacklist(db: Session, result: dict, loop: asyncio.AbstractEventLoop):
+    """
+    Blacklist the sender of a Critical result.
+    
+    Stores the canonical digits as an exact entry, so a client-supplied
+    value such as "9*" can never become a prefix or range. Jobs for one
+    number never run concurrently, so the existence check cannot race.
+    """
+    number = normalize_phone(result["phone"]) if result["risk_level"] == "Critical" else ""
+    if not number:
+        return
+    existing = db.query(Blacklist).filter(Blacklist.phone_number == number).first()
+    if not existing:
+        reason = f"Automatically blacklisted due to Critical risk: {result['primary_reason']}"
+        db.add(Blacklist(phone_number=number, reason=reason, match_type=MATCH_EXACT, added_at=datetime.now()))
+        db.commit()
+        # The index is read lock-free on the event loop, so mutate it there
+        loop.call_soon_threadsafe(_add_blacklist_entry, number, reason)
+
+
+def _blacklist_critical(result: dict, loop: asyncio.AbstractEventLoop):
+    """Blacklist a Critical sender in fast mode, which skips the rest of the enrichment."""
+    db = SessionLocal()
+    try:
+        _auto_blacklist(db, result, loop)
+    finally:
+        db.close()
+
+
+def _send_alert(result: dict):
+    """Send a Critical-risk alert (runs on the alert workers, since SMTP and webhooks are slow)."""
+    alert_service.send_alert(
+        phone_number=result["phone"],
+        risk_score=result["risk_score"],
+        risk_level=result["risk_level"],
+        threat_category=result["threat_category"],
+        primary_reason=result["primary_reason"]
+    )
+
+
+def _add_blacklist_entry(number: str, reason: str):
+    blacklist_checker.add_entry(number, reason, MATCH_EXACT)
 
 # WebSocket connection manager
 class ConnectionManager:
@@ -91,6 +326,41 @@ class ConnectionManager:
 
 manager = ConnectionManager()
 
+# Expose component sizes and pool state on /metrics (computed at scrape time)
+register_runtime_metrics(
+    rate_limiter=rate_limiter,
+    history_store=history_store,
+    graph=fraud_graph,
+    graph_snapshots=graph_snapshots,
+    connection_manager=manager,
+    engine=engine,
+    ml_model=ml_model,
+    campaign_index=campaign_index,
+    auth_cache=auth_cache,
+    blacklist_checker=blacklist_checker,
+    password_pool=password_pool,
+    api_key_registry=api_key_registry,
+    admission_controller=admission_controller,
+    enrichment_queue=enrichment_queue,
+    alert_queue=alert_queue,
+    rule_engine=rule_engine
+)
+
+@app.get("/health")
+async def health():
+    """Liveness probe - the process is up and serving requests."""
+    return {"status": "alive"}
+
+
+@app.get("/ready")
+async def ready(response: Response):
+    """Readiness probe - 503 until database, blacklist and ML model are loaded."""
+    startup_status = startup_tracker.get_status()
+    if not startup_status["ready"]:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return startup_status
+
+
 @app.get("/")
 async def root():
     """Welcome endpoint - No authentication required."""
@@ -132,7 +402,7 @@ async def register(user_data: UserRegister, db: Session = Depends(get_db)):
             )
         
         # Create new user (password validation handled by Pydantic)
-        user = create_user(
+        user = await create_user_async(
             db=db,
             username=user_data.username,
             email=user_data.email,
@@ -162,7 +432,7 @@ async def register(user_data: UserRegister, db: Session = Depends(get_db)):
 async def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
     """Login with username or email and receive JWT token."""
     # Authenticate user (accepts username or email)
-    user = authenticate_user(db, user_credentials.username, user_credentials.password)
+    user = await authenticate_user_async(db, user_credentials.username, user_credentials.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -186,11 +456,24 @@ async def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
 async def analyze_message(
     fraud_request: FraudRequest, 
     request: Request, 
-    background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db),
+    response: Response,
     api_key: str = Depends(verify_api_key)
 ):
-    """Analyze a message for potential fraud indicators."""
+    """
+    Analyze a message for potential fraud indicators.
+    
+    Send "X-Debug-Timings: 1" to receive per-stage durations in a
+    Server-Timing response header. The response is returned as soon as
+    the message is scored; logging, blacklisting, alerts and graph updates
+    follow on the enrichment workers. Under overload, admission control
+    may run the analysis in "fast" mode: rules only, without the ML model,
+    campaign clustering, database log or graph updates (analysis_mode in
+    the response); Critical results are still blacklisted and alerted.
+    Until the ML model has loaded, full analysis scores on rules alone
+    and reports analysis_mode "rules_only".
+    """
+    timer = StageTimer()
+    
     # Use message_content for analysis, default to empty string if not provided
     message = fraud_request.message_content or ""
     phone = fraud_request.phone_number or ""
@@ -198,25 +481,55 @@ async def analyze_message(
     # Get client IP address
     client_ip = request.client.host if request.client else None
     
+    # Admission control sheds overload by scoring on rules only ("fast" mode)
+    fast_mode = getattr(request.state, "analysis_mode", ADMIT_FULL) == ADMIT_FAST
+    analysis_mode = "fast" if fast_mode else "full"
+    
+    # One rule set for the whole request: keywords, points, bands and explanations
+    rules = rule_engine.rules
+    
     # Step 1: Instantiate and detect fraud indicators
-    detection_engine = ScamDetectionEngine()
+    detection_engine = ScamDetectionEngine(rules)
     detection_results = detection_engine.analyze(message)
+    timer.mark("detection")
     
     # Step 1.5: Analyze phone number for suspicious patterns
     phone_analyzer = PhoneAnalyzer()
     phone_analysis = phone_analyzer.analyze(phone)
+    timer.mark("phone_analysis")
+    
+    # Step 1.6: Find near-duplicate messages from the same campaign
+    if fast_mode:
+        campaign_result = {"cluster_id": None, "cluster_size": 0, "matches": []}
+    else:
+        campaign_result = campaign_index.add(message, phone)
+        timer.mark("campaign")
+    
+    # Step 1.7: Extract URLs/domains, emails, payment handles and wallets
+    extracted_entities = entity_extractor.extract(message)
+    timer.mark("entities")
     
     # Step 2: Instantiate and calculate rule-based risk score (including phone analysis)
-    risk_scorer = RiskScorer()
+    risk_scorer = RiskScorer(rules)
     risk_data = risk_scorer.calculate_score(detection_results, phone_analysis)
     rule_score = risk_data["score"]
     confidence = risk_data["confidence"]
+    timer.mark("rule_scoring")
     
-    # Step 2.5: Get ML-based probability
-    ml_probability = ml_model.predict_probability(message)
-    
-    # Step 2.6: Combine rule-based and ML-based scores
-    final_score = int((rule_score * 0.6) + (ml_probability * 40))
+    if fast_mode:
+        final_score = rule_score
+    elif not ml_model.is_loaded:
+        # The model is still loading in the background: score on rules alone
+        # instead of blending in a probability of 0, and mark the response
+        final_score = rule_score
+        analysis_mode = "rules_only"
+    else:
+        # Step 2.5: Get ML-based probability
+        ml_probability = ml_model.predict_probability(message)
+        timer.mark("ml")
+        
+        # Step 2.6: Combine rule-based and ML-based scores
+        final_score = int((rule_score * 0.6) + (ml_probability * 40))
     
     # Step 3: Apply additional risk adjustments
     additional_factors = []
@@ -226,40 +539,54 @@ async def analyze_message(
     final_score += ip_result["risk_adjustment"]
     if ip_result["reason"]:
         additional_factors.append(ip_result["reason"])
+    timer.mark("ip")
     
-    # Blacklist check
-    blacklist_result = blacklist_checker.check(phone, message)
+    # Blacklist check (exact numbers, prefixes and ranges)
+    blacklist_result = blacklist_checker.check(phone, message, rules)
     final_score += blacklist_result["risk_boost"]
     if blacklist_result["reason"]:
         additional_factors.append(blacklist_result["reason"])
+    timer.mark("blacklist")
+    
+    # Domain reputation - on-disk index lookup of each linked domain and its parents
+    domain_result = domain_reputation.check(
+        entity["value"] for entity in extracted_entities if entity["type"] == ENTITY_DOMAIN
+    )
+    final_score += domain_result["risk_boost"]
+    if domain_result["reason"]:
+        additional_factors.append(domain_result["reason"])
+    timer.mark("domain_reputation")
     
     # Rate limiting check
     rate_limit_result = rate_limiter.check(phone)
     final_score += rate_limit_result["risk_boost"]
     if rate_limit_result["reason"]:
         additional_factors.append(rate_limit_result["reason"])
+    timer.mark("rate_limit")
     
     # History check - add risk if previously flagged
     history_result = history_store.check_previous_risk(phone)
     final_score += history_result["risk_boost"]
     if history_result["reason"]:
         additional_factors.append(history_result["reason"])
+    timer.mark("history_check")
+    
+    # Graph risk - precomputed personalized PageRank score, O(1) lookup
+    graph_risk = pagerank_scorer.score(phone) if phone and config.GRAPH_RISK_MODEL == "pagerank" else 0
+    graph_risk_boost = int(round(graph_risk * config.PAGERANK_RISK_WEIGHT))
+    if graph_risk_boost > 0:
+        final_score += graph_risk_boost
+        additional_factors.append(f"Closely connected to confirmed fraud in the relationship graph (graph risk {graph_risk})")
+    timer.mark("graph_risk")
     
     # Cap final score at 100
     final_score = min(final_score, 100)
     
-    # Determine risk level based on final score
-    if final_score <= 30:
-        risk_level = "Low"
-    elif final_score <= 60:
-        risk_level = "Medium"
-    elif final_score <= 85:
-        risk_level = "High"
-    else:
-        risk_level = "Critical"
+    # Determine risk level from the rule table's bands
+    risk_level = rules.risk_level(final_score)
     
     # Step 4: Instantiate and generate explanation
-    explainable_ai = ExplainableAI()
+    explainable_ai = ExplainableAI(rules)
     explanation_data = explainable_ai.generate_explanation(final_score, detection_results, phone_analysis)
     
     # Add additional factors to contributing factors
@@ -267,9 +594,11 @@ async def analyze_message(
     
     # Create simple explanation text for backward compatibility
     explanation = f"{risk_level} risk. {explanation_data['primary_reason']}"
+    timer.mark("explanation")
     
     # Step 5: Log the result
     fraud_logger.log(phone, final_score, risk_level)
+    timer.mark("file_log")
     
     # Step 6: Store in history (in-memory)
     history_entry = {
@@ -282,58 +611,38 @@ async def analyze_message(
         "threat_category": explanation_data["threat_category"]
     }
     history_store.add(phone, history_entry)
+    timer.mark("history_store")
     
-    # Step 7: Save to database
-    fraud_log = FraudLog(
-        phone_number=phone,
-        risk_score=final_score,
-        risk_level=risk_level,
-        threat_category=explanation_data["threat_category"],
-        confidence=confidence,
-        timestamp=datetime.now()
-    )
-    db.add(fraud_log)
-    db.commit()
-    
-    # Step 8: Add to blacklist if Critical
-    if risk_level == "Critical" and phone:
-        # Check if already blacklisted
-        existing = db.query(Blacklist).filter(Blacklist.phone_number == phone).first()
-        if not existing:
-            blacklist_entry = Blacklist(
-                phone_number=phone,
-                reason=f"Automatically blacklisted due to Critical risk: {explanation_data['primary_reason']}",
-                added_at=datetime.now()
-            )
-            db.add(blacklist_entry)
-            db.commit()
-            
-        # Send alerts in background
-        background_tasks.add_task(
-            alert_service.send_alert,
-            phone_number=phone,
-            risk_score=final_score,
-            risk_level=risk_level,
-            threat_category=explanation_data["threat_category"],
-            primary_reason=explanation_data["primary_reason"]
-        )
-    
-    # Step 9: Broadcast to WebSocket clients
-    background_tasks.add_task(broadcast_update, db)
+    # Steps 7-10 (database log, blacklist upsert, dashboard broadcast and graph
+    # updates) run after the response on the enrichment workers, in order per
+    # phone number; fast mode only keeps the blacklist upsert for Critical
+    # results. Alerts go to their own workers
+    result = {
+        "phone": phone,
+        "client_ip": client_ip,
+        "risk_score": final_score,
+        "risk_level": risk_level,
+        "threat_category": explanation_data["threat_category"],
+        "primary_reason": explanation_data["primary_reason"],
+        "confidence": confidence,
+        "timestamp": datetime.now(),
+        "threat_matches": detection_results.get("threat_matches") or [],
+        "campaign_id": campaign_result["cluster_id"],
+        "campaign_matches": campaign_result["matches"],
+        "extracted_entities": extracted_entities
+    }
+    if not fast_mode:
+        enrichment_queue.submit(phone, _enrich_analysis, result, asyncio.get_running_loop())
+    elif risk_level == "Critical":
+        enrichment_queue.submit(phone, _blacklist_critical, result, asyncio.get_running_loop())
+    if risk_level == "Critical":
+        alert_queue.submit(phone, _send_alert, result)
+    timer.mark("enqueue")
+    timer.publish()
     
-    # Step 10: Add to knowledge graph
-    if phone:
-        # Add phone number to graph
-        fraud_graph.add_entity("phone", phone, final_score)
-        
-        # If high risk, propagate risk to connected entities
-        if final_score > 70:
-            fraud_graph.propagate_risk(phone, decay_factor=0.7)
-        
-        # Create relationships based on patterns
-        if detection_results.get("threat_matches"):
-            for threat in detection_results["threat_matches"]:
-                fraud_graph.add_relationship(phone, f"pattern:{threat}", "exhibits_pattern", 0.8)
+    if config.DEBUG_TIMINGS or request.headers.get("X-Debug-Timings"):
+        response.headers["Server-Timing"] = timer.to_server_timing()
+    response.headers["X-Analysis-Mode"] = analysis_mode
     
     return FraudResponse(
         risk_score=final_score,
@@ -343,7 +652,14 @@ async def analyze_message(
         primary_reason=explanation_data["primary_reason"],
         contributing_factors=all_contributing_factors,
         recommendation=explanation_data["recommendation"],
-        threat_category=explanation_data["threat_category"]
+        threat_category=explanation_data["threat_category"],
+        campaign_id=campaign_result["cluster_id"],
+        campaign_size=campaign_result["cluster_size"],
+        graph_risk=graph_risk,
+        extracted_entities=extracted_entities,
+        domain_reputation=domain_result["matches"],
+        analysis_mode=analysis_mode,
+        rule_version=rules.version
     )
 
 @app.get("/")
@@ -359,7 +675,7 @@ async def root():
 async def admin_dashboard(
     request: Request, 
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_admin_user)
+    current_user: UserPrincipal = Depends(get_current_admin_user)
 ):
     """Admin dashboard with statistics and visualizations - Admin only."""
     # Query statistics
@@ -414,7 +730,7 @@ async def admin_dashboard(
 @app.get("/history")
 async def get_all_history(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: UserPrincipal = Depends(get_current_user)
 ):
     """Get all fraud analysis history from database - Authenticated users."""
     logs = db.query(FraudLog).order_by(FraudLog.timestamp.desc()).all()
@@ -439,7 +755,7 @@ async def get_all_history(
 async def get_history(
     phone_number: str, 
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: UserPrincipal = Depends(get_current_user)
 ):
     """Get fraud analysis history for a phone number from database - Authenticated users."""
     logs = db.query(FraudLog).filter(FraudLog.phone_number == phone_number).order_by(FraudLog.timestamp.desc()).all()
@@ -473,7 +789,7 @@ async def get_history(
 @app.get("/stats")
 async def get_stats(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: UserPrincipal = Depends(get_current_user)
 ):
     """Get fraud detection statistics - Authenticated users."""
     total_requests = db.query(FraudLog).count()
@@ -493,17 +809,25 @@ async def get_stats(
     }
 
 @app.get("/config")
-async def get_config(current_user: User = Depends(get_current_admin_user)):
+async def get_config(current_user: UserPrincipal = Depends(get_current_admin_user)):
     """Get configuration summary - Admin only (no sensitive data)."""
     return {
         "status": "Configuration loaded successfully",
         "config": config.get_config_summary()
     }
 
+def _blacklist_match_type(entry: Blacklist) -> str:
+    """Get the match type of a stored blacklist row."""
+    try:
+        return parse_pattern(entry.phone_number, entry.match_type)[0]
+    except ValueError:
+        return entry.match_type or MATCH_EXACT
+
+
 @app.get("/blacklist")
 async def get_blacklist(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_admin_user)
+    current_user: UserPrincipal = Depends(get_current_admin_user)
 ):
     """Get all blacklisted phone numbers - Admin only."""
     blacklisted = db.query(Blacklist).order_by(Blacklist.added_at.desc()).all()
@@ -512,6 +836,7 @@ async def get_blacklist(
         {
             "id": entry.id,
             "phone_number": entry.phone_number,
+            "match_type": _blacklist_match_type(entry),
             "reason": entry.reason,
             "added_at": entry.added_at.strftime("%Y-%m-%d %H:%M:%S")
         }
@@ -528,11 +853,19 @@ async def get_blacklist(
 async def add_to_blacklist(
     blacklist_data: dict,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_admin_user)
+    current_user: UserPrincipal = Depends(get_current_admin_user)
 ):
-    """Add a phone number to blacklist - Admin only."""
+    """
+    Add a phone number, prefix or range to blacklist - Admin only.
+    
+    Accepts an optional match_type: "exact" (default), "prefix"
+    (e.g. "+1555012" or "+1555012*", the default for patterns ending in '*')
+    or "range" (e.g. "15550120-15550129"). Ranges must be given explicitly,
+    so a number written with a dash is never read as a range.
+    """
     phone_number = blacklist_data.get("phone_number")
     reason = blacklist_data.get("reason")
+    match_type = blacklist_data.get("match_type")
     
     if not phone_number or not reason:
         raise HTTPException(
@@ -540,6 +873,26 @@ async def add_to_blacklist(
             detail="Phone number and reason are required"
         )
     
+    if match_type not in (None, MATCH_EXACT, MATCH_PREFIX, MATCH_RANGE):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="match_type must be one of: exact, prefix, range"
+        )
+    
+    phone_number = phone_number.strip()
+    if match_type is None:
+        match_type = MATCH_PREFIX if phone_number.endswith("*") else MATCH_EXACT
+    if match_type == MATCH_PREFIX and not phone_number.endswith("*"):
+        phone_number += "*"
+    
+    try:
+        parse_pattern(phone_number, match_type)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
     # Check if already blacklisted
     existing = db.query(Blacklist).filter(Blacklist.phone_number == phone_number).first()
     if existing:
@@ -552,16 +905,19 @@ async def add_to_blacklist(
     blacklist_entry = Blacklist(
         phone_number=phone_number,
         reason=reason,
+        match_type=match_type,
         added_at=datetime.now()
     )
     db.add(blacklist_entry)
     db.commit()
     db.refresh(blacklist_entry)
+    blacklist_checker.add_entry(blacklist_entry.phone_number, reason, match_type)
     
     return {
         "message": "Phone number added to blacklist",
         "id": blacklist_entry.id,
-        "phone_number": blacklist_entry.phone_number
+        "phone_number": blacklist_entry.phone_number,
+        "match_type": match_type
     }
 
 
@@ -569,7 +925,7 @@ async def add_to_blacklist(
 async def remove_from_blacklist(
     blacklist_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_admin_user)
+    current_user: UserPrincipal = Depends(get_current_admin_user)
 ):
     """Remove a phone number from blacklist - Admin only."""
     blacklist_entry = db.query(Blacklist).filter(Blacklist.id == blacklist_id).first()
@@ -581,8 +937,10 @@ async def remove_from_blacklist(
         )
     
     phone_number = blacklist_entry.phone_number
+    match_type = blacklist_entry.match_type
     db.delete(blacklist_entry)
     db.commit()
+    blacklist_checker.remove_entry(phone_number, match_type)
     
     return {
         "message": "Phone number removed from blacklist",
@@ -590,6 +948,343 @@ async def remove_from_blacklist(
     }
 
 
+@app.put("/users/{username}/role")
+async def update_user_role(
+    username: str,
+    role_data: dict,
+    db: Session = Depends(get_db),
+    current_user: UserPrincipal = Depends(get_current_admin_user)
+):
+    """Change a user's role - Admin only."""
+    role = role_data.get("role")
+    if role not in ("user", "admin"):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Role must be 'user' or 'admin'"
+        )
+    
+    user = get_user_by_username(db, username)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    
+    user.role = role
+    db.commit()
+    notify_user_changed(username)
+    
+    return {
+        "message": "User role updated",
+        "username": username,
+        "role": role
+    }
+
+
+@app.delete("/users/{username}")
+async def delete_user(
+    username: str,
+    db: Session = Depends(get_db),
+    current_user: UserPrincipal = Depends(get_current_admin_user)
+):
+    """Delete a user account - Admin only."""
+    user = get_user_by_username(db, username)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    
+    db.delete(user)
+    db.commit()
+    notify_user_changed(username)
+    
+    return {
+        "message": "User deleted",
+        "username": username
+    }
+
+
+@app.get("/admin/startup")
+async def get_startup_diagnostics(
+    refresh: bool = False,
+    current_user: UserPrincipal = Depends(get_current_admin_user)
+):
+    """
+    Startup phases and the import-time breakdown of this module - Admin only.
+    
+    The breakdown is measured in a child interpreter with -X importtime;
+    pass refresh=true to measure it now.
+    """
+    global import_report
+    if refresh:
+        import_report = await asyncio.to_thread(import_time_breakdown, "main")
+    return {**startup_tracker.get_status(), "import_report": import_report}
+
+
+@app.post("/admin/graph/compact")
+async def compact_graph_store(current_user: UserPrincipal = Depends(get_current_admin_user)):
+    """Write a compacted knowledge graph snapshot now - Admin only."""
+    if graph_store is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Graph persistence is disabled (GRAPH_STORE_DIR is empty)"
+        )
+    result = await asyncio.to_thread(graph_store.compact)
+    return {"message": "Graph snapshot written", **result, "store": graph_store.get_statistics()}
+
+
+@app.post("/admin/graph/prune")
+async def prune_graph(current_user: UserPrincipal = Depends(get_current_admin_user)):
+    """Remove decayed and expired knowledge graph nodes and edges now - Admin only."""
+    result = await asyncio.to_thread(graph_retention.run_once)
+    return {"message": "Graph pruned", **result}
+
+
+@app.get("/admin/domain-reputation")
+async def get_domain_reputation(
+    domain: str = None,
+    current_user: UserPrincipal = Depends(get_current_admin_user)
+):
+    """Domain reputation index statistics, or the verdict for one domain - Admin only."""
+    if domain:
+        return {"domain": domain, "match": domain_reputation.lookup(domain)}
+    return domain_reputation.get_statistics()
+
+
+def _api_key_info(row: ApiKey) -> dict:
+    """Describe an API key row with its unflushed usage and current bucket level."""
+    entry = api_key_registry.cached(row.key_id) if row.active else None
+    return {
+        "id": row.id,
+        "key_id": row.key_id,
+        "tenant": row.tenant,
+        "name": row.name,
+        "role": row.role,
+        "rate_per_minute": row.rate_per_minute,
+        "burst": row.burst,
+        "active": row.active,
+        "usage_count": (row.usage_count or 0) + api_key_registry.pending_usage(row.id),
+        "tokens": round(entry.tokens, 2) if entry is not None else None,
+        "created_at": row.created_at.strftime("%Y-%m-%d %H:%M:%S") if row.created_at else None,
+        "last_used_at": row.last_used_at.strftime("%Y-%m-%d %H:%M:%S") if row.last_used_at else None
+    }
+
+
+@app.post("/admin/api-keys", status_code=status.HTTP_201_CREATED)
+async def create_api_key(
+    key_data: dict,
+    db: Session = Depends(get_db),
+    current_user: UserPrincipal = Depends(get_current_admin_user)
+):
+    """
+    Issue an API key for a tenant - Admin only.
+    
+    Accepts tenant (required), name, role ("public" or "admin"),
+    rate_per_minute (0 = unlimited) and burst. The key is only returned
+    in this response.
+    """
+    tenant = (key_data.get("tenant") or "").strip()
+    role = key_data.get("role", "public")
+    if not tenant:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="tenant is required")
+    if role not in ("public", "admin"):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="role must be 'public' or 'admin'")
+    try:
+        rate_per_minute = int(key_data.get("rate_per_minute", config.API_KEY_DEFAULT_RATE_PER_MINUTE))
+        burst = int(key_data.get("burst", config.API_KEY_DEFAULT_BURST))
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="rate_per_minute and burst must be integers")
+    if rate_per_minute < 0 or burst < 0:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="rate_per_minute and burst must not be negative")
+    
+    api_key, row = api_key_registry.create_key(
+        db, tenant, name=key_data.get("name", ""), role=role,
+        rate_per_minute=rate_per_minute, burst=burst
+    )
+    return {"message": "API key created; store it now, it cannot be shown again", "api_key": api_key, **_api_key_info(row)}
+
+
+@app.get("/admin/api-keys")
+async def list_api_keys(
+    tenant: str = None,
+    db: Session = Depends(get_db),
+    current_user: UserPrincipal = Depends(get_current_admin_user)
+):
+    """List tenant API keys with usage and quota state - Admin only."""
+    query = db.query(ApiKey)
+    if tenant:
+        query = query.filter(ApiKey.tenant == tenant)
+    return [_api_key_info(row) for row in query.order_by(ApiKey.created_at.desc()).all()]
+
+
+@app.delete("/admin/api-keys/{key_pk}")
+async def revoke_api_key(
+    key_pk: int,
+    db: Session = Depends(get_db),
+    current_user: UserPrincipal = Depends(get_current_admin_user)
+):
+    """Revoke a tenant API key - Admin only (other workers drop it on their next refresh)."""
+    row = api_key_registry.revoke_key(db, key_pk)
+    if row is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="API key not found")
+    return {"message": "API key revoked", **_api_key_info(row)}
+
+
+@app.get("/admin/ip-intel")
+async def get_ip_intel(
+    ip: str = None,
+    current_user: UserPrincipal = Depends(get_current_admin_user)
+):
+    """IP blocklist and ASN list statistics, or the verdict for one address - Admin only."""
+    if ip:
+        return {"ip": ip, **ip_analyzer.analyze(ip)}
+    return ip_analyzer.get_statistics()
+
+
+@app.post("/admin/ip-intel/reload")
+async def reload_ip_intel(current_user: UserPrincipal = Depends(get_current_admin_user)):
+    """Reload IP blocklists and ASN ranges from their files now - Admin only."""
+    result = await asyncio.to_thread(ip_analyzer.load)
+    return {"message": "IP intelligence lists reloaded", **result}
+
+
+@app.get("/admin/rules")
+async def get_rules(current_user: UserPrincipal = Depends(get_current_admin_user)):
+    """Active rule set, its table and the published versions - Admin only."""
+    history = await asyncio.to_thread(rule_engine.history)
+    return {**rule_engine.get_statistics(), "table": rule_engine.rules.table, "history": history}
+
+
+@app.post("/admin/rules", status_code=status.HTTP_201_CREATED)
+async def publish_rules(
+    rules_data: dict,
+    current_user: UserPrincipal = Depends(get_current_admin_user)
+):
+    """
+    Publish a rule table - Admin only.
+    
+    Accepts table (required, see rule_engine.py for the format) and an
+    optional version label. The table is compiled and validated before it
+    is stored; this worker switches at once, others within
+    RULE_RELOAD_SECONDS.
+    """
+    table = rules_data.get("table")
+    if not isinstance(table, dict):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="table must be a rule table object")
+    try:
+        rules = await asyncio.to_thread(
+            rule_engine.publish, table, rules_data.get("version"), current_user.username
+        )
+    except (ValueError, TypeError, KeyError, AttributeError) as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid rule table: {e}")
+    return {"message": "Rule set published", **rules.get_statistics()}
+
+
+@app.post("/admin/profile/start")
+async def start_profiling(
+    profile_data: dict,
+    current_user: UserPrincipal = Depends(get_current_admin_user)
+):
+    """
+    Sample every thread's stack in this worker for N seconds - Admin only.
+    
+    Writes collapsed stacks (flamegraph.pl / speedscope input) to the
+    profile output directory when the window ends.
+    """
+    duration = profile_data.get("duration", 30)
+    interval_ms = profile_data.get("interval_ms", 5)
+    
+    if not isinstance(duration, (int, float)) or not 1 <= duration <= 300:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="duration must be between 1 and 300 seconds"
+        )
+    if not isinstance(interval_ms, (int, float)) or not 1 <= interval_ms <= 1000:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="interval_ms must be between 1 and 1000"
+        )
+    
+    if not sampling_profiler.start(duration, interval_ms / 1000.0):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Profiler is already running"
+        )
+    
+    return {
+        "message": "Profiling started",
+        "duration": duration,
+        "interval_ms": interval_ms,
+        "worker_pid": os.getpid()
+    }
+
+
+@app.post("/admin/profile/stop")
+async def stop_profiling(current_user: UserPrincipal = Depends(get_current_admin_user)):
+    """End the current profiling window early - Admin only."""
+    sampling_profiler.stop()
+    return {"message": "Profiling stop requested"}
+
+
+@app.get("/admin/profile/status")
+async def get_profiling_status(current_user: UserPrincipal = Depends(get_current_admin_user)):
+    """Get profiler state and the last result - Admin only."""
+    return {**sampling_profiler.get_status(), "worker_pid": os.getpid()}
+
+
+@app.get("/admin/profile/latest")
+async def download_latest_profile(current_user: UserPrincipal = Depends(get_current_admin_user)):
+    """Download the last collapsed-stack profile - Admin only."""
+    result = sampling_profiler.last_result
+    if not result or not result.get("output_file") or not os.path.exists(result["output_file"]):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No profile available"
+        )
+    return FileResponse(result["output_file"], media_type="text/plain", filename=os.path.basename(result["output_file"]))
+
+
+@app.post("/admin/profile/request")
+async def arm_request_profile(
+    profile_data: dict,
+    current_user: UserPrincipal = Depends(get_current_admin_user)
+):
+    """
+    Capture a cProfile dump of the next request sent with the given
+    X-Request-ID header - Admin only.
+    """
+    request_id = profile_data.get("request_id")
+    if not request_id or not isinstance(request_id, str):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="request_id is required"
+        )
+    
+    sampling_profiler.arm_request(request_id)
+    return {
+        "message": "Request profiling armed",
+        "request_id": request_id,
+        "expires_in_seconds": sampling_profiler.arm_ttl_seconds,
+        "header": "X-Request-ID"
+    }
+
+
+@app.get("/admin/profile/request/{request_id}")
+async def download_request_profile(
+    request_id: str,
+    current_user: UserPrincipal = Depends(get_current_admin_user)
+):
+    """Download the cProfile dump (pstats format) of a request - Admin only."""
+    path = sampling_profiler.request_profile_path(request_id)
+    if not os.path.exists(path):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No profile captured for this request id"
+        )
+    return FileResponse(path, media_type="application/octet-stream", filename=os.path.basename(path))
+
+
 @app.websocket("/ws/dashboard")
 async def websocket_endpoint(websocket: WebSocket):
     """WebSocket endpoint for live dashboard updates."""
@@ -601,9 +1296,8 @@ async def websocket_endpoint(websocket: WebSocket):
     except WebSocketDisconnect:
         manager.disconnect(websocket)
 
-async def broadcast_update(db: Session):
-    """Broadcast updated stats to all connected WebSocket clients."""
-    # Get updated stats
+def _dashboard_update(db: Session) -> dict:
+    """Build the stats message pushed to dashboard WebSocket clients."""
     total_requests = db.query(FraudLog).count()
     critical_count = db.query(FraudLog).filter(FraudLog.risk_level == "Critical").count()
     high_count = db.query(FraudLog).filter(FraudLog.risk_level == "High").count()
@@ -623,8 +1317,7 @@ async def broadcast_update(db: Session):
             "timestamp": latest_log.timestamp.strftime("%Y-%m-%d %H:%M:%S")
         }
     
-    # Broadcast to all connected clients
-    await manager.broadcast({
+    return {
         "type": "update",
         "stats": {
             "total_requests": total_requests,
@@ -633,11 +1326,11 @@ async def broadcast_update(db: Session):
             "blacklisted_count": blacklisted_count
         },
         "latest_entry": latest_entry
-    })
+    }
 
 async def retrain_model(
     training_data: dict,
-    current_user: User = Depends(get_current_admin_user)
+    current_user: UserPrincipal = Depends(get_current_admin_user)
 ):
     """Retrain the ML model with new data - Admin only."""
     scam_messages = training_data.get("scam_messages", [])
@@ -662,17 +1355,118 @@ async def retrain_model(
     }
 
 
+def _etag_matches(request: Request, etag: str) -> bool:
+    """Whether an If-None-Match header covers the given ETag."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = [candidate.strip() for candidate in header.split(",")]
+    return "*" in candidates or any(candidate.removeprefix("W/") == etag for candidate in candidates)
+
+
 @app.get("/graph")
-async def get_graph(limit: int = 100):
-    """Get knowledge graph data for visualization - Public endpoint."""
-    graph_data = fraud_graph.get_graph_data_for_visualization(limit=limit)
-    graph_stats = fraud_graph.get_statistics()
+async def get_graph(request: Request, limit: int = 100):
+    """
+    Get knowledge graph data for visualization - Public endpoint.
     
-    return {
+    Responses carry an ETag derived from the graph, snapshot and analytics
+    versions; a request with a matching If-None-Match gets 304 Not Modified.
+    """
+    snapshot = graph_snapshots.get()
+    campaigns = campaign_index.get_statistics()
+    state = (
+        limit, fraud_graph.version, fraud_graph.generation, snapshot.version, snapshot.built_at,
+        campaigns, pagerank_scorer.last_run, graph_retention.last_run
+    )
+    etag = '"' + hashlib.blake2b(repr(state).encode(), digest_size=8).hexdigest() + '"'
+    # no-cache: clients may store the response but must revalidate it
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if _etag_matches(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    graph_data = fraud_graph.get_graph_data_for_visualization(limit=limit)
+    return JSONResponse({
         "nodes": graph_data["nodes"],
         "edges": graph_data["edges"],
-        "statistics": graph_stats
-    }
+        # Counts and degree distribution come from the analytics snapshot
+        "statistics": snapshot.get_statistics(),
+        "campaigns": campaigns,
+        "pagerank": pagerank_scorer.last_run,
+        "retention": graph_retention.last_run
+    }, headers=headers)
+
+@app.get("/graph/entity/{value}")
+async def get_entity_network(
+    value: str,
+    depth: int = 2,
+    relationship_types: str = "",
+    min_weight: float = 0.0,
+    limit: int = 100
+):
+    """
+    Ego network of an entity, streamed as newline-delimited JSON - Public endpoint.
+    
+    Nodes and edges are emitted in breadth-first order up to `depth` hops,
+    following only the comma-separated `relationship_types` (default: all)
+    with a decayed weight of at least `min_weight`. The walk stops once
+    `limit` nodes have been emitted; the final summary record reports
+    whether it was truncated.
+    """
+    if not 0 <= depth <= 5:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="depth must be between 0 and 5"
+        )
+    if not 1 <= limit <= 10000:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="limit must be between 1 and 10000"
+        )
+    if value not in fraud_graph.nodes:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Entity not found in the knowledge graph"
+        )
+    
+    records = fraud_graph.iter_ego_network(
+        value,
+        depth=depth,
+        relationship_types=[name.strip() for name in relationship_types.split(",") if name.strip()],
+        min_weight=min_weight,
+        max_nodes=limit
+    )
+    # Iterated in the threadpool, one record per line as it is found
+    return StreamingResponse((json.dumps(record) + "\n" for record in records), media_type="application/x-ndjson")
+
+
+@app.get("/graph/components")
+async def get_graph_components(limit: int = 20, min_size: int = 2, top_members: int = 5):
+    """
+    Connected groups of entities (candidate fraud rings) with the highest
+    total risk - Public endpoint.
+    """
+    # Labels and groups the whole graph with NumPy, so keep it off the event loop
+    return await asyncio.to_thread(
+        summarize_components, fraud_graph, limit=limit, min_size=min_size, top_members=top_members
+    )
+
+
+@app.get("/graph/communities")
+async def get_graph_communities(limit: int = 20, min_size: int = 2, top_members: int = 5):
+    """
+    Densely connected communities found by label propagation over the
+    graph snapshot - Public endpoint.
+    """
+    # Usually precomputed after each snapshot refresh; otherwise off the event loop
+    return await asyncio.to_thread(
+        community_detector.summarize, limit=limit, min_size=min_size, top_members=top_members
+    )
+
+
+@app.get("/metrics")
+async def get_metrics():
+    """Runtime metrics in Prometheus text format - Public endpoint."""
+    return PlainTextResponse(metrics_registry.render(), media_type=CONTENT_TYPE_LATEST)
 
 @app.get("/analytics/summary")
 async def get_analytics_summary(db: Session = Depends(get_db)):
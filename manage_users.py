@@ -4,7 +4,7 @@ Helps with viewing, creating, and deleting users.
 """
 from database import SessionLocal
 from db_models import User
-from auth import get_password_hash
+from auth import get_password_hash, notify_user_changed
 from datetime import datetime
 import sys
 
@@ -40,6 +40,7 @@ def delete_user_by_username(username):
         if user:
             db.delete(user)
             db.commit()
+            notify_user_changed(username)
             print(f"✓ User '{username}' deleted successfully.")
         else:
             print(f"✗ User '{username}' not found.")
@@ -56,6 +57,7 @@ def delete_user_by_email(email):
             username = user.username
             db.delete(user)
             db.commit()
+            notify_user_changed(username)
             print(f"✓ User with email '{email}' (username: {username}) deleted successfully.")
         else:
             print(f"✗ User with email '{email}' not found.")
@@ -95,6 +97,26 @@ def create_admin_user(username, email, password):
         db.close()
 
 
+def set_user_role(username, role):
+    """Change a user's role (user or admin)."""
+    if role not in ("user", "admin"):
+        print(f"✗ Invalid role '{role}'. Use 'user' or 'admin'.")
+        return
+    
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.username == username).first()
+        if user:
+            user.role = role
+            db.commit()
+            notify_user_changed(username)
+            print(f"✓ User '{username}' role set to '{role}'.")
+        else:
+            print(f"✗ User '{username}' not found.")
+    finally:
+        db.close()
+
+
 def clear_all_users():
     """Delete all users from the database (use with caution!)."""
     db = SessionLocal()
@@ -108,6 +130,7 @@ def clear_all_users():
         if confirm.lower() == 'yes':
             db.query(User).delete()
             db.commit()
+            notify_user_changed()
             print(f"✓ All {count} users deleted successfully.")
         else:
             print("Operation cancelled.")
@@ -125,12 +148,14 @@ def main():
         print("  python manage_users.py delete <username>             - Delete user by username")
         print("  python manage_users.py delete-email <email>          - Delete user by email")
         print("  python manage_users.py create-admin <user> <email> <pass> - Create admin user")
+        print("  python manage_users.py set-role <username> <role>   - Change user role")
         print("  python manage_users.py clear-all                     - Delete all users")
         print("\nExamples:")
         print("  python manage_users.py list")
         print("  python manage_users.py delete testuser")
         print("  python manage_users.py delete-email test@example.com")
         print("  python manage_users.py create-admin admin admin@example.com Admin@123")
+        print("  python manage_users.py set-role testuser admin")
         print("  python manage_users.py clear-all")
         print()
         return
@@ -161,6 +186,13 @@ def main():
         else:
             create_admin_user(sys.argv[2], sys.argv[3], sys.argv[4])
     
+    elif command == 'set-role':
+        if len(sys.argv) < 4:
+            print("✗ Please provide username and role.")
+            print("Usage: python manage_users.py set-role <username> <role>")
+        else:
+            set_user_role(sys.argv[2], sys.argv[3])
+    
     elif command == 'clear-all':
         clear_all_users()
     
@@ -1,27 +1,78 @@
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.linear_model import LogisticRegression
-from sklearn.model_selection import train_test_split
-from sklearn.pipeline import Pipeline
-import joblib
+from datetime import datetime
 import os
+import threading
+
+from metrics import registry
+
+
+ML_PREDICTIONS_TOTAL = registry.counter(
+    "fraud_ml_predictions_total",
+    "Number of ML scam probability predictions"
+)
 
 
 class MLModel:
-    """Simple machine learning model for scam detection using Logistic Regression."""
+    """
+    Simple machine learning model for scam detection using Logistic Regression.
     
-    def __init__(self, model_path: str = "model.pkl"):
-        """Initialize and train the model with built-in dataset or load from file."""
+    sklearn and joblib are imported on first load, not when this module is
+    imported, so the application can start serving before the model is ready.
+    """
+    
+    def __init__(self, model_path: str = "model.pkl", lazy: bool = False):
+        """
+        Initialize the model.
+        
+        Args:
+            model_path: Saved pipeline to load, or to write after training
+            lazy: Defer loading until load() is called (e.g. from a
+                  background startup thread)
+        """
         self.model_path = model_path
+        self.pipeline = None
+        self.version = None
+        self._load_lock = threading.Lock()
         
-        # Check if saved model exists
-        if os.path.exists(self.model_path):
-            # Load existing model
-            self.pipeline = joblib.load(self.model_path)
-        else:
-            # Train new model
-            self._train_model()
-            # Save the trained model
-            joblib.dump(self.pipeline, self.model_path)
+        if not lazy:
+            self.load()
+    
+    @property
+    def is_loaded(self) -> bool:
+        return self.pipeline is not None
+    
+    def load(self):
+        """Load the saved model, or train and save one with the built-in dataset."""
+        import joblib
+        
+        with self._load_lock:
+            if self.pipeline is not None:
+                return
+            
+            # Check if saved model exists
+            if os.path.exists(self.model_path):
+                # Load existing model
+                pipeline = joblib.load(self.model_path)
+                version = datetime.fromtimestamp(os.path.getmtime(self.model_path)).strftime("%Y%m%d%H%M%S")
+            else:
+                # Train new model
+                pipeline = self._train_model()
+                # Save the trained model
+                joblib.dump(pipeline, self.model_path)
+                version = datetime.now().strftime("%Y%m%d%H%M%S")
+            
+            self.version = version
+            self.pipeline = pipeline
+    
+    def _build_pipeline(self):
+        """Create an untrained TF-IDF + Logistic Regression pipeline."""
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        from sklearn.linear_model import LogisticRegression
+        from sklearn.pipeline import Pipeline
+        
+        return Pipeline([
+            ('tfidf', TfidfVectorizer(max_features=100, stop_words='english')),
+            ('classifier', LogisticRegression(random_state=42, max_iter=200))
+        ])
     
     def _train_model(self):
         """Train the model with built-in dataset."""
@@ -57,13 +108,11 @@ class MLModel:
         labels = [1] * len(scam_messages) + [0] * len(legitimate_messages)
         
         # Create a pipeline with TF-IDF vectorizer and Logistic Regression
-        self.pipeline = Pipeline([
-            ('tfidf', TfidfVectorizer(max_features=100, stop_words='english')),
-            ('classifier', LogisticRegression(random_state=42, max_iter=200))
-        ])
+        pipeline = self._build_pipeline()
         
         # Train the model
-        self.pipeline.fit(messages, labels)
+        pipeline.fit(messages, labels)
+        return pipeline
     
     def predict_probability(self, message: str) -> float:
         """
@@ -73,13 +122,17 @@ class MLModel:
             message: The message text to analyze
             
         Returns:
-            Probability between 0 and 1 (higher = more likely to be scam)
+            Probability between 0 and 1 (higher = more likely to be scam),
+            or 0.0 while the model is still loading
         """
-        if not message:
+        pipeline = self.pipeline
+        if not message or pipeline is None:
             return 0.0
         
+        ML_PREDICTIONS_TOTAL.inc()
+        
         # Get probability for scam class (class 1)
-        probability = self.pipeline.predict_proba([message])[0][1]
+        probability = pipeline.predict_proba([message])[0][1]
         
         return round(probability, 2)
     
@@ -95,10 +148,15 @@ class MLModel:
         messages = scam_messages + legitimate_messages
         labels = [1] * len(scam_messages) + [0] * len(legitimate_messages)
         
-        # Retrain the pipeline
-        self.pipeline.fit(messages, labels)
+        import joblib
+        
+        # Retrain a fresh pipeline and swap it in once fitted
+        pipeline = self._build_pipeline()
+        pipeline.fit(messages, labels)
         
         # Save the retrained model
-        joblib.dump(self.pipeline, self.model_path)
+        joblib.dump(pipeline, self.model_path)
+        self.version = datetime.now().strftime("%Y%m%d%H%M%S")
+        self.pipeline = pipeline
         
         print(f"Model retrained with {len(messages)} samples and saved to {self.model_path}")
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Any, Dict, Optional, List
 
 
 class FraudRequest(BaseModel):
@@ -18,3 +18,13 @@ class FraudResponse(BaseModel):
     contributing_factors: List[str]
     recommendation: str
     threat_category: str
+    campaign_id: Optional[str] = None
+    campaign_size: int = 0
+    graph_risk: int = 0
+    extracted_entities: List[Dict[str, str]] = []
+    domain_reputation: List[Dict[str, Any]] = []
+    # "fast" when admission control skipped the ML, graph and database stages;
+    # "rules_only" when the ML model had not finished loading
+    analysis_mode: str = "full"
+    # Version of the rule set that scored the message
+    rule_version: Optional[str] = None
@@ -0,0 +1,116 @@
+"""
+Password Hashing Thread Pool
+Runs bcrypt hashing and verification off the event loop in a bounded
+executor, rejecting work when the wait queue is full.
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict
+
+from metrics import registry
+
+
+PASSWORD_HASH_SECONDS = registry.histogram(
+    "fraud_password_hash_seconds",
+    "Time spent hashing or verifying a password"
+)
+PASSWORD_QUEUE_WAIT_SECONDS = registry.histogram(
+    "fraud_password_queue_wait_seconds",
+    "Time a password task waited for a pool thread"
+)
+PASSWORD_REJECTED_TOTAL = registry.counter(
+    "fraud_password_rejected_total",
+    "Password tasks rejected because the pool queue was full"
+)
+
+
+class PasswordPoolSaturated(RuntimeError):
+    """Raised when the password pool's wait queue is full."""
+
+
+class PasswordHashPool:
+    """
+    Dedicated executor for CPU-heavy password work.
+
+    At most max_workers hashes run at once and at most max_queue more may
+    wait; anything beyond that fails fast with PasswordPoolSaturated so a
+    burst of logins cannot stall the event loop or grow without bound.
+    """
+
+    def __init__(self, max_workers: int = 4, max_queue: int = 32):
+        """
+        Initialize the pool.
+
+        Args:
+            max_workers: Number of hashing threads
+            max_queue: Maximum number of requests waiting for a thread
+        """
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self.rejected = 0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        # Threads are only started once the first password is processed
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers,
+                        thread_name_prefix="password-pool"
+                    )
+        return self._executor
+
+    def _timed(self, func: Callable, args: tuple, submitted_at: float):
+        started_at = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            PASSWORD_QUEUE_WAIT_SECONDS.observe(started_at - submitted_at)
+            PASSWORD_HASH_SECONDS.observe(time.perf_counter() - started_at)
+
+    async def run(self, func: Callable, *args):
+        """
+        Run a password function in the pool and await its result.
+
+        Args:
+            func: Blocking function, e.g. verify_password or get_password_hash
+            *args: Arguments for func
+
+        Returns:
+            Return value of func
+
+        Raises:
+            PasswordPoolSaturated: If the wait queue is full
+        """
+        with self._lock:
+            if self._in_flight >= self.max_workers + self.max_queue:
+                self.rejected += 1
+                PASSWORD_REJECTED_TOTAL.inc()
+                raise PasswordPoolSaturated("Password hashing queue is full")
+            self._in_flight += 1
+
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self._get_executor(), self._timed, func, args, time.perf_counter()
+            )
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+    def get_statistics(self) -> Dict:
+        """Get pool statistics (timings are exported as histograms on /metrics)."""
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "in_flight": self._in_flight,
+                "queued": max(self._in_flight - self.max_workers, 0),
+                "rejected": self.rejected
+            }
@@ -1,3 +1,23 @@
+import re
+from typing import Dict, List
+
+import numpy as np
+
+from phone_normalizer import normalize_phone
+
+
+# Same digit repeated 4+ times in a row (e.g., 7777)
+_REPEATED_PATTERN = re.compile(r"(\d)\1{3}")
+
+# 4+ consecutive ascending or descending digits (e.g., 1234, 4321)
+_SEQUENTIAL_PATTERN = re.compile(
+    "|".join(
+        ["".join(str(d + i) for i in range(4)) for d in range(7)] +
+        ["".join(str(d - i) for i in range(4)) for d in range(9, 2, -1)]
+    )
+)
+
+
 class PhoneAnalyzer:
     """Analyze phone numbers for suspicious patterns."""
     
@@ -19,42 +39,56 @@ class PhoneAnalyzer:
                 "invalid_length": False
             }
         
-        # Clean the phone number (remove spaces, dashes, parentheses)
-        clean_number = phone_number.replace("-", "").replace(" ", "").replace("(", "").replace(")", "")
-        
-        # Remove any non-digit characters
-        clean_number = ''.join(char for char in clean_number if char.isdigit())
-        
-        # Check for invalid length (less than 8 digits)
-        invalid_length = len(clean_number) < 8
-        
-        # Check for repeated digits (same digit repeated 4+ times in a row)
-        repeated_pattern = False
-        if len(clean_number) >= 4:
-            for i in range(len(clean_number) - 3):
-                if clean_number[i] == clean_number[i+1] == clean_number[i+2] == clean_number[i+3]:
-                    repeated_pattern = True
-                    break
-        
-        # Check for sequential digits (4+ consecutive ascending or descending digits)
-        sequential_pattern = False
-        if len(clean_number) >= 4:
-            for i in range(len(clean_number) - 3):
-                # Check ascending sequence (e.g., 1234)
-                if (int(clean_number[i+1]) == int(clean_number[i]) + 1 and
-                    int(clean_number[i+2]) == int(clean_number[i]) + 2 and
-                    int(clean_number[i+3]) == int(clean_number[i]) + 3):
-                    sequential_pattern = True
-                    break
-                # Check descending sequence (e.g., 4321)
-                if (int(clean_number[i+1]) == int(clean_number[i]) - 1 and
-                    int(clean_number[i+2]) == int(clean_number[i]) - 2 and
-                    int(clean_number[i+3]) == int(clean_number[i]) - 3):
-                    sequential_pattern = True
-                    break
+        clean_number = normalize_phone(phone_number)
         
         return {
-            "repeated_pattern": repeated_pattern,
-            "sequential_pattern": sequential_pattern,
-            "invalid_length": invalid_length
+            "repeated_pattern": _REPEATED_PATTERN.search(clean_number) is not None,
+            "sequential_pattern": _SEQUENTIAL_PATTERN.search(clean_number) is not None,
+            # Check for invalid length (less than 8 digits)
+            "invalid_length": len(clean_number) < 8
         }
+    
+    def analyze_batch(self, phone_numbers: List[str]) -> List[Dict]:
+        """
+        Analyze many phone numbers at once using array operations.
+        
+        Args:
+            phone_numbers: List of phone numbers to analyze
+            
+        Returns:
+            List of dictionaries in the same format as analyze(), in input order
+        """
+        if not phone_numbers:
+            return []
+        
+        clean_numbers = [normalize_phone(phone) for phone in phone_numbers]
+        lengths = np.array([len(number) for number in clean_numbers], dtype=np.int64)
+        width = max(int(lengths.max()), 4)
+        
+        # Digits as a (numbers x width) matrix, padded on the right
+        digits = np.zeros((len(clean_numbers), width), dtype=np.int8)
+        for row, number in enumerate(clean_numbers):
+            if number:
+                digits[row, :len(number)] = np.frombuffer(number.encode("ascii"), dtype=np.uint8) - ord("0")
+        
+        # Differences between neighbouring digits, masked to real digits only
+        diffs = np.diff(digits, axis=1)
+        valid = np.arange(width - 1)[None, :] < (lengths[:, None] - 1)
+        
+        def has_run(mask: np.ndarray) -> np.ndarray:
+            # Three neighbouring differences in a row span four digits
+            mask = mask & valid
+            return (mask[:, :-2] & mask[:, 1:-1] & mask[:, 2:]).any(axis=1)
+        
+        repeated = has_run(diffs == 0)
+        sequential = has_run(diffs == 1) | has_run(diffs == -1)
+        invalid_length = lengths < 8
+        
+        return [
+            {
+                "repeated_pattern": bool(repeated[i]) if phone_numbers[i] else False,
+                "sequential_pattern": bool(sequential[i]) if phone_numbers[i] else False,
+                "invalid_length": bool(invalid_length[i]) if phone_numbers[i] else False
+            }
+            for i in range(len(phone_numbers))
+        ]
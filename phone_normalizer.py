@@ -0,0 +1,36 @@
+"""
+Shared phone number normalisation.
+Every component keys phone numbers by the same canonical digit string,
+computed once per distinct input and cached.
+"""
+
+import re
+import unicodedata
+from functools import lru_cache
+
+
+_NON_DIGIT = re.compile(r"\D+")
+
+
+@lru_cache(maxsize=65536)
+def normalize_phone(phone_number: str) -> str:
+    """
+    Return the canonical form of a phone number.
+
+    The canonical form is the E.164-style digit string: all formatting
+    characters (spaces, dashes, parentheses, leading '+') are removed and
+    non-ASCII decimal digits (e.g. Arabic-Indic) become ASCII digits.
+
+    Args:
+        phone_number: Raw phone number as supplied by the client
+
+    Returns:
+        Digit-only string (empty if no phone number was given)
+    """
+    if not phone_number:
+        return ""
+    digits = _NON_DIGIT.sub("", phone_number)
+    if not digits.isascii():
+        # \d matches every Unicode decimal digit; map them to 0-9
+        digits = "".join(str(unicodedata.decimal(digit)) for digit in digits)
+    return digits
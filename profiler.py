@@ -0,0 +1,226 @@
+"""
+Sampling Profiler
+On-demand stack sampler for a running worker, writing collapsed stacks
+that flamegraph tools (flamegraph.pl, speedscope, inferno) can render,
+plus opt-in cProfile capture of a single request by its X-Request-ID.
+Nothing runs while profiling is off.
+"""
+
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Optional
+
+from config import config
+
+
+_SAFE_ID = re.compile(r"[^A-Za-z0-9_.-]")
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """
+    Periodically samples the stacks of every thread in this process.
+
+    Samples are aggregated into collapsed-stack counts
+    ("thread;outer;...;inner count") and written to output_dir when the
+    sampling window ends.
+    """
+
+    def __init__(self, output_dir: str = "profiles", max_stack_depth: int = 128, arm_ttl_seconds: float = 300.0):
+        """
+        Initialize the profiler.
+
+        Args:
+            output_dir: Directory for collapsed-stack and cProfile output
+            max_stack_depth: Frames kept per sample (innermost frames win)
+            arm_ttl_seconds: Time an armed request id waits for its request
+        """
+        self.output_dir = output_dir
+        self.max_stack_depth = max_stack_depth
+        self.arm_ttl_seconds = arm_ttl_seconds
+        self._thread = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self.last_result: Optional[Dict] = None
+        # {request_id: expires_at} for single-request cProfile capture
+        self.armed_requests: Dict[str, float] = {}
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, duration: float, interval: float = 0.005) -> bool:
+        """
+        Start sampling in a background thread.
+
+        Args:
+            duration: Sampling window in seconds
+            interval: Time between samples in seconds
+
+        Returns:
+            False if a sampling window is already running
+        """
+        with self._lock:
+            if self.running:
+                return False
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run,
+                args=(duration, interval),
+                name="sampling-profiler",
+                daemon=True
+            )
+            self._thread.start()
+            return True
+
+    def stop(self):
+        """End the current sampling window early."""
+        self._stop.set()
+
+    def _run(self, duration: float, interval: float):
+        own_id = threading.get_ident()
+        stacks = Counter()
+        samples = 0
+        started = time.time()
+        deadline = time.monotonic() + duration
+
+        while time.monotonic() < deadline and not self._stop.is_set():
+            thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                labels = []
+                while frame is not None and len(labels) < self.max_stack_depth:
+                    labels.append(_frame_label(frame))
+                    frame = frame.f_back
+                labels.append(thread_names.get(thread_id, f"thread-{thread_id}"))
+                stacks[";".join(reversed(labels))] += 1
+            samples += 1
+            self._stop.wait(interval)
+
+        path = self._write_collapsed(stacks, started)
+        self.last_result = {
+            "started_at": datetime.fromtimestamp(started).strftime("%Y-%m-%d %H:%M:%S"),
+            "duration_s": round(time.time() - started, 2),
+            "samples": samples,
+            "distinct_stacks": len(stacks),
+            "output_file": path
+        }
+
+    def _write_collapsed(self, stacks: Counter, started: float) -> Optional[str]:
+        try:
+            os.makedirs(self.output_dir, exist_ok=True)
+            name = datetime.fromtimestamp(started).strftime("profile-%Y%m%d-%H%M%S.folded")
+            path = os.path.join(self.output_dir, name)
+            with open(path, "w", encoding="utf-8") as f:
+                for stack, count in stacks.most_common():
+                    f.write(f"{stack} {count}\n")
+            return path
+        except OSError as e:
+            print(f"Profiler output error: {e}")
+            return None
+
+    def get_status(self) -> Dict:
+        """Get the profiler state and the result of the last window."""
+        return {
+            "running": self.running,
+            "last_result": self.last_result,
+            "armed_requests": list(self._expire_armed(time.monotonic()))
+        }
+
+    # Single-request cProfile capture
+
+    def _expire_armed(self, now: float) -> Dict[str, float]:
+        """Drop armed request ids whose request never arrived."""
+        with self._lock:
+            for request_id, expires_at in list(self.armed_requests.items()):
+                if expires_at <= now:
+                    del self.armed_requests[request_id]
+            return dict(self.armed_requests)
+
+    def arm_request(self, request_id: str):
+        """Profile the next request carrying this X-Request-ID (within arm_ttl_seconds) with cProfile."""
+        now = time.monotonic()
+        self._expire_armed(now)
+        with self._lock:
+            self.armed_requests[request_id] = now + self.arm_ttl_seconds
+
+    def take_armed_request(self, request_id: Optional[str]) -> bool:
+        """
+        Consume an armed request id.
+
+        Also drops expired ids, so stale arms cannot keep the middleware
+        off its fast path.
+
+        Returns:
+            True if the id was armed and not expired (it is now disarmed)
+        """
+        now = time.monotonic()
+        self._expire_armed(now)
+        if request_id is None:
+            return False
+        with self._lock:
+            return self.armed_requests.pop(request_id, None) is not None
+
+    def request_profile_path(self, request_id: str) -> str:
+        """Path of the cProfile dump for a request id."""
+        return os.path.join(self.output_dir, f"request-{_SAFE_ID.sub('_', request_id)}.prof")
+
+
+class RequestProfilerMiddleware:
+    """
+    ASGI middleware that runs armed requests under cProfile.
+
+    When no request is armed the only cost is one dictionary truth test.
+    Because the event loop interleaves coroutines, the dump may also
+    contain work done for concurrent requests.
+    """
+
+    def __init__(self, app, profiler: SamplingProfiler):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.profiler.armed_requests:
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope.get("headers", []):
+            if name == b"x-request-id":
+                request_id = value.decode("latin-1")
+                break
+
+        if not self.profiler.take_armed_request(request_id):
+            await self.app(scope, receive, send)
+            return
+
+        import cProfile
+        
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            profile.disable()
+            try:
+                os.makedirs(self.profiler.output_dir, exist_ok=True)
+                profile.dump_stats(self.profiler.request_profile_path(request_id))
+            except OSError as e:
+                print(f"Profiler output error: {e}")
+
+
+# Global instance
+sampling_profiler = SamplingProfiler(
+    output_dir=config.PROFILE_OUTPUT_DIR,
+    arm_ttl_seconds=config.PROFILE_ARM_TTL_SECONDS
+)
@@ -1,6 +1,8 @@
 import time
 from collections import defaultdict
 
+from phone_normalizer import normalize_phone
+
 
 class RateLimiter:
     """Track request rates per phone number."""
@@ -28,9 +30,7 @@ class RateLimiter:
         
         current_time = time.time()
         
-        # Clean phone number
-        clean_phone = phone_number.replace("-", "").replace(" ", "").replace("(", "").replace(")", "")
-        clean_phone = ''.join(char for char in clean_phone if char.isdigit())
+        clean_phone = normalize_phone(phone_number)
         
         # Get request history for this phone number
         timestamps = self.request_history[clean_phone]
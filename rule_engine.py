@@ -0,0 +1,637 @@
+"""
+Declarative Rule Table
+Keyword categories, points, risk-level bands, confidence, threat
+categories and explanation text for /analyze come from one rule table
+rather than if/elif chains spread over RiskScorer, ExplainableAI and
+analyze_message. The table is compiled once into a weight vector, band
+thresholds and condition bitmasks. A batch is scored with one matrix
+product and a searchsorted band lookup; a single message walks the same
+compiled vectors as plain lists, which beats NumPy's per-call overhead
+for one row.
+
+The built-in table holds the original rules. Rule tables are JSON objects:
+
+    features    keyword categories ("keywords": [...]) and phone signals
+                ("source": "phone"), each worth "points" per match, with an
+                optional contributing-factor template
+    max_score   cap of the rule score
+    bands       risk levels by highest score ("max_score"; the last band is
+                open-ended), with recommendations
+    confidence  confidence by number of keyword categories matched
+    categories  threat categories; the first matching entry wins
+    reasons     primary reasons; the first matching entry wins
+    blacklist_keywords
+                phrases that count as a blacklist hit ("keywords") and the
+                risk boost they add ("risk_boost")
+    version     optional label (default: a hash of the table)
+
+Category and reason entries match on "all", "any" and "none" (lists of
+feature names) and "max_score"; the last entry must have no conditions.
+Templates may use {matches} (the feature's own matched keywords) and
+{<feature name>}.
+
+Rule sets are versioned and reloaded without a restart. With
+RULE_SOURCE=db, published tables are rows of the rule_sets table and the
+newest row is active; RULE_TABLE_PATH (or the built-in table) applies until
+the first publish. With RULE_SOURCE=file, RULE_TABLE_PATH is watched and
+publishing rewrites it. Each worker polls its source in a background
+thread, compiles a changed table there and swaps the new RuleSet in with
+one assignment, so a request never sees a half-built rule set.
+"""
+
+import bisect
+import copy
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from config import config
+from database import SessionLocal
+from db_models import RuleSetVersion
+
+
+SOURCE_KEYWORDS = "keywords"
+SOURCE_PHONE = "phone"
+
+RULE_SOURCE_DB = "db"
+RULE_SOURCE_FILE = "file"
+
+# Features are tracked as bits of an int64
+MAX_FEATURES = 63
+
+DEFAULT_RULE_TABLE = {
+    "features": [
+        {"name": "urgency", "keywords": ["urgent", "immediately", "now", "act fast"],
+         "points": 15, "factor": "Urgency keywords: {matches}"},
+        {"name": "financial", "keywords": ["bank", "account", "verify", "credit", "debit"],
+         "points": 20, "factor": "Financial keywords: {matches}"},
+        {"name": "threat", "keywords": ["suspended", "blocked", "penalty", "legal action"],
+         "points": 25, "factor": "Threat keywords: {matches}"},
+        {"name": "repeated_pattern", "source": "phone", "points": 10},
+        {"name": "sequential_pattern", "source": "phone", "points": 10},
+        {"name": "invalid_length", "source": "phone", "points": 15}
+    ],
+    "max_score": 100,
+    "bands": [
+        {"level": "Low", "max_score": 30,
+         "recommendation": "Message appears safe, but stay vigilant"},
+        {"level": "Medium", "max_score": 60,
+         "recommendation": "Exercise caution. Verify sender identity before responding"},
+        {"level": "High", "max_score": 85,
+         "recommendation": "High risk of fraud. Do not respond or click any links. Report and delete"},
+        {"level": "Critical",
+         "recommendation": "CRITICAL THREAT. Do not engage. Block sender immediately and report to authorities"}
+    ],
+    "confidence": [10, 45, 65, 85],
+    "categories": [
+        {"category": "Financial Scam", "all": ["financial", "urgency"]},
+        {"category": "Extortion Scam", "all": ["threat", "urgency"]},
+        {"category": "Suspicious Sender", "any": ["repeated_pattern", "sequential_pattern", "invalid_length"],
+         "none": ["urgency", "financial", "threat"]},
+        {"category": "Low Risk Communication", "max_score": 30},
+        {"category": "Potential Fraud"}
+    ],
+    "reasons": [
+        {"text": "No fraud indicators detected", "none": ["urgency", "financial", "threat"]},
+        {"text": "Contains threatening language: {threat}", "all": ["threat"]},
+        {"text": "Combines financial requests with urgency tactics", "all": ["financial", "urgency"]},
+        {"text": "Requests financial information: {financial}", "all": ["financial"]},
+        {"text": "Uses urgency pressure: {urgency}", "all": ["urgency"]},
+        {"text": "Multiple fraud indicators detected"}
+    ],
+    "blacklist_keywords": {
+        "keywords": ["nigerian prince", "wire transfer", "western union", "bitcoin wallet", "send gift card"],
+        "risk_boost": 25
+    }
+}
+
+
+def table_version(table: Dict) -> str:
+    """Content hash of a rule table, used when it carries no version."""
+    canonical = json.dumps(table, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:12]
+
+
+class _Conditions:
+    """Ordered first-match entries compiled to feature bitmasks."""
+
+    def __init__(self, entries: Sequence[Dict], bits: Dict[str, int], value_key: str, section: str):
+        if not entries:
+            raise ValueError(f"Rule table section '{section}' is empty")
+
+        def mask(entry, key):
+            value = 0
+            for name in entry.get(key, ()):
+                if name not in bits:
+                    raise ValueError(f"Unknown feature '{name}' in rule table section '{section}'")
+                value |= bits[name]
+            return value
+
+        self.values = []
+        for entry in entries:
+            if value_key not in entry:
+                raise ValueError(f"Entry in rule table section '{section}' has no '{value_key}'")
+            self.values.append(entry[value_key])
+        self.all = np.array([mask(entry, "all") for entry in entries], dtype=np.int64)
+        self.any = np.array([mask(entry, "any") for entry in entries], dtype=np.int64)
+        self.none = np.array([mask(entry, "none") for entry in entries], dtype=np.int64)
+        self.max_score = np.array([entry.get("max_score", np.inf) for entry in entries], dtype=np.float64)
+        if self.all[-1] or self.any[-1] or self.none[-1] or np.isfinite(self.max_score[-1]):
+            raise ValueError(f"The last entry of rule table section '{section}' must have no conditions")
+        self._rows = list(zip(self.all.tolist(), self.any.tolist(), self.none.tolist(), self.max_score.tolist()))
+
+    def select(self, present: np.ndarray, scores: np.ndarray) -> np.ndarray:
+        """Index of the first matching entry for each (feature bits, score) pair."""
+        present = present[:, None]
+        matched = (
+            ((present & self.all) == self.all)
+            & ((present & self.none) == 0)
+            & ((self.any == 0) | ((present & self.any) != 0))
+            & (scores[:, None] <= self.max_score)
+        )
+        return matched.argmax(axis=1)
+
+    def select_one(self, present: int, score: float) -> int:
+        """Index of the first matching entry for one message."""
+        for index, (all_mask, any_mask, none_mask, max_score) in enumerate(self._rows):
+            if (present & all_mask == all_mask and not present & none_mask
+                    and (not any_mask or present & any_mask) and score <= max_score):
+                return index
+        return len(self._rows) - 1
+
+
+class RuleSet:
+    """
+    A compiled rule table.
+
+    Immutable once built; take one reference per request so detection,
+    scoring and explanation all use the same rules.
+    """
+
+    def __init__(self, table: Dict, version: Optional[str] = None):
+        """
+        Compile a rule table.
+
+        Args:
+            table: Rule table (see module docstring)
+            version: Version label (default: the table's "version" or a content hash)
+
+        Raises:
+            ValueError: If the table is malformed
+        """
+        features = table.get("features") or []
+        if not features or len(features) > MAX_FEATURES:
+            raise ValueError(f"A rule table needs 1 to {MAX_FEATURES} features")
+
+        self.table = copy.deepcopy(table)
+        self.version = str(version or table.get("version") or table_version(table))
+        self.names: List[str] = []
+        self.keywords: Dict[str, tuple] = {}
+        self.phone_signals: List[str] = []
+        self.factors: Dict[str, str] = {}
+        for feature in features:
+            name = feature.get("name")
+            if not name or name in self.keywords or name in self.phone_signals:
+                raise ValueError(f"Missing or duplicate rule feature name: {name!r}")
+            source = feature.get("source", SOURCE_KEYWORDS)
+            if source == SOURCE_KEYWORDS:
+                self.keywords[name] = tuple(keyword.lower() for keyword in feature.get("keywords", ()))
+            elif source == SOURCE_PHONE:
+                self.phone_signals.append(name)
+            else:
+                raise ValueError(f"Unknown source '{source}' for rule feature '{name}'")
+            if feature.get("factor"):
+                self.factors[name] = feature["factor"]
+            self.names.append(name)
+
+        self.weights = np.array([feature.get("points", 0) for feature in features], dtype=np.int64)
+        self.bits = {name: 1 << position for position, name in enumerate(self.names)}
+        self._bit_values = np.array([self.bits[name] for name in self.names], dtype=np.int64)
+        self._keyword_columns = np.array([name in self.keywords for name in self.names])
+        # (feature name, detection key or None for phone signals, points, bit) for the single-message path
+        self._columns = [
+            (name, f"{name}_matches" if name in self.keywords else None, int(points), self.bits[name])
+            for name, points in zip(self.names, self.weights.tolist())
+        ]
+        self.max_score = int(table.get("max_score", 100))
+
+        bands = table.get("bands") or []
+        if not bands or any("max_score" not in band for band in bands[:-1]):
+            raise ValueError("Rule table bands need a max_score on every band but the last")
+        self.band_limits = np.array([band["max_score"] for band in bands[:-1]], dtype=np.float64)
+        if np.any(np.diff(self.band_limits) <= 0):
+            raise ValueError("Rule table bands must be in increasing order of max_score")
+        self._band_list = self.band_limits.tolist()
+        self.levels = [band["level"] for band in bands]
+        self.recommendations = [band.get("recommendation", "") for band in bands]
+
+        self.confidence = np.array(table.get("confidence") or [0], dtype=np.int64)
+        self._confidence_list = self.confidence.tolist()
+        blacklist = table.get("blacklist_keywords") or {}
+        self.blacklist_keywords = tuple(keyword.lower() for keyword in blacklist.get("keywords", ()))
+        self.blacklist_risk_boost = int(blacklist.get("risk_boost", 25))
+
+        self.categories = _Conditions(table.get("categories"), self.bits, "category", "categories")
+        self.reasons = _Conditions(table.get("reasons"), self.bits, "text", "reasons")
+
+        # Fail on bad templates now rather than on the first matching message
+        sample = {name: "" for name in self.keywords}
+        try:
+            for template in list(self.factors.values()) + self.reasons.values:
+                template.format_map({**sample, "matches": ""})
+        except (KeyError, IndexError, ValueError) as e:
+            raise ValueError(f"Invalid rule table template: {e}")
+
+    # ------------------------------------------------------------------
+    # Detection and features
+    # ------------------------------------------------------------------
+
+    def detect(self, message: str) -> Dict[str, List[str]]:
+        """
+        Find the keywords of each keyword feature in a message.
+
+        Returns:
+            Dictionary with "<feature>_matches" lists
+        """
+        message_lower = (message or "").lower()
+        return {
+            f"{name}_matches": [keyword for keyword in keywords if keyword in message_lower]
+            for name, keywords in self.keywords.items()
+        }
+
+    def blacklisted_keyword(self, message: str) -> Optional[str]:
+        """First blacklisted keyword found in a message, or None."""
+        message_lower = (message or "").lower()
+        for keyword in self.blacklist_keywords:
+            if keyword in message_lower:
+                return keyword
+        return None
+
+    def feature_matrix(self, detection_results: Sequence[Dict], phone_analyses: Sequence[Optional[Dict]]) -> np.ndarray:
+        """
+        Feature counts per message: matched keywords, or 0/1 for phone signals.
+
+        Returns:
+            int64 array of shape (messages, features)
+        """
+        counts = [self._feature_counts(detection, phone) for detection, phone in zip(detection_results, phone_analyses)]
+        return np.array(counts, dtype=np.int64).reshape(len(counts), len(self.names))
+
+    def _feature_counts(self, detection: Dict, phone: Optional[Dict]) -> List[int]:
+        return [
+            len(detection.get(key, ())) if key else int(bool(phone and phone.get(name)))
+            for name, key, _, _ in self._columns
+        ]
+
+    def present_bits(self, counts: np.ndarray) -> np.ndarray:
+        """Bitmask of the features present in each row of a feature matrix."""
+        return (counts > 0).astype(np.int64) @ self._bit_values
+
+    # ------------------------------------------------------------------
+    # Scoring
+    # ------------------------------------------------------------------
+
+    def level_indexes(self, scores) -> np.ndarray:
+        """Band index of each score."""
+        return np.searchsorted(self.band_limits, np.asarray(scores, dtype=np.float64), side="left")
+
+    def risk_level(self, score: float) -> str:
+        """Risk level of a single score."""
+        # Same lookup as level_indexes(), without the array round trip
+        return self.levels[bisect.bisect_left(self._band_list, score)]
+
+    def score_matrix(self, counts: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Score a feature matrix.
+
+        Returns:
+            Dictionary of arrays: score, level (band index) and confidence
+        """
+        scores = np.minimum(counts @ self.weights, self.max_score)
+        categories_matched = np.count_nonzero(counts[:, self._keyword_columns], axis=1)
+        return {
+            "score": scores,
+            "level": self.level_indexes(scores),
+            "confidence": self.confidence[np.minimum(categories_matched, len(self.confidence) - 1)]
+        }
+
+    def score_batch(self, detection_results: Sequence[Dict], phone_analyses: Optional[Sequence[Optional[Dict]]] = None) -> List[Dict]:
+        """
+        Rule-score many messages at once.
+
+        Returns:
+            List of dictionaries with score, risk_level and confidence, in input order
+        """
+        if phone_analyses is None:
+            phone_analyses = [None] * len(detection_results)
+        scored = self.score_matrix(self.feature_matrix(detection_results, phone_analyses))
+        return [
+            {"score": int(score), "risk_level": self.levels[level], "confidence": int(confidence)}
+            for score, level, confidence in zip(scored["score"], scored["level"], scored["confidence"])
+        ]
+
+    def score(self, detection_results: Dict, phone_analysis: Optional[Dict] = None) -> Dict:
+        """Rule-score one message; returns the same dictionary as score_batch()."""
+        counts = self._feature_counts(detection_results, phone_analysis)
+        score = min(sum(count * points for count, (_, _, points, _) in zip(counts, self._columns)), self.max_score)
+        categories_matched = sum(1 for count, (_, key, _, _) in zip(counts, self._columns) if key and count)
+        return {
+            "score": int(score),
+            "risk_level": self.risk_level(score),
+            "confidence": self._confidence_list[min(categories_matched, len(self._confidence_list) - 1)]
+        }
+
+    # ------------------------------------------------------------------
+    # Explanation
+    # ------------------------------------------------------------------
+
+    def explain_batch(self, scores: Sequence[float], detection_results: Sequence[Dict],
+                      phone_analyses: Optional[Sequence[Optional[Dict]]] = None) -> List[Dict]:
+        """
+        Explain many scored messages at once.
+
+        Args:
+            scores: Final score of each message
+            detection_results: Keyword matches of each message
+            phone_analyses: Optional phone analysis of each message
+
+        Returns:
+            List of dictionaries with risk_level, primary_reason,
+            contributing_factors, recommendation and threat_category
+        """
+        if phone_analyses is None:
+            phone_analyses = [None] * len(detection_results)
+        scores = np.asarray(scores, dtype=np.float64)
+        present = self.present_bits(self.feature_matrix(detection_results, phone_analyses))
+        levels = self.level_indexes(scores)
+        categories = self.categories.select(present, scores)
+        reasons = self.reasons.select(present, scores)
+
+        return [
+            self._describe(detection, int(present[row]), int(levels[row]), int(categories[row]), int(reasons[row]))
+            for row, detection in enumerate(detection_results)
+        ]
+
+    def explain(self, score: float, detection_results: Dict, phone_analysis: Optional[Dict] = None) -> Dict:
+        """Explain one scored message; returns the same dictionary as explain_batch()."""
+        counts = self._feature_counts(detection_results, phone_analysis)
+        present = 0
+        for count, (_, _, _, bit) in zip(counts, self._columns):
+            if count:
+                present |= bit
+        return self._describe(
+            detection_results, present, bisect.bisect_left(self._band_list, score),
+            self.categories.select_one(present, score), self.reasons.select_one(present, score)
+        )
+
+    def _describe(self, detection: Dict, present: int, level: int, category: int, reason: int) -> Dict:
+        matches = {name: ", ".join(detection.get(f"{name}_matches", ())) for name in self.keywords}
+        factors = [
+            template.format_map({**matches, "matches": matches.get(name, "")})
+            for name, template in self.factors.items()
+            if present & self.bits[name]
+        ]
+        return {
+            "risk_level": self.levels[level],
+            "primary_reason": self.reasons.values[reason].format_map(matches),
+            "contributing_factors": factors,
+            "recommendation": self.recommendations[level],
+            "threat_category": self.categories.values[category]
+        }
+
+    def get_statistics(self) -> Dict:
+        """Get the version and size of the rule set."""
+        return {
+            "version": self.version,
+            "features": len(self.names),
+            "keywords": sum(len(keywords) for keywords in self.keywords.values()),
+            "blacklist_keywords": len(self.blacklist_keywords),
+            "levels": self.levels
+        }
+
+
+def load_rule_table(path: str = "") -> Dict:
+    """Read a JSON rule table, or return the built-in table if path is empty."""
+    if not path:
+        return DEFAULT_RULE_TABLE
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+class RuleEngine:
+    """
+    Versioned rule store holding the active RuleSet.
+
+    Readers take engine.rules once per request; reloads and publishes
+    replace it with a single assignment.
+    """
+
+    def __init__(
+        self,
+        path: str = "",
+        source: str = RULE_SOURCE_DB,
+        reload_interval: float = 10.0,
+        session_factory=SessionLocal
+    ):
+        """
+        Initialize with the built-in rules; call load() to read the store.
+
+        Args:
+            path: JSON rule table file ("" = built-in rules)
+            source: "db" (rule_sets table) or "file" (watch path)
+            reload_interval: Seconds between checks for a new version
+            session_factory: Callable returning a database session
+        """
+        if source not in (RULE_SOURCE_DB, RULE_SOURCE_FILE):
+            raise ValueError(f"Unknown rule source: {source}")
+        if source == RULE_SOURCE_FILE and not path:
+            raise ValueError("RULE_SOURCE=file needs RULE_TABLE_PATH")
+        self.path = path
+        self.source = source
+        self.reload_interval = reload_interval
+        self.session_factory = session_factory
+        self.rules = RuleSet(DEFAULT_RULE_TABLE)
+        # Database row id or (mtime, size) of the file the active rules came from
+        self._loaded_state = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.loaded_at: Optional[str] = None
+        self.last_error: Optional[str] = None
+
+    def _file_state(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _latest_row_id(self, db) -> Optional[int]:
+        row = db.query(RuleSetVersion.id).order_by(RuleSetVersion.id.desc()).first()
+        return row.id if row else None
+
+    def _current_state(self):
+        if self.source == RULE_SOURCE_FILE:
+            return self._file_state()
+        db = self.session_factory()
+        try:
+            return self._latest_row_id(db)
+        finally:
+            db.close()
+
+    def _read_source(self):
+        """Read the active table from the store; returns (table, version, state)."""
+        if self.source == RULE_SOURCE_DB:
+            db = self.session_factory()
+            try:
+                row = db.query(RuleSetVersion).order_by(RuleSetVersion.id.desc()).first()
+            finally:
+                db.close()
+            if row is not None:
+                return json.loads(row.table_json), row.version, row.id
+        state = self._file_state() if self.path else None
+        if state is None:
+            if self.path:
+                print(f"Rule table {self.path} not found, using built-in rules")
+            return DEFAULT_RULE_TABLE, None, None
+        return load_rule_table(self.path), None, state
+
+    def load(self) -> Dict:
+        """
+        Read and compile the active table, then swap it in.
+
+        Returns:
+            Statistics of the loaded rule set
+        """
+        with self._lock:
+            started = time.perf_counter()
+            table, version, state = self._read_source()
+            self.rules = RuleSet(table, version=version)
+            self._loaded_state = state
+            self.loaded_at = time.strftime("%Y-%m-%dT%H:%M:%S")
+            self.last_error = None
+            return {**self.rules.get_statistics(), "duration_ms": round((time.perf_counter() - started) * 1000, 1)}
+
+    def reload_if_changed(self) -> bool:
+        """Load the store again if a new version was published since the last load."""
+        state = self._current_state()
+        if state is None or state == self._loaded_state:
+            return False
+        try:
+            result = self.load()
+        except (ValueError, OSError) as e:
+            # Keep serving the current rules; retried when the source changes again
+            self._loaded_state = state
+            self.last_error = str(e)
+            print(f"Rule set reload failed, keeping version {self.rules.version}: {e}")
+            return False
+        print(f"Rule set reloaded: {result}")
+        return True
+
+    def publish(self, table: Dict, version: Optional[str] = None, published_by: str = "") -> RuleSet:
+        """
+        Validate, store and activate a rule table.
+
+        Other workers pick it up on their next check.
+
+        Args:
+            table: Rule table (see module docstring)
+            version: Version label (default: the table's "version" or a content hash)
+            published_by: Who published it
+
+        Returns:
+            The compiled RuleSet
+
+        Raises:
+            ValueError: If the table is malformed
+        """
+        # Compile first, so a bad table never reaches the store
+        rules = RuleSet(table, version=version)
+        with self._lock:
+            if self.source == RULE_SOURCE_DB:
+                db = self.session_factory()
+                try:
+                    row = RuleSetVersion(
+                        version=rules.version,
+                        table_json=json.dumps(table, sort_keys=True),
+                        published_by=published_by,
+                        published_at=datetime.now()
+                    )
+                    db.add(row)
+                    db.commit()
+                    state = row.id
+                finally:
+                    db.close()
+            else:
+                temporary = f"{self.path}.tmp"
+                with open(temporary, "w", encoding="utf-8") as f:
+                    json.dump({**table, "version": rules.version}, f, indent=2)
+                os.replace(temporary, self.path)
+                state = self._file_state()
+            self.rules = rules
+            self._loaded_state = state
+            self.loaded_at = time.strftime("%Y-%m-%dT%H:%M:%S")
+            self.last_error = None
+        return rules
+
+    def history(self, limit: int = 20) -> List[Dict]:
+        """Published versions, newest first (database source only)."""
+        if self.source != RULE_SOURCE_DB:
+            return []
+        db = self.session_factory()
+        try:
+            rows = db.query(RuleSetVersion).order_by(RuleSetVersion.id.desc()).limit(limit).all()
+            return [
+                {
+                    "id": row.id,
+                    "version": row.version,
+                    "published_by": row.published_by,
+                    "published_at": row.published_at.isoformat() if row.published_at else None
+                }
+                for row in rows
+            ]
+        finally:
+            db.close()
+
+    def _run(self):
+        while not self._stop.wait(self.reload_interval):
+            try:
+                self.reload_if_changed()
+            except Exception as e:
+                print(f"Rule set reload error: {e}")
+
+    def start(self):
+        """Start the background thread checking for new versions."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="rule-reload", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the background reload thread."""
+        self._stop.set()
+
+    def get_statistics(self) -> Dict:
+        """Get the source and the active rule set."""
+        return {
+            "source": self.source,
+            "path": self.path,
+            "loaded_at": self.loaded_at,
+            "last_error": self.last_error,
+            **self.rules.get_statistics()
+        }
+
+
+# Global instance
+rule_engine = RuleEngine(
+    path=config.RULE_TABLE_PATH,
+    source=config.RULE_SOURCE,
+    reload_interval=config.RULE_RELOAD_SECONDS
+)
@@ -0,0 +1,283 @@
+"""
+Runtime Metrics for In-Process Components
+Registers scrape-time gauges for caches, queues, the knowledge graph,
+WebSocket connections, the database pool and the ML model. Values are
+computed only when /metrics is scraped, so the request path is unaffected.
+"""
+
+import os
+import sys
+import time
+from collections import deque
+from itertools import islice
+from typing import Dict, Mapping
+
+from metrics import registry
+
+
+# Number of entries inspected when estimating the size of large containers
+SIZE_SAMPLE = 256
+
+
+def _shallow_bytes(value) -> int:
+    """Size of a value plus the items it directly contains."""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(sys.getsizeof(k) + sys.getsizeof(v) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set, deque)):
+        size += sum(_shallow_bytes(item) if isinstance(item, dict) else sys.getsizeof(item) for item in value)
+    return size
+
+
+def estimate_container_bytes(container, sample: int = SIZE_SAMPLE) -> int:
+    """
+    Estimate the memory held by a dict or list and the values inside it.
+
+    A fixed-size sample of entries is measured with sys.getsizeof and
+    extrapolated, so the cost does not grow with the container's size.
+
+    Args:
+        container: Dictionary (keys and values are measured) or list
+        sample: Maximum number of entries to inspect
+
+    Returns:
+        Estimated size in bytes
+    """
+    total = sys.getsizeof(container)
+    count = len(container)
+    if count == 0:
+        return total
+
+    try:
+        if isinstance(container, Mapping):
+            entries = [sys.getsizeof(key) + _shallow_bytes(value) for key, value in islice(container.items(), sample)]
+        else:
+            entries = [_shallow_bytes(value) for value in islice(container, sample)]
+    except RuntimeError:
+        # Container changed size while sampling; report its own size only
+        return total
+
+    if not entries:
+        return total
+    return total + int(sum(entries) / len(entries) * count)
+
+
+def _process_resident_bytes():
+    """Resident set size of this process, where /proc is available."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def _pool_stats(engine) -> Dict:
+    """Connection pool counters, for pool classes that report them."""
+    pool = engine.pool
+    stats = {}
+    for name in ("size", "checkedin", "checkedout", "overflow"):
+        method = getattr(pool, name, None)
+        if callable(method):
+            try:
+                stats[name] = method()
+            except Exception:
+                pass
+    return stats
+
+
+def register_runtime_metrics(
+    rate_limiter,
+    history_store,
+    graph,
+    connection_manager,
+    engine,
+    ml_model,
+    campaign_index=None,
+    auth_cache=None,
+    blacklist_checker=None,
+    password_pool=None,
+    graph_snapshots=None,
+    api_key_registry=None,
+    admission_controller=None,
+    enrichment_queue=None,
+    alert_queue=None,
+    rule_engine=None
+):
+    """
+    Register scrape-time gauges for the application's components.
+
+    Args:
+        rate_limiter: RateLimiter instance
+        history_store: HistoryStore instance
+        graph: FraudKnowledgeGraph instance
+        connection_manager: WebSocket ConnectionManager instance
+        engine: SQLAlchemy engine
+        ml_model: MLModel instance
+        campaign_index: Optional CampaignIndex instance
+        auth_cache: Optional AuthCache instance
+        blacklist_checker: Optional BlacklistChecker instance
+        password_pool: Optional PasswordHashPool instance
+        graph_snapshots: Optional GraphSnapshotManager instance
+        api_key_registry: Optional ApiKeyRegistry instance
+        admission_controller: Optional AdmissionController instance
+        enrichment_queue: Optional EnrichmentQueue instance
+        alert_queue: Optional EnrichmentQueue instance sending alerts
+        rule_engine: Optional RuleEngine instance
+    """
+    registry.gauge(
+        "fraud_process_resident_memory_bytes",
+        "Resident memory of this worker process",
+        callback=_process_resident_bytes
+    )
+
+    # Rate limiter and history store
+    registry.gauge(
+        "fraud_rate_limiter_keys",
+        "Phone numbers tracked by the rate limiter",
+        callback=lambda: len(rate_limiter.request_history)
+    )
+    registry.gauge(
+        "fraud_rate_limiter_estimated_bytes",
+        "Estimated memory held by the rate limiter",
+        callback=lambda: estimate_container_bytes(rate_limiter.request_history)
+    )
+    registry.gauge(
+        "fraud_history_store_keys",
+        "Phone numbers held in the in-memory history store",
+        callback=lambda: len(history_store.history)
+    )
+    registry.gauge(
+        "fraud_history_store_estimated_bytes",
+        "Estimated memory held by the history store",
+        callback=lambda: estimate_container_bytes(history_store.history)
+    )
+
+    # Knowledge graph
+    registry.gauge(
+        "fraud_graph_nodes",
+        "Nodes in the knowledge graph",
+        callback=lambda: len(graph.nodes)
+    )
+    registry.gauge(
+        "fraud_graph_edges",
+        "Edges in the knowledge graph",
+        callback=lambda: len(graph.edges)
+    )
+    registry.gauge(
+        "fraud_graph_estimated_bytes",
+        "Estimated memory held by knowledge graph nodes and edges",
+        callback=lambda: estimate_container_bytes(graph.nodes) + estimate_container_bytes(graph.edges)
+    )
+
+    if graph_snapshots is not None:
+        registry.gauge(
+            "fraud_graph_snapshot_bytes",
+            "Memory held by the graph analytics snapshot arrays",
+            callback=lambda: graph_snapshots.snapshot.memory_bytes() if graph_snapshots.snapshot else 0
+        )
+        registry.gauge(
+            "fraud_graph_snapshot_age_seconds",
+            "Seconds since the graph analytics snapshot was built",
+            callback=lambda: time.time() - graph_snapshots.snapshot.built_at if graph_snapshots.snapshot else None
+        )
+
+    # WebSocket connections
+    registry.gauge(
+        "fraud_websocket_connections",
+        "Connected dashboard WebSocket clients",
+        callback=lambda: len(connection_manager.active_connections)
+    )
+
+    # Database connection pool
+    registry.gauge(
+        "fraud_db_pool_connections",
+        "Database pool connections by state (size, checkedin, checkedout, overflow)",
+        ["state"],
+        callback=lambda: {(state,): value for state, value in _pool_stats(engine).items()}
+    )
+
+    # ML model
+    registry.gauge(
+        "fraud_ml_model_info",
+        "Currently loaded ML model (value is always 1)",
+        ["version"],
+        callback=lambda: {(getattr(ml_model, "version", None) or "loading",): 1}
+    )
+
+    if rule_engine is not None:
+        registry.gauge(
+            "fraud_rule_set_info",
+            "Currently active rule set (value is always 1)",
+            ["version"],
+            callback=lambda: {(rule_engine.rules.version,): 1}
+        )
+
+    if campaign_index is not None:
+        registry.gauge(
+            "fraud_campaign_index_entries",
+            "Messages held in the campaign MinHash/LSH index",
+            callback=lambda: len(campaign_index.entries)
+        )
+        registry.gauge(
+            "fraud_campaign_index_clusters",
+            "Campaign clusters currently held in the index",
+            callback=lambda: len(campaign_index.cluster_sizes)
+        )
+
+    if auth_cache is not None:
+        registry.gauge(
+            "fraud_auth_cache_entries",
+            "Verified tokens held in the authentication cache",
+            callback=lambda: len(auth_cache)
+        )
+
+    if admission_controller is not None:
+        registry.gauge(
+            "fraud_admission_requests",
+            "/analyze requests by admission state (in_flight, fast_in_flight, queued)",
+            ["state"],
+            callback=lambda: {
+                ("in_flight",): admission_controller.in_flight,
+                ("fast_in_flight",): admission_controller.fast_in_flight,
+                ("queued",): admission_controller.queued
+            }
+        )
+
+    if enrichment_queue is not None:
+        registry.gauge(
+            "fraud_enrichment_queue_jobs",
+            "Deferred /analyze enrichment jobs waiting for a worker",
+            callback=lambda: enrichment_queue.pending
+        )
+
+    if alert_queue is not None:
+        registry.gauge(
+            "fraud_alert_queue_jobs",
+            "Critical-risk alerts waiting for a worker",
+            callback=lambda: alert_queue.pending
+        )
+
+    if api_key_registry is not None:
+        registry.gauge(
+            "fraud_api_keys_cached",
+            "Active tenant API keys held in memory",
+            callback=lambda: len(api_key_registry)
+        )
+
+    if blacklist_checker is not None:
+        registry.gauge(
+            "fraud_blacklist_index_entries",
+            "Numbers, prefixes and ranges in the blacklist index",
+            callback=lambda: blacklist_checker.index.size
+        )
+
+    if password_pool is not None:
+        registry.gauge(
+            "fraud_password_pool_tasks",
+            "Password tasks in the pool by state (in_flight, queued)",
+            ["state"],
+            callback=lambda: {
+                ("in_flight",): password_pool.get_statistics()["in_flight"],
+                ("queued",): password_pool.get_statistics()["queued"]
+            }
+        )
@@ -1,10 +1,14 @@
+import math
+
 from fastapi import Request, HTTPException, status
-from config import config
+from api_keys import api_key_registry
 
 
 def verify_api_key(request: Request) -> str:
     """
-    Verify API key from request header.
+    Verify API key from request header and charge the request to its quota.
+    
+    The key's tenant entry is stored on request.state.api_key.
     
     Args:
         request: FastAPI Request object
@@ -13,7 +17,7 @@ def verify_api_key(request: Request) -> str:
         API key type: "public" or "admin"
         
     Raises:
-        HTTPException: If API key is missing or invalid
+        HTTPException: If API key is missing, invalid or over its quota
     """
     api_key = request.headers.get("X-API-KEY")
     
@@ -24,16 +28,25 @@ def verify_api_key(request: Request) -> str:
             detail="Missing API key"
         )
     
-    # Validate API key
-    if api_key == config.ADMIN_API_KEY:
-        return "admin"
-    elif api_key == config.PUBLIC_API_KEY:
-        return "public"
-    else:
+    # Validate API key (in-memory, constant-time comparison)
+    entry = api_key_registry.authenticate(api_key)
+    if entry is None:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Invalid API key"
         )
+    
+    # Enforce the key's token-bucket quota
+    retry_after = api_key_registry.admit(entry)
+    if retry_after > 0:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=f"API key quota exceeded ({entry.rate_per_minute} requests per minute)",
+            headers={"Retry-After": str(math.ceil(retry_after))}
+        )
+    
+    request.state.api_key = entry
+    return entry.role
 
 
 def verify_admin_key(request: Request) -> str:
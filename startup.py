@@ -0,0 +1,230 @@
+"""
+Startup Orchestration
+Tracks the initialisation phases run from the FastAPI lifespan (so the
+readiness probe can report them) and produces an import-time breakdown
+equivalent to `python -X importtime` as a startup diagnostic.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+
+
+PHASE_PENDING = "pending"
+PHASE_RUNNING = "running"
+PHASE_READY = "ready"
+PHASE_FAILED = "failed"
+
+
+class StartupTracker:
+    """
+    Runs named startup phases and records their state and duration.
+
+    The service is ready once every required phase has finished
+    successfully; optional phases (diagnostics) never block readiness.
+    """
+
+    def __init__(self):
+        self.started_at = time.time()
+        self.phases: Dict[str, Dict] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _set(self, name: str, **fields):
+        with self._lock:
+            self.phases[name].update(fields)
+
+    def register(self, name: str, required: bool = True):
+        """Declare a phase before it starts so readiness waits for it."""
+        with self._lock:
+            self.phases.setdefault(name, {
+                "status": PHASE_PENDING,
+                "required": required,
+                "duration_ms": None,
+                "error": None
+            })
+
+    def run(self, name: str, func: Callable, *args, required: bool = True):
+        """
+        Run a phase in the calling thread.
+
+        Args:
+            name: Phase name reported by the readiness probe
+            func: Function performing the phase
+            *args: Arguments for func
+            required: Whether readiness waits for this phase
+
+        Returns:
+            Return value of func, or None if it raised
+        """
+        self.register(name, required)
+        self._set(name, status=PHASE_RUNNING)
+        started = time.perf_counter()
+        try:
+            result = func(*args)
+        except Exception as e:
+            self._set(
+                name,
+                status=PHASE_FAILED,
+                duration_ms=round((time.perf_counter() - started) * 1000, 1),
+                error=str(e)
+            )
+            print(f"Startup phase '{name}' failed: {e}")
+            return None
+        self._set(name, status=PHASE_READY, duration_ms=round((time.perf_counter() - started) * 1000, 1))
+        return result
+
+    def run_in_background(self, name: str, func: Callable, *args, required: bool = True) -> threading.Thread:
+        """Run a phase in a daemon thread so it overlaps with other phases."""
+        self.register(name, required)
+        thread = threading.Thread(
+            target=self.run,
+            args=(name, func) + args,
+            kwargs={"required": required},
+            name=f"startup-{name}",
+            daemon=True
+        )
+        thread.start()
+        return thread
+
+    @property
+    def ready(self) -> bool:
+        with self._lock:
+            required = [phase for phase in self.phases.values() if phase["required"]]
+            return bool(required) and all(phase["status"] == PHASE_READY for phase in required)
+
+    def get_status(self) -> Dict:
+        """Get readiness and the state of every phase."""
+        with self._lock:
+            phases = {name: dict(phase) for name, phase in self.phases.items()}
+        return {
+            "ready": self.ready,
+            "uptime_s": round(time.time() - self.started_at, 1),
+            "phases": phases
+        }
+
+
+def parse_importtime(output: str) -> List[Dict]:
+    """
+    Parse the stderr of `python -X importtime`.
+
+    Args:
+        output: Lines such as "import time:       373 |     242345 |   joblib"
+
+    Returns:
+        List of {"module", "self_ms", "cumulative_ms", "depth"} in the order
+        modules finished importing (children before their parent)
+    """
+    entries = []
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3:
+            continue
+        try:
+            self_us = int(fields[0])
+            cumulative_us = int(fields[1])
+        except ValueError:
+            # Header line ("self [us] | cumulative | imported package")
+            continue
+        name = fields[2].rstrip()
+        stripped = name.lstrip(" ")
+        entries.append({
+            "module": stripped,
+            "self_ms": self_us / 1000,
+            "cumulative_ms": cumulative_us / 1000,
+            # importtime indents nested imports by two spaces per level
+            "depth": (len(name) - len(stripped) - 1) // 2
+        })
+    return entries
+
+
+def import_time_breakdown(module: str = "main", top: int = 15, timeout: float = 120.0) -> Dict:
+    """
+    Import a module in a fresh interpreter with -X importtime.
+
+    Args:
+        module: Module to import
+        top: Number of entries in each ranking
+        timeout: Seconds to wait for the child interpreter
+
+    Returns:
+        Total import time of the module, its direct imports ranked by
+        cumulative time and the individual modules with the most self time
+    """
+    # The child resolves imports exactly like this process does
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(path for path in sys.path if path))
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        timeout=timeout,
+        env=env
+    )
+    entries = parse_importtime(completed.stderr)
+    target_index = next(
+        (i for i in range(len(entries) - 1, -1, -1) if entries[i]["module"] == module and entries[i]["depth"] == 0),
+        None
+    )
+    target = entries[target_index] if target_index is not None else None
+
+    # Direct imports of the target are the depth-1 entries logged between
+    # the previous top-level import (e.g. from site) and the target itself
+    direct = []
+    if target_index is not None:
+        for entry in reversed(entries[:target_index]):
+            if entry["depth"] == 0:
+                break
+            if entry["depth"] == 1:
+                direct.append(entry)
+
+    return {
+        "module": module,
+        "returncode": completed.returncode,
+        "total_ms": target["cumulative_ms"] if target else None,
+        "self_ms": target["self_ms"] if target else None,
+        "imports": sorted(direct, key=lambda entry: entry["cumulative_ms"], reverse=True)[:top],
+        "slowest_modules": sorted(entries, key=lambda entry: entry["self_ms"], reverse=True)[:top],
+        "error": completed.stderr.strip().splitlines()[-1] if completed.returncode != 0 and completed.stderr.strip() else None
+    }
+
+
+def format_breakdown(report: Dict) -> str:
+    """Render an import_time_breakdown() report as a text table."""
+    lines = [f"Import of '{report['module']}': {report['total_ms'] or 0:.1f} ms total, {report['self_ms'] or 0:.1f} ms in the module itself"]
+    if report.get("error"):
+        lines.append(f"  import failed: {report['error']}")
+    lines.append("")
+    lines.append(f"{'direct import':<40} {'cumulative ms':>14}")
+    for entry in report["imports"]:
+        lines.append(f"{entry['module']:<40} {entry['cumulative_ms']:>14.1f}")
+    lines.append("")
+    lines.append(f"{'module':<40} {'self ms':>14}")
+    for entry in report["slowest_modules"]:
+        lines.append(f"{entry['module']:<40} {entry['self_ms']:>14.1f}")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Report where import time goes for a module")
+    parser.add_argument("module", nargs="?", default="main", help="Module to import (default: main)")
+    parser.add_argument("--top", type=int, default=15, help="Entries per ranking")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args(argv)
+
+    report = import_time_breakdown(args.module, args.top)
+    print(json.dumps(report, indent=2) if args.json else format_breakdown(report))
+
+
+# Global instance
+startup_tracker = StartupTracker()
+
+
+if __name__ == "__main__":
+    main()
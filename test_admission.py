@@ -0,0 +1,233 @@
+"""
+Test script for /analyze admission control and analysis modes.
+Runs AdmissionController and AdmissionMiddleware on a local event loop,
+and the app in-process with a temporary SQLite database (no server required).
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import main as server
+from admission import ADMIT_FAST, ADMIT_FULL, ADMIT_REJECT, AdmissionController, AdmissionMiddleware
+from database import Base
+from db_models import Blacklist, FraudLog
+from enrichment import EnrichmentQueue
+
+API_HEADERS = {"X-API-KEY": "public123"}
+
+
+def test_limit_queue_and_shedding():
+    """Test the in-flight cap, FIFO hand-off, queue timeout and shedding modes."""
+    print("\n" + "="*60)
+    print("Testing Admission Limits")
+    print("="*60)
+
+    async def scenario():
+        controller = AdmissionController(max_in_flight=2, max_queue=2, queue_timeout=0.2,
+                                         overload_mode=ADMIT_FAST, max_fast_in_flight=1)
+        assert await controller.acquire() == ADMIT_FULL
+        assert await controller.acquire() == ADMIT_FULL
+
+        # Two requests queue; a third finds the queue full and is shed to fast mode
+        first = asyncio.ensure_future(controller.acquire())
+        second = asyncio.ensure_future(controller.acquire())
+        await asyncio.sleep(0)
+        assert controller.queued == 2
+        assert await controller.acquire() == ADMIT_FAST
+        assert await controller.acquire() == ADMIT_REJECT, "Fast mode has its own cap"
+
+        # A release hands the slot to the oldest waiter; the other times out
+        # and, with the fast-mode cap reached, is rejected
+        controller.release(ADMIT_FULL)
+        assert await first == ADMIT_FULL
+        assert await second == ADMIT_REJECT
+        print(f"Statistics: {controller.get_statistics()}")
+        assert controller.in_flight == 2 and controller.queued == 0
+
+        rejecting = AdmissionController(max_in_flight=1, max_queue=0, overload_mode=ADMIT_REJECT)
+        assert await rejecting.acquire() == ADMIT_FULL
+        assert await rejecting.acquire() == ADMIT_REJECT
+        rejecting.release(ADMIT_FULL)
+        assert rejecting.in_flight == 0 and await rejecting.acquire() == ADMIT_FULL
+
+    asyncio.run(scenario())
+    print("\n✅ Admission limits working correctly!")
+    return True
+
+
+def test_middleware():
+    """Test that the middleware marks fast mode and answers 503 with Retry-After."""
+    print("\n" + "="*60)
+    print("Testing Admission Middleware")
+    print("="*60)
+
+    async def scenario():
+        release = asyncio.Event()
+        modes = []
+
+        async def app(scope, receive, send):
+            modes.append(scope.get("state", {}).get("analysis_mode"))
+            await release.wait()
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b"{}"})
+
+        async def call(middleware, path="/analyze"):
+            messages = []
+
+            async def receive():
+                return {"type": "http.request", "body": b""}
+
+            async def send(message):
+                messages.append(message)
+
+            scope = {"type": "http", "method": "POST", "path": path, "headers": []}
+            await middleware(scope, receive, send)
+            return messages[0]["status"], dict(messages[0].get("headers", []))
+
+        controller = AdmissionController(max_in_flight=1, max_queue=0, overload_mode=ADMIT_FAST, max_fast_in_flight=1)
+        middleware = AdmissionMiddleware(app, controller)
+        running = [asyncio.ensure_future(call(middleware)) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        status, headers = await call(middleware)
+        assert status == 503 and headers[b"retry-after"] == b"1"
+        untouched = asyncio.ensure_future(call(middleware, path="/history"))
+        await asyncio.sleep(0.01)
+        release.set()
+        assert [status for status, _ in await asyncio.gather(*running, untouched)] == [200, 200, 200]
+        assert modes == [ADMIT_FULL, ADMIT_FAST, None], modes
+        assert controller.in_flight == 0 and controller.fast_in_flight == 0
+
+    asyncio.run(scenario())
+    print("\n✅ Admission middleware working correctly!")
+    return True
+
+
+@contextmanager
+def isolated_app():
+    """
+    Run the app against a temporary database with inline enrichment.
+
+    Yields a TestClient (without the startup lifespan, so the ML model
+    stays unloaded) and the list that receives sent alerts.
+    """
+    alerts = []
+    controller = server.admission_controller
+    saved_globals = {name: getattr(server, name) for name in ("SessionLocal", "enrichment_queue", "alert_queue")}
+    saved_controller = (controller.in_flight, controller.max_queue, controller.overload_mode)
+    saved_send_alert = server.alert_service.send_alert
+    saved_log_file = server.fraud_logger.log_file
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f"sqlite:///{os.path.join(directory, 'fraud.db')}")
+        Base.metadata.create_all(bind=engine)
+        server.SessionLocal = sessionmaker(bind=engine)
+        server.enrichment_queue = EnrichmentQueue(workers=0)
+        server.alert_queue = EnrichmentQueue(workers=0, name="alerts")
+        server.alert_service.send_alert = lambda **alert: alerts.append(alert)
+        server.fraud_logger.log_file = os.path.join(directory, "fraud_logs.txt")
+        try:
+            yield TestClient(server.app), alerts
+        finally:
+            controller.in_flight, controller.max_queue, controller.overload_mode = saved_controller
+            for name, value in saved_globals.items():
+                setattr(server, name, value)
+            server.alert_service.send_alert = saved_send_alert
+            server.fraud_logger.log_file = saved_log_file
+            engine.dispose()
+
+
+def shed_to_fast_mode():
+    """Take every full-mode slot and forbid queueing, so /analyze is shed to fast mode."""
+    controller = server.admission_controller
+    controller.in_flight, controller.max_queue, controller.overload_mode = controller.max_in_flight, 0, ADMIT_FAST
+
+
+def test_fast_mode_critical():
+    """Test that a Critical result shed to fast mode is still blacklisted and alerted."""
+    print("\n" + "="*60)
+    print("Testing Critical Results in Fast Mode")
+    print("="*60)
+
+    with isolated_app() as (client, alerts):
+        shed_to_fast_mode()
+        try:
+            response = client.post("/analyze", headers=API_HEADERS, json={
+                "phone_number": "+1 (555) 700-4242",
+                "message_content": "URGENT: your bank account is suspended, verify your password now"
+            })
+            body = response.json()
+            print(f"Response: {body['analysis_mode']} {body['risk_level']} {body['risk_score']}")
+            assert response.status_code == 200 and body["analysis_mode"] == "fast"
+            assert body["risk_level"] == "Critical"
+
+            assert [alert["phone_number"] for alert in alerts] == ["+1 (555) 700-4242"], "Fast mode must still alert"
+            db = server.SessionLocal()
+            entry = db.query(Blacklist).one()
+            assert (entry.phone_number, entry.match_type) == ("15557004242", "exact")
+            assert db.query(FraudLog).count() == 0, "Fast mode skips the database log"
+            db.close()
+            deadline = time.time() + 5
+            while server.blacklist_checker.index.match("15557004242") is None and time.time() < deadline:
+                time.sleep(0.01)
+            assert server.blacklist_checker.index.match("15557004242")["match_type"] == "exact"
+        finally:
+            server.blacklist_checker.remove_entry("15557004242", "exact")
+
+    print("\n✅ Critical results in fast mode working correctly!")
+    return True
+
+
+def test_rules_only_while_model_loads():
+    """Test that full analysis scores on rules alone until the ML model has loaded."""
+    print("\n" + "="*60)
+    print("Testing Analysis Before the Model Loads")
+    print("="*60)
+
+    message = "Your account needs verification, reply with your bank details today"
+    saved_pipeline = server.ml_model.pipeline
+    server.ml_model.pipeline = None
+    try:
+        with isolated_app() as (client, _):
+            response = client.post("/analyze", headers=API_HEADERS,
+                                   json={"phone_number": "+1 (555) 700-5151", "message_content": message})
+            body = response.json()
+            print(f"Response: {body['analysis_mode']} {body['risk_score']}")
+            assert response.status_code == 200
+            assert body["analysis_mode"] == "rules_only" and response.headers["X-Analysis-Mode"] == "rules_only"
+
+            shed_to_fast_mode()
+            fast = client.post("/analyze", headers=API_HEADERS,
+                               json={"phone_number": "+1 (555) 700-5252", "message_content": message}).json()
+            assert fast["analysis_mode"] == "fast"
+            assert body["risk_score"] == fast["risk_score"], "Unloaded model must not pull the score below fast mode"
+    finally:
+        server.ml_model.pipeline = saved_pipeline
+
+    print("\n✅ Analysis before the model loads working correctly!")
+    return True
+
+
+def main():
+    """Run all admission control tests."""
+    results = {
+        'limits': test_limit_queue_and_shedding(),
+        'middleware': test_middleware(),
+        'fast_critical': test_fast_mode_critical(),
+        'rules_only': test_rules_only_while_model_loads()
+    }
+
+    passed = sum(results.values())
+    print(f"\nTotal: {passed}/{len(results)} tests passed")
+    if passed != len(results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Test script for tenant-scoped API keys.
+Runs in-process against ApiKeyRegistry with a temporary SQLite database
+(no server required).
+"""
+
+import os
+import sys
+import tempfile
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from api_keys import ApiKeyEntry, ApiKeyRegistry, parse_key_id
+from database import Base
+from db_models import ApiKey
+
+
+def make_registry(directory: str, **kwargs) -> ApiKeyRegistry:
+    engine = create_engine(f"sqlite:///{os.path.join(directory, 'keys.db')}")
+    Base.metadata.create_all(bind=engine)
+    return ApiKeyRegistry(session_factory=sessionmaker(bind=engine), **kwargs)
+
+
+def test_token_bucket():
+    """Test burst capacity, refill and retry-after of the token bucket."""
+    print("\n" + "="*60)
+    print("Testing Token Bucket")
+    print("="*60)
+
+    entry = ApiKeyEntry(1, "abcd1234", "", "acme", "", "public", rate_per_minute=60, burst=3)
+    now = entry.updated
+    assert [entry.take(now) for _ in range(3)] == [0.0, 0.0, 0.0]
+    retry_after = entry.take(now)
+    print(f"Retry after: {retry_after:.2f}s")
+    assert 0.99 < retry_after <= 1.0, "One token per second should be due in a second"
+    assert entry.take(now + 1.0) == 0.0, "Bucket should refill over time"
+    assert entry.take(now + 100.0) == 0.0 and entry.tokens <= 2, "Refill is capped at the burst size"
+
+    # Two workers each enforce half the rate
+    entry = ApiKeyEntry(1, "abcd1234", "", "acme", "", "public", rate_per_minute=60, burst=1)
+    entry.take(entry.updated, rate_scale=0.5)
+    assert 1.99 < entry.take(entry.updated, rate_scale=0.5) <= 2.0
+
+    unlimited = ApiKeyEntry(None, "config-public", "", "default", "", "public", rate_per_minute=0, burst=0)
+    assert all(unlimited.take(now) == 0.0 for _ in range(1000))
+
+    print("\n✅ Token bucket working correctly!")
+    return True
+
+
+def test_keys_quota_and_usage():
+    """Test issuing, verifying, quotas, batched usage flushes and revocation."""
+    print("\n" + "="*60)
+    print("Testing Key Lifecycle")
+    print("="*60)
+
+    with tempfile.TemporaryDirectory() as directory:
+        registry = make_registry(directory, legacy_keys={"public123": "public", "admin123": "admin"})
+        db = registry.session_factory()
+        key, row = registry.create_key(db, "acme", name="integration", rate_per_minute=60, burst=2)
+        print(f"Issued: {row.key_id} for tenant {row.tenant}")
+
+        assert parse_key_id(key) == row.key_id
+        assert row.key_hash != key and key not in row.key_hash, "The key must only be stored hashed"
+        entry = registry.authenticate(key)
+        assert entry is not None and entry.tenant == "acme"
+        assert registry.authenticate(key[:-1] + ("A" if key[-1] != "A" else "B")) is None
+        assert registry.authenticate("fk_00000000_nope") is None
+        assert registry.authenticate("admin123").role == "admin"
+        assert registry.authenticate("public123").tenant == "default"
+
+        assert registry.admit(entry) == 0 and registry.admit(entry) == 0
+        assert registry.admit(entry) > 0, "Third request within the burst window should be rejected"
+        assert registry.pending_usage(row.id) == 2, "Only admitted requests are counted"
+
+        # Another worker sees the key after a reload; bucket state survives reloads
+        other = make_registry(directory)
+        assert other.load() == 1 and other.authenticate(key) is not None
+        registry.load()
+        assert registry.authenticate(key) is entry
+
+        assert registry.flush_usage() == 1
+        assert registry.flush_usage() == 0
+        db.expire_all()
+        stored = db.query(ApiKey).filter(ApiKey.id == row.id).first()
+        assert stored.usage_count == 2 and stored.last_used_at is not None
+
+        registry.revoke_key(db, row.id)
+        assert registry.authenticate(key) is None
+        other.load()
+        assert other.authenticate(key) is None, "Revoked key survived a reload"
+        db.close()
+
+    print("\n✅ API key lifecycle working correctly!")
+    return True
+
+
+def main():
+    """Run all API key tests."""
+    results = {
+        'token_bucket': test_token_bucket(),
+        'lifecycle': test_keys_quota_and_usage()
+    }
+
+    passed = sum(results.values())
+    print(f"\nTotal: {passed}/{len(results)} tests passed")
+    if passed != len(results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""
+Test script for the authentication cache.
+Runs AuthCache, and the user management routes in-process with a temporary
+SQLite database (no server required).
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import auth
+import main as server
+from auth import AuthCache, UserPrincipal, create_access_token
+from config import config
+from database import Base, get_db
+from db_models import User
+
+
+def principal(username: str, role: str = "user") -> UserPrincipal:
+    return UserPrincipal(id=1, username=username, email=f"{username}@example.com", role=role)
+
+
+def test_expiry():
+    """Test that entries expire after the TTL and never outlive the token."""
+    print("\n" + "="*60)
+    print("Testing Auth Cache Expiry")
+    print("="*60)
+
+    cache = AuthCache(ttl_seconds=0.05)
+    cache.put("token-a", principal("alice"))
+    assert cache.get("token-a").username == "alice"
+    time.sleep(0.1)
+    assert cache.get("token-a") is None, "Entry outlived the TTL"
+    assert len(cache) == 0, "Expired entry should be discarded"
+
+    # A long TTL is capped at the token's own exp claim
+    cache = AuthCache(ttl_seconds=300)
+    cache.put("token-b", principal("bob"), token_exp=time.time() + 0.05)
+    cache.put("token-c", principal("carol"), token_exp=time.time() + 300)
+    assert cache.get("token-b") is not None
+    time.sleep(0.1)
+    assert cache.get("token-b") is None, "Entry outlived the token expiry"
+    assert cache.get("token-c").username == "carol"
+
+    # Size bound evicts the least recently used token
+    cache = AuthCache(max_entries=2, ttl_seconds=300)
+    cache.put("t1", principal("u1"))
+    cache.put("t2", principal("u2"))
+    cache.get("t1")
+    cache.put("t3", principal("u3"))
+    assert cache.get("t2") is None and cache.get("t1") is not None and len(cache) == 2
+
+    assert AuthCache(ttl_seconds=0).get("anything") is None
+
+    print("\n✅ Auth cache expiry working correctly!")
+    return True
+
+
+def test_cross_process_invalidation():
+    """Test that touching the invalidation file from another process clears the cache."""
+    print("\n" + "="*60)
+    print("Testing Cross-Process Invalidation")
+    print("="*60)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "auth_cache.invalidate")
+        cache = AuthCache(ttl_seconds=300, invalidation_file=path)
+        cache.put("token-a", principal("alice"))
+        cache.put("token-b", principal("bob"))
+
+        # What manage_users.py does after changing a user
+        subprocess.run(
+            [sys.executable, "-c", "from auth import notify_user_changed; notify_user_changed('alice')"],
+            env={**os.environ, "AUTH_CACHE_INVALIDATION_FILE": path},
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            check=True
+        )
+        assert os.path.exists(path)
+
+        # The file is checked at most once per second
+        cache._last_file_check = time.monotonic()
+        assert cache.get("token-b") is not None, "Checks are rate limited"
+        cache._last_file_check -= 1.0
+        assert cache.get("token-a") is None and cache.get("token-b") is None, "Cache not cleared"
+
+        cache.put("token-a", principal("alice"))
+        cache._last_file_check -= 1.0
+        assert cache.get("token-a") is not None, "Unchanged file must not clear the cache"
+
+    print("\n✅ Cross-process invalidation working correctly!")
+    return True
+
+
+def test_user_changes_invalidate():
+    """Test that role changes and deletions take effect for cached tokens."""
+    print("\n" + "="*60)
+    print("Testing Invalidation on User Changes")
+    print("="*60)
+
+    saved_file = config.AUTH_CACHE_INVALIDATION_FILE
+    saved_cache_file = auth.auth_cache.invalidation_file
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f"sqlite:///{os.path.join(directory, 'users.db')}")
+        Base.metadata.create_all(bind=engine)
+        session_factory = sessionmaker(bind=engine)
+
+        def override_get_db():
+            db = session_factory()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        db = session_factory()
+        for username, role in (("admin", "admin"), ("alice", "user")):
+            db.add(User(username=username, email=f"{username}@example.com", hashed_password="x", role=role))
+        db.commit()
+        db.close()
+
+        server.app.dependency_overrides[get_db] = override_get_db
+        config.AUTH_CACHE_INVALIDATION_FILE = auth.auth_cache.invalidation_file = os.path.join(directory, "invalidate")
+        auth.auth_cache.clear()
+        try:
+            client = TestClient(server.app)
+            admin = {"Authorization": f"Bearer {create_access_token({'sub': 'admin', 'role': 'admin'})}"}
+            alice = {"Authorization": f"Bearer {create_access_token({'sub': 'alice', 'role': 'user'})}"}
+
+            assert client.get("/config", headers=alice).status_code == 403
+            assert client.get("/config", headers=admin).status_code == 200
+            assert len(auth.auth_cache) == 2, "Both principals should be cached"
+
+            # Promotion drops only alice's cached principal
+            response = client.put("/users/alice/role", headers=admin, json={"role": "admin"})
+            assert response.status_code == 200
+            assert len(auth.auth_cache) == 1
+            assert client.get("/config", headers=alice).status_code == 200, "Role change not picked up"
+
+            response = client.delete("/users/alice", headers=admin)
+            assert response.status_code == 200
+            assert client.get("/config", headers=alice).status_code == 401, "Deleted user still authenticated"
+            assert client.get("/config", headers=admin).status_code == 200
+        finally:
+            server.app.dependency_overrides.pop(get_db, None)
+            config.AUTH_CACHE_INVALIDATION_FILE = saved_file
+            auth.auth_cache.invalidation_file = saved_cache_file
+            auth.auth_cache.clear()
+            engine.dispose()
+
+    print("\n✅ Invalidation on user changes working correctly!")
+    return True
+
+
+def main():
+    """Run all auth cache tests."""
+    results = {
+        'expiry': test_expiry(),
+        'cross_process': test_cross_process_invalidation(),
+        'user_changes': test_user_changes_invalidate()
+    }
+
+    passed = sum(results.values())
+    print(f"\nTotal: {passed}/{len(results)} tests passed")
+    if passed != len(results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""
+Test script for prefix and range phone blacklisting.
+Runs in-process against PhonePrefixIndex (no server required).
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from blacklist import BlacklistChecker
+from blacklist_index import PhonePrefixIndex, parse_pattern, range_to_prefixes
+from database import Base
+from db_models import Blacklist
+
+
+def test_parse_patterns():
+    """Test that stored patterns are classified correctly."""
+    print("\n" + "="*60)
+    print("Testing Pattern Parsing")
+    print("="*60)
+
+    assert parse_pattern("555-123-4567") == ("exact", ["5551234567"], None)
+    assert parse_pattern("+1555012*") == ("prefix", ["1555012"], None)
+    assert parse_pattern("15550120-15550129") == ("range", ["1555012"], 8)
+    # A number written with one dash is not a range unless stored as one
+    assert parse_pattern("12345-67890") == ("exact", ["1234567890"], None)
+    assert parse_pattern("12345-67890", "range")[2] == 5
+    assert parse_pattern("9*", "exact") == ("exact", ["9"], None)
+    assert parse_pattern("+1555012", "prefix") == ("prefix", ["1555012"], None)
+    for pattern, match_type in (("555-123-4567", "range"), ("200-100", "range"), ("123", "suffix")):
+        try:
+            parse_pattern(pattern, match_type)
+            assert False, f"{pattern} should not parse as {match_type}"
+        except ValueError:
+            pass
+    assert range_to_prefixes("15550115", "15550132") == [
+        "15550115", "15550116", "15550117", "15550118", "15550119",
+        "1555012", "15550130", "15550131", "15550132"
+    ]
+
+    print("\n✅ Patterns parsed correctly!")
+    return True
+
+
+def test_prefix_and_exact_matching():
+    """Test exact, prefix and range lookups."""
+    print("\n" + "="*60)
+    print("Testing Prefix Index Lookups")
+    print("="*60)
+
+    index = PhonePrefixIndex.build([
+        ("+1555012*", "Rented block"),
+        ("15550129", "Known scammer"),
+        ("44700900000-44700900999", "Carrier block")
+    ])
+
+    exact = index.match("1555-0129")
+    prefix = index.match("+1 (555) 012-3456")
+    in_range = index.match("+44 7009 00123")
+    miss = index.match("+1 555 013 0000")
+
+    print(f"Exact: {exact}")
+    print(f"Prefix: {prefix}")
+    print(f"Range: {in_range}")
+
+    assert exact["match_type"] == "exact", "Exact entry should win over prefix"
+    assert prefix["match_type"] == "prefix" and prefix["pattern"] == "+1555012*"
+    assert in_range["match_type"] == "range"
+    assert miss is None, "Number outside the block should not match"
+
+    index.remove("+1555012*")
+    assert index.match("+1 (555) 012-3456") is None, "Removed prefix still matches"
+
+    # Ranges only cover numbers of their own width
+    assert index.match("+44 7009 001234") is None, "Range must not match longer numbers"
+    assert index.match("+44 7009 0012") is None, "Range must not match shorter numbers"
+    index.add("4470090*", "Wide block")
+    assert index.match("+44 7009 001234")["pattern"] == "4470090*", "Shorter prefix still applies"
+    assert index.match("+44 7009 00123")["match_type"] == "range", "Deeper range wins at its width"
+
+    # Explicit match types: a dashed number stored as exact blocks only itself
+    dashed = PhonePrefixIndex.build([("12345-67890", "Reported", "exact"), ("9*", "Reported", "exact")])
+    assert dashed.match("1234567890")["match_type"] == "exact"
+    assert dashed.match("2000000000") is None and dashed.match("98765") is None
+    assert dashed.match("9")["match_type"] == "exact"
+
+    print("\n✅ Prefix index lookups working correctly!")
+    return True
+
+
+def test_duplicate_add():
+    """Test that adding a stored pattern again does not change the size."""
+    print("\n" + "="*60)
+    print("Testing Duplicate Pattern Adds")
+    print("="*60)
+
+    index = PhonePrefixIndex()
+    index.add("+1555012*", "Rented block")
+    index.add("+1555012*", "Rented block (updated)")
+    index.add("44700900000-44700900999", "Carrier block")
+    index.add("44700900000-44700900999", "Carrier block")
+    index.add("15550129", "Known scammer")
+    index.add("15550129", "Known scammer")
+    print(f"Size after duplicate adds: {index.size}")
+    assert index.size == 3, "Duplicate adds must not grow the index"
+    assert index.match("+1 (555) 012-3456")["reason"] == "Rented block (updated)"
+
+    index.remove("+1555012*")
+    assert index.size == 2
+    assert index.match("+1 (555) 012-3456") is None, "One remove must drop a re-added pattern"
+    index.remove("44700900000-44700900999")
+    index.remove("15550129")
+    assert index.size == 0
+
+    print("\n✅ Duplicate pattern adds handled correctly!")
+    return True
+
+
+def test_background_refresh():
+    """Test that the checker picks up table changes off the request path."""
+    print("\n" + "="*60)
+    print("Testing Background Blacklist Refresh")
+    print("="*60)
+
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f"sqlite:///{os.path.join(directory, 'blacklist.db')}")
+        Base.metadata.create_all(bind=engine)
+        session_factory = sessionmaker(bind=engine)
+
+        checker = BlacklistChecker(refresh_interval=0.05, session_factory=session_factory)
+        checker.reload()
+        assert checker.index.match("1111111111"), "Built-in numbers stay blacklisted"
+        assert checker.index.match("+44 7009 00123") is None
+
+        checker.start()
+        db = session_factory()
+        db.add(Blacklist(phone_number="44700900000-44700900999", reason="Carrier block", match_type="range"))
+        db.add(Blacklist(phone_number="12345-67890", reason="Legacy row"))
+        db.commit()
+        db.close()
+        deadline = time.time() + 5
+        while checker.index.match("+44 7009 00123") is None and time.time() < deadline:
+            time.sleep(0.02)
+        checker.stop()
+
+        assert checker.index.match("+44 7009 00123")["match_type"] == "range"
+        assert checker.index.match("1234567890")["match_type"] == "exact"
+        assert checker.index.match("2000000000") is None, "Legacy dashed number must not load as a range"
+        engine.dispose()
+
+    print("\n✅ Background blacklist refresh working correctly!")
+    return True
+
+
+def main():
+    """Run all blacklist index tests."""
+    results = {
+        'parsing': test_parse_patterns(),
+        'matching': test_prefix_and_exact_matching(),
+        'duplicates': test_duplicate_add(),
+        'refresh': test_background_refresh()
+    }
+
+    passed = sum(results.values())
+    print(f"\nTotal: {passed}/{len(results)} tests passed")
+    if passed != len(results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Test script for near-duplicate campaign clustering.
+Runs in-process against CampaignIndex (no server required).
+"""
+
+import sys
+import time
+
+import numpy as np
+
+import campaign_index
+from campaign_index import CampaignIndex
+
+
+BASE_MESSAGE = "URGENT: your bank account has been suspended. Verify your details at secure-bank-login.com now"
+
+
+def test_near_duplicates_share_cluster():
+    """Test that lightly edited copies of a message join the same campaign."""
+    print("\n" + "="*60)
+    print("Testing Near-Duplicate Clustering")
+    print("="*60)
+
+    index = CampaignIndex()
+    first = index.add(BASE_MESSAGE, "5550001111")
+    second = index.add(BASE_MESSAGE.replace("now", "today"), "5550002222")
+    unrelated = index.add("Hi, are we still meeting for lunch tomorrow at noon?", "5550003333")
+
+    print(f"First: {first}")
+    print(f"Second: {second}")
+    print(f"Unrelated: {unrelated}")
+
+    assert first["matches"] == [], "First message should have no matches"
+    assert second["cluster_id"] == first["cluster_id"], "Near-duplicate not clustered"
+    assert second["cluster_size"] == 2, "Cluster size not updated"
+    assert second["matches"][0]["phone_number"] == "5550001111", "Match sender incorrect"
+    assert unrelated["cluster_id"] != first["cluster_id"], "Unrelated message clustered"
+
+    print("\n✅ Near-duplicates clustered correctly!")
+    return True
+
+
+def test_bounded_and_expiring():
+    """Test that the index enforces its size bound and TTL."""
+    print("\n" + "="*60)
+    print("Testing Size Bound and Expiry")
+    print("="*60)
+
+    index = CampaignIndex(max_entries=3, ttl_seconds=60)
+    for i in range(5):
+        index.add(f"{BASE_MESSAGE} reference {i}", f"555000{i}")
+
+    stats = index.get_statistics()
+    print(f"Statistics: {stats}")
+    assert stats["indexed_messages"] == 3, "Size bound not enforced"
+
+    # Age every entry past the TTL
+    for entry in index.entries.values():
+        entry["added_at"] = time.time() - 120
+    result = index.add("Completely different text about a birthday party", "5559999999")
+
+    assert result["matches"] == [], "Expired entries still matched"
+    assert index.get_statistics()["indexed_messages"] == 1, "Expired entries not removed"
+
+    print("\n✅ Index stays bounded and expires old entries!")
+    return True
+
+
+def test_large_campaign_bounded():
+    """Test that a large campaign keeps per-message work and matches bounded."""
+    print("\n" + "="*60)
+    print("Testing Large Campaign Bounds")
+    print("="*60)
+
+    index = CampaignIndex(max_candidates=20, max_matches=5)
+    compared = []
+    stack = np.stack
+
+    def counting_stack(arrays):
+        compared.append(len(arrays))
+        return stack(arrays)
+
+    # Count the signatures compared per message
+    campaign_index.np.stack = counting_stack
+    try:
+        started = time.perf_counter()
+        for i in range(2000):
+            result = index.add(f"{BASE_MESSAGE} ref {i}", f"55501{i:05d}")
+            assert len(result["matches"]) <= 5, "Matches must be capped at max_matches"
+        elapsed = time.perf_counter() - started
+    finally:
+        campaign_index.np.stack = stack
+
+    print(f"Last result: cluster_size={result['cluster_size']} matches={len(result['matches'])} in {elapsed:.2f}s")
+    assert result["cluster_size"] > 1000, "Copies should keep joining the campaign"
+    assert len(result["matches"]) == 5
+    assert max(compared) <= index.bands * 20, "Candidates per message must be bounded"
+
+    print("\n✅ Large campaigns stay bounded!")
+    return True
+
+
+def test_short_messages_ignored():
+    """Test that empty or tiny messages are not indexed."""
+    index = CampaignIndex()
+    result = index.add("", "5550001111")
+    assert result["cluster_id"] is None, "Empty message should not be indexed"
+    assert index.get_statistics()["indexed_messages"] == 0
+    return True
+
+
+def main():
+    """Run all campaign index tests."""
+    results = {
+        'clustering': test_near_duplicates_share_cluster(),
+        'bounded': test_bounded_and_expiring(),
+        'large_campaign': test_large_campaign_bounded(),
+        'short_messages': test_short_messages_ignored()
+    }
+
+    passed = sum(results.values())
+    print(f"\nTotal: {passed}/{len(results)} tests passed")
+    if passed != len(results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
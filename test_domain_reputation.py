@@ -0,0 +1,98 @@
+"""
+Test script for the domain reputation index.
+Builds index files from feeds in a temporary directory (no server required).
+"""
+
+import os
+import sys
+import tempfile
+
+from domain_reputation import DomainReputationIndex, candidate_domains, import_feeds, parse_feed_line
+
+
+def write_feed(directory: str, name: str, lines) -> str:
+    path = os.path.join(directory, name)
+    with open(path, "w") as f:
+        f.write("\n".join(lines) + "\n")
+    return path
+
+
+def test_feed_parsing():
+    """Test feed line formats and parent domain candidates."""
+    print("\n" + "="*60)
+    print("Testing Feed Parsing")
+    print("="*60)
+
+    assert parse_feed_line("Evil.Example.com.", 90, "phishing") == ("evil.example.com", 90, "phishing")
+    assert parse_feed_line("https://www.bad.xyz/login?x=1", 90, "phishing") == ("bad.xyz", 90, "phishing")
+    assert parse_feed_line("0.0.0.0 ads.tracker.net", 60, "malware") == ("ads.tracker.net", 60, "malware")
+    assert parse_feed_line("shop.example.org,0,Trusted", 90, "phishing") == ("shop.example.org", 0, "trusted")
+    assert parse_feed_line("# comment", 90, "phishing") is None
+    assert parse_feed_line("localhost", 90, "phishing") is None
+    assert candidate_domains("https://a.b.evil.com/path") == ["a.b.evil.com", "b.evil.com", "evil.com"]
+    assert candidate_domains("com") == []
+
+    print("\n✅ Feed lines parsed correctly!")
+    return True
+
+
+def test_import_and_lookup():
+    """Test lookups of domains and parents, merge imports and hot replacement."""
+    print("\n" + "="*60)
+    print("Testing Import and Lookup")
+    print("="*60)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "reputation.db")
+        phishing = write_feed(directory, "phishing.txt", ["secure-login.xyz", "paypa1-verify.com", "# comment"])
+        mixed = write_feed(directory, "mixed.csv", ["example.org,0,trusted", "evil.example.org,95,phishing"])
+
+        result = import_feeds(path, [phishing], score=90, category="phishing")
+        print(f"Import: {result}")
+        assert result["entries"] == 2
+
+        index = DomainReputationIndex(path, risk_weight=0.4, check_interval=0)
+        sub = index.lookup("account.secure-login.xyz")
+        print(f"Subdomain: {sub}")
+        assert sub["matched_domain"] == "secure-login.xyz" and sub["category"] == "phishing"
+        assert index.lookup("secure-login.com") is None
+
+        # Merge a second feed; the most specific listed domain wins
+        import_feeds(path, [mixed])
+        assert index.lookup("www.example.org")["category"] == "trusted"
+        assert index.lookup("a.evil.example.org")["score"] == 95
+        assert index.lookup("paypa1-verify.com") is not None, "Merge import dropped existing entries"
+
+        check = index.check(["example.org", "login.paypa1-verify.com"])
+        print(f"Check: {check}")
+        assert check["risk_boost"] == 36 and len(check["matches"]) == 2
+        assert "paypa1-verify.com" in check["reason"]
+
+        # A replacing import is picked up by the open index
+        import_feeds(path, [mixed], replace=True)
+        assert index.lookup("paypa1-verify.com") is None
+        assert index.get_statistics()["entries"] == "2"
+
+    missing = DomainReputationIndex(os.path.join(tempfile.gettempdir(), "no-such-index.db"))
+    assert missing.lookup("secure-login.xyz") is None
+    assert missing.check(["secure-login.xyz"])["risk_boost"] == 0
+
+    print("\n✅ Domain reputation lookups working correctly!")
+    return True
+
+
+def main():
+    """Run all domain reputation tests."""
+    results = {
+        'parsing': test_feed_parsing(),
+        'lookup': test_import_and_lookup()
+    }
+
+    passed = sum(results.values())
+    print(f"\nTotal: {passed}/{len(results)} tests passed")
+    if passed != len(results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Test script for the deferred enrichment queue.
+Runs EnrichmentQueue in-process (no server required).
+"""
+
+import sys
+import threading
+import time
+
+from enrichment import EnrichmentQueue
+
+
+def test_ordering_per_key():
+    """Test that jobs for one key run in order while other keys run in parallel."""
+    print("\n" + "="*60)
+    print("Testing Per-Key Ordering")
+    print("="*60)
+
+    enrichment = EnrichmentQueue(workers=4, max_queue=1000)
+    enrichment.start()
+    seen = {}
+    lock = threading.Lock()
+
+    def record(key, sequence):
+        time.sleep(0.0005)
+        with lock:
+            seen.setdefault(key, []).append(sequence)
+
+    keys = [f"+1555000{n:04d}" for n in range(8)]
+    for sequence in range(25):
+        for key in keys:
+            assert enrichment.submit(key, record, key, sequence)
+    enrichment.join()
+
+    assert all(seen[key] == list(range(25)) for key in keys), "Jobs for a key ran out of order"
+    assert len({enrichment._shard(key) for key in keys}) > 1, "Keys should spread over workers"
+    print(f"Statistics: {enrichment.get_statistics()}")
+    assert enrichment.get_statistics()["jobs"]["completed"] == 200
+
+    enrichment.stop()
+    print("\n✅ Per-key ordering working correctly!")
+    return True
+
+
+def test_overflow_failures_and_shutdown():
+    """Test handing jobs to the overflow pool on a full queue, failing jobs, inline mode and draining on stop."""
+    print("\n" + "="*60)
+    print("Testing Overflow and Shutdown")
+    print("="*60)
+
+    gate = threading.Event()
+    done = []
+    enrichment = EnrichmentQueue(workers=1, max_queue=2)
+    enrichment.start()
+    enrichment.submit("a", gate.wait)
+    time.sleep(0.05)
+    assert enrichment.submit("a", done.append, 1) and enrichment.submit("a", done.append, 2)
+
+    # A full queue must neither block the caller nor run the job on its thread
+    caller = threading.get_ident()
+    overflow_threads = []
+    started = time.perf_counter()
+    assert not enrichment.submit("a", lambda: overflow_threads.append(threading.get_ident()))
+    assert time.perf_counter() - started < 0.02, "Submit must not wait on a full queue"
+    assert enrichment.pending == 2
+
+    def fail():
+        raise RuntimeError("boom")
+
+    gate.set()
+    enrichment.join()
+    assert enrichment.submit("a", fail)
+    enrichment.submit("a", done.append, 3)
+    enrichment.stop()
+    assert overflow_threads and overflow_threads[0] != caller, "Overflow job must run on the overflow pool"
+    assert done == [1, 2, 3], "A failing job must not stop the worker"
+    assert enrichment.get_statistics()["jobs"] == {"completed": 5, "failed": 1, "overflow": 1}
+
+    inline = EnrichmentQueue(workers=0)
+    inline.submit("b", done.append, 4)
+    assert done[-1] == 4, "workers=0 should run jobs inline"
+
+    print("\n✅ Overflow and shutdown working correctly!")
+    return True
+
+
+def main():
+    """Run all enrichment queue tests."""
+    results = {
+        'ordering': test_ordering_per_key(),
+        'overflow': test_overflow_failures_and_shutdown()
+    }
+
+    passed = sum(results.values())
+    print(f"\nTotal: {passed}/{len(results)} tests passed")
+    if passed != len(results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
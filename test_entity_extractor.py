@@ -0,0 +1,88 @@
+"""
+Test script for entity extraction from messages.
+Runs in-process against EntityExtractor (no server required).
+"""
+
+import sys
+
+from entity_extractor import EntityExtractor
+
+
+def extract_pairs(message: str):
+    return [(entity["type"], entity["value"]) for entity in EntityExtractor().extract(message)]
+
+
+def test_urls_emails_and_handles():
+    """Test that URLs, domains, emails and UPI handles are extracted and normalised."""
+    print("\n" + "="*60)
+    print("Testing URL, Email and UPI Extraction")
+    print("="*60)
+
+    pairs = extract_pairs(
+        "URGENT: verify at https://Secure-Login.example.xyz/verify?id=9#top or www.PayPal-help.com. "
+        "Pay the fee to refund.desk@okaxis. Questions: support@bank-help.co.uk"
+    )
+    print(f"Entities: {pairs}")
+
+    assert pairs == [
+        ("url", "https://secure-login.example.xyz/verify?id=9"),
+        ("domain", "secure-login.example.xyz"),
+        ("url", "http://www.paypal-help.com"),
+        ("domain", "paypal-help.com"),
+        ("upi", "refund.desk@okaxis"),
+        ("email", "support@bank-help.co.uk")
+    ], "Extraction incorrect"
+    assert extract_pairs("Your account.Now act fast, e.g. today") == [], "Sentence text taken for a domain"
+    assert extract_pairs("visit bank-login.top/secure") == [("domain", "bank-login.top")], "Bare domain missed"
+
+    print("\n✅ URLs, emails and handles extracted!")
+    return True
+
+
+def test_payment_identifiers_are_validated():
+    """Test that IBANs and wallets are extracted only with valid checksums."""
+    print("\n" + "="*60)
+    print("Testing IBAN and Wallet Extraction")
+    print("="*60)
+
+    pairs = extract_pairs(
+        "Transfer to GB82 WEST 1234 5698 7654 32 or DE89370400440532013000. "
+        "BTC 1BvBMSEYstWetqTFn5Au4m4GFg7xJaNVN2 / bc1qar0srrr7xfkvy5l643lydnw9re59gtzzwf5mdq, "
+        "ETH 0x742d35Cc6634C0532925a3b844Bc454e4438f44e, TRX TJCnKsPa7y5okkXvQAidZBzqx3QyQ6sxMW"
+    )
+    print(f"Entities: {pairs}")
+
+    assert pairs == [
+        ("iban", "GB82WEST12345698765432"),
+        ("iban", "DE89370400440532013000"),
+        ("wallet", "1BvBMSEYstWetqTFn5Au4m4GFg7xJaNVN2"),
+        ("wallet", "bc1qar0srrr7xfkvy5l643lydnw9re59gtzzwf5mdq"),
+        ("wallet", "0x742d35cc6634c0532925a3b844bc454e4438f44e"),
+        ("wallet", "TJCnKsPa7y5okkXvQAidZBzqx3QyQ6sxMW")
+    ], "Extraction incorrect"
+
+    # One changed character breaks each checksum
+    invalid = extract_pairs(
+        "GB82 WEST 1234 5698 7654 33 1BvBMSEYstWetqTFn5Au4m4GFg7xJaNVN3 bc1qar0srrr7xfkvy5l643lydnw9re59gtzzwf5mdp"
+    )
+    assert invalid == [], f"Invalid identifiers accepted: {invalid}"
+
+    print("\n✅ Payment identifiers validated!")
+    return True
+
+
+def main():
+    """Run all entity extraction tests."""
+    results = {
+        'urls_emails_handles': test_urls_emails_and_handles(),
+        'payment_identifiers': test_payment_identifiers_are_validated()
+    }
+
+    passed = sum(results.values())
+    print(f"\nTotal: {passed}/{len(results)} tests passed")
+    if passed != len(results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Test script for fraud ring detection.
+Runs in-process against FraudKnowledgeGraph (no server required).
+"""
+
+import sys
+
+from graph_service import FraudKnowledgeGraph
+from graph_snapshot import GraphSnapshot
+from graph_communities import label_propagation, summarize_components, summarize_groups
+
+
+def build_two_rings() -> FraudKnowledgeGraph:
+    """Two triangles joined by one weak edge, plus a shared pattern hub."""
+    graph = FraudKnowledgeGraph()
+    ring_a = ["5550000001", "5550000002", "5550000003"]
+    ring_b = ["5550000004", "5550000005", "5550000006"]
+    for phone in ring_a:
+        graph.add_entity("phone", phone, 90)
+    for phone in ring_b:
+        graph.add_entity("phone", phone, 40)
+    for ring in (ring_a, ring_b):
+        for i, source in enumerate(ring):
+            for target in ring[i + 1:]:
+                graph.add_relationship(source, target, "same_campaign", 1.0)
+        for phone in ring:
+            graph.add_relationship(phone, "pattern:urgency", "exhibits_pattern", 0.8)
+    graph.add_entity("phone", "5550000009", 10)
+    return graph
+
+
+def test_components_ignore_pattern_hubs():
+    """Test that union-find components follow entity links only."""
+    print("\n" + "="*60)
+    print("Testing Connected Components")
+    print("="*60)
+
+    graph = build_two_rings()
+    result = summarize_components(graph)
+    print(f"Components: {result}")
+
+    assert result["total_components"] == 3, "Pattern hub merged the rings"
+    first = result["components"][0]
+    assert first["size"] == 3 and first["total_risk"] == 270, "Highest-risk ring not first"
+    assert first["top_members"][0]["risk_score"] == 90, "Top member incorrect"
+
+    graph.add_relationship("5550000003", "5550000004", "same_campaign", 0.1)
+    result = summarize_components(graph)
+    assert result["components"][0]["size"] == 6, "Union not applied incrementally"
+
+    print("\n✅ Components correct!")
+    return True
+
+
+def test_label_propagation_splits_weak_bridge():
+    """Test that communities separate rings joined by a weak edge."""
+    print("\n" + "="*60)
+    print("Testing Label Propagation Communities")
+    print("="*60)
+
+    graph = build_two_rings()
+    graph.add_relationship("5550000003", "5550000004", "same_campaign", 0.1)
+    snapshot = GraphSnapshot.build(graph)
+    result = label_propagation(snapshot, excluded_relationships=("exhibits_pattern",))
+    summary = summarize_groups(result["labels"], snapshot.risk, snapshot.node_type, snapshot.node_values)
+    print(f"Iterations: {result['iterations']}")
+    print(f"Communities: {summary['groups']}")
+
+    sizes = sorted(group["size"] for group in summary["groups"])
+    assert sizes == [3, 3], "Rings not split into two communities"
+    assert summary["groups"][0]["total_risk"] == 270, "Community risk incorrect"
+
+    print("\n✅ Communities correct!")
+    return True
+
+
+def main():
+    """Run all fraud ring detection tests."""
+    results = {
+        'components': test_components_ignore_pattern_hubs(),
+        'communities': test_label_propagation_splits_weak_bridge()
+    }
+
+    passed = sum(results.values())
+    print(f"\nTotal: {passed}/{len(results)} tests passed")
+    if passed != len(results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Test script for knowledge graph edge decay and pruning.
+Runs in-process against FraudKnowledgeGraph (no server required).
+"""
+
+import sys
+import time
+
+import numpy as np
+
+from graph_service import FraudKnowledgeGraph, UnionFind
+from graph_snapshot import GraphSnapshot
+
+DAY = 24 * 3600
+
+
+def test_edge_decay():
+    """Test that edge weights decay lazily and reinforcement starts from the decayed weight."""
+    print("\n" + "="*60)
+    print("Testing Edge Weight Decay")
+    print("="*60)
+
+    graph = FraudKnowledgeGraph(edge_half_life=7 * DAY)
+    graph.add_relationship("5550001111", "5550002222", "same_campaign", 0.8)
+    edge = graph.edges[0]
+    later = time.time() + 14 * DAY
+
+    weight = graph.effective_weight(edge, now=later)
+    print(f"Weight after two half-lives: {weight:.3f}")
+    assert abs(weight - 0.2) < 1e-3, "Weight did not halve twice"
+
+    # Pretend the edge was last reinforced two half-lives ago
+    updated = time.time() - 14 * DAY
+    graph.edge_updated[0] = updated
+    edge["updated_at"] = time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(updated))
+    graph.add_relationship("5550001111", "5550002222", "same_campaign", 0.8)
+    print(f"Weight after reinforcement: {edge['weight']:.3f}")
+    assert abs(edge["weight"] - 0.3) < 1e-2, "Reinforcement did not start from the decayed weight"
+
+    snapshot = GraphSnapshot.build(graph)
+    assert abs(float(snapshot.weights[0]) - edge["weight"]) < 1e-3, "Snapshot weight not decayed"
+
+    print("\n✅ Edge decay correct!")
+    return True
+
+
+def test_prune_renumbers_consistently():
+    """Test that pruning removes stale data and leaves ids, arrays and components consistent."""
+    print("\n" + "="*60)
+    print("Testing Graph Pruning")
+    print("="*60)
+
+    graph = FraudKnowledgeGraph(edge_half_life=7 * DAY)
+    for i in range(8):
+        graph.add_entity("phone", f"55500000{i:02d}", 10 * i)
+    for i in range(7):
+        graph.add_relationship(f"55500000{i:02d}", f"55500000{i + 1:02d}", "same_campaign", 0.9)
+        graph.add_relationship(f"55500000{i:02d}", "pattern:urgency", "exhibits_pattern", 0.8)
+
+    # Phones 0-2 were last seen long ago; the edge 5-6 has decayed away
+    now = time.time()
+    for i in range(3):
+        graph.node_seen[graph.node_index[f"55500000{i:02d}"]] = now - 100 * DAY
+    graph.edge_updated[graph._edge_index[("5550000005", "5550000006", "same_campaign")]] = now - 60 * DAY
+
+    result = graph.prune(min_weight=0.05, node_ttl=90 * DAY)
+    print(f"Prune: {result}")
+
+    assert result["nodes_removed"] == 3, "Stale entities not removed"
+    assert "5550000000" not in graph.nodes and "5550000003" in graph.nodes, "Wrong entities removed"
+    assert ("5550000005", "5550000006", "same_campaign") not in graph._edge_index, "Decayed edge kept"
+    assert all(graph.node_values[graph.node_index[value]] == value for value in graph.node_values), "Index inconsistent"
+    for position, edge in enumerate(graph.edges):
+        assert graph.node_values[graph.edge_src[position]] == edge["source"], "Edge arrays inconsistent"
+        assert graph._edge_index[(edge["source"], edge["target"], edge["relationship_type"])] == position
+
+    # Components: {3, 4, 5} and {6, 7}; the pattern hub joins nothing
+    labels = graph.components.labels()
+    ids = [graph.node_index[f"55500000{i:02d}"] for i in range(3, 8)]
+    assert labels[ids[0]] == labels[ids[2]] != labels[ids[3]] == labels[ids[4]], "Components not rebuilt"
+    assert graph.components.count == 3, "Component count incorrect"
+
+    # Incremental updates keep working after renumbering
+    graph.add_relationship("5550000005", "5550000006", "same_campaign", 0.9)
+    labels = graph.components.labels()
+    assert labels[ids[0]] == labels[ids[4]], "Union after prune failed"
+    snapshot = GraphSnapshot.build(graph)
+    assert snapshot.generation == graph.generation == 1, "Generation not advanced"
+    assert snapshot.num_edges == len(graph.edges), "Snapshot edge count incorrect"
+
+    print("\n✅ Pruning correct!")
+    return True
+
+
+def test_prune_max_nodes():
+    """Test that the entity cap keeps the most recently seen entities."""
+    print("\n" + "="*60)
+    print("Testing Entity Cap")
+    print("="*60)
+
+    graph = FraudKnowledgeGraph()
+    now = time.time()
+    for i in range(10):
+        graph.add_entity("phone", f"55511100{i:02d}", 50)
+        graph.node_seen[i] = now - (10 - i)
+    result = graph.prune(max_nodes=4)
+    print(f"Prune: {result}")
+    assert sorted(graph.nodes) == [f"55511100{i:02d}" for i in range(6, 10)], "Wrong entities kept"
+
+    # Vectorised components match incremental union-find
+    rng = np.random.default_rng(1)
+    src, dst = rng.integers(0, 200, 150), rng.integers(0, 200, 150)
+    incremental = UnionFind()
+    for _ in range(200):
+        incremental.add()
+    for a, b in zip(src, dst):
+        incremental.union(int(a), int(b))
+    rebuilt = UnionFind.from_edges(200, src.astype(np.int32), dst.astype(np.int32))
+    assert rebuilt.count == incremental.count, "Component count differs"
+    assert len(set(zip(incremental.labels(), rebuilt.labels()))) == incremental.count, "Partitions differ"
+
+    print("\n✅ Entity cap correct!")
+    return True
+
+
+def main():
+    """Run all retention tests."""
+    results = {
+        'decay': test_edge_decay(),
+        'prune': test_prune_renumbers_consistently(),
+        'max_nodes': test_prune_max_nodes()
+    }
+
+    passed = sum(results.values())
+    print(f"\nTotal: {passed}/{len(results)} tests passed")
+    if passed != len(results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
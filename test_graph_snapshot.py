@@ -0,0 +1,227 @@
+"""
+Test script for the knowledge graph analytics snapshot.
+Runs in-process against FraudKnowledgeGraph (no server required).
+"""
+
+import sys
+
+import numpy as np
+
+from graph_service import FraudKnowledgeGraph
+from graph_snapshot import GraphSnapshot, GraphSnapshotManager
+from graph_pagerank import PageRankScorer
+
+
+def build_sample_graph() -> FraudKnowledgeGraph:
+    graph = FraudKnowledgeGraph()
+    graph.add_entity("phone", "5550001111", 90)
+    graph.add_entity("phone", "5550002222", 20)
+    graph.add_entity("phone", "5550003333", 10)
+    graph.add_entity("phone", "5550004444", 50)
+    graph.add_relationship("5550001111", "5550002222", "same_campaign", 1.0)
+    graph.add_relationship("5550002222", "5550003333", "same_campaign", 1.0)
+    graph.add_relationship("5550001111", "pattern:urgency", "exhibits_pattern", 0.8)
+    return graph
+
+
+def test_snapshot_matches_graph():
+    """Test that snapshot adjacency and statistics match the graph."""
+    print("\n" + "="*60)
+    print("Testing Snapshot Structure")
+    print("="*60)
+
+    graph = build_sample_graph()
+    snapshot = GraphSnapshot.build(graph)
+    stats = snapshot.get_statistics()
+    print(f"Statistics: {stats}")
+
+    first = snapshot.index_of("5550001111")
+    neighbours = {snapshot.node_values[i] for i in snapshot.neighbors(first)}
+    assert neighbours == {"5550002222", "pattern:urgency"}, "Adjacency incorrect"
+    assert snapshot.index_of("unknown") is None, "Unknown entity resolved"
+
+    expected = graph.get_statistics()
+    for key in ("total_nodes", "total_edges", "high_risk_nodes", "medium_risk_nodes", "low_risk_nodes"):
+        assert stats[key] == expected[key], f"{key} differs from graph statistics"
+    assert stats["degree"]["max"] == 2, "Degree statistics incorrect"
+    assert stats["degree"]["isolated"] == 1, "Isolated node not counted"
+
+    print("\n✅ Snapshot matches graph!")
+    return True
+
+
+def test_vectorised_propagation():
+    """Test that vectorised propagation matches the graph walk."""
+    print("\n" + "="*60)
+    print("Testing Vectorised Risk Propagation")
+    print("="*60)
+
+    graph = build_sample_graph()
+    propagated = GraphSnapshot.build(graph).propagate_risk(["5550001111"], decay_factor=0.7)
+    graph.propagate_risk("5550001111", decay_factor=0.7)
+
+    for value in ("5550002222", "5550003333", "5550004444"):
+        node_id = graph.node_index[value]
+        print(f"{value}: snapshot={propagated[node_id]} graph={graph.nodes[value]['risk_score']}")
+        assert propagated[node_id] == graph.nodes[value]["risk_score"], f"Propagation differs for {value}"
+
+    print("\n✅ Vectorised propagation matches!")
+    return True
+
+
+def test_incremental_refresh():
+    """Test that attribute-only changes reuse the adjacency arrays."""
+    print("\n" + "="*60)
+    print("Testing Incremental Refresh")
+    print("="*60)
+
+    graph = build_sample_graph()
+    manager = GraphSnapshotManager(graph)
+    first = manager.get()
+
+    graph.add_entity("phone", "5550002222", 80)
+    graph.add_relationship("5550001111", "5550002222", "same_campaign")
+    second = manager.refresh()
+    assert second.indices is first.indices, "Adjacency rebuilt for attribute change"
+    assert second.risk[second.index_of("5550002222")] == 80, "Risk not refreshed"
+    assert np.isclose(second.weights.max(), 1.0), "Weights not refreshed"
+
+    graph.add_relationship("5550003333", "5550004444", "same_campaign", 0.5)
+    third = manager.refresh()
+    assert third.indices is not second.indices, "Adjacency not rebuilt for new edge"
+    assert third.num_edges == 4, "New edge missing"
+    assert manager.refresh() is third, "Unchanged graph rebuilt"
+
+    print("\n✅ Incremental refresh works!")
+    return True
+
+
+def test_pagerank_scores():
+    """Test that PageRank scores decay with distance from confirmed fraud."""
+    print("\n" + "="*60)
+    print("Testing Personalized PageRank Scores")
+    print("="*60)
+
+    graph = build_sample_graph()
+    manager = GraphSnapshotManager(graph)
+    scorer = PageRankScorer(manager, seed_min_risk=86)
+    scorer.update(manager.get())
+    scores = {value: scorer.score(value) for value in ("5550001111", "5550002222", "5550003333", "5550004444")}
+    print(f"Scores: {scores} run: {scorer.last_run}")
+
+    assert scores["5550002222"] > scores["5550003333"] > 0, "Score should decay with distance"
+    assert scores["5550004444"] == 0, "Disconnected node scored"
+    assert scorer.score("unknown") == 0, "Unknown entity scored"
+
+    graph.add_relationship("5550003333", "5550004444", "same_campaign", 1.0)
+    scorer.update(manager.refresh())
+    assert scorer.score("5550004444") > 0, "New edge not reflected"
+    assert scorer.last_run["iterations"] > 0, "Warm start did not run"
+
+    print("\n✅ PageRank scores correct!")
+    return True
+
+
+def check_visualization(graph: FraudKnowledgeGraph, limit: int):
+    """Compare against a full sort of every node and a scan of every edge."""
+    payload = graph.get_graph_data_for_visualization(limit)
+    expected = sorted((node["risk_score"] for node in graph.nodes.values()), reverse=True)[:limit]
+    assert [node["risk_score"] for node in payload["nodes"]] == expected, f"Top {limit} risk scores differ"
+    # Equal scores at the cut-off may be ordered differently; edges must match the chosen nodes
+    ids = {node["id"] for node in payload["nodes"]}
+    expected_edges = [(edge["source"], edge["target"]) for edge in graph.edges if edge["source"] in ids and edge["target"] in ids]
+    assert [(edge["source"], edge["target"]) for edge in payload["edges"]] == expected_edges, "Edges differ"
+    return payload
+
+
+def test_top_risk_visualization():
+    """Test that the top-k index and payload cache match a full sort and scan."""
+    print("\n" + "="*60)
+    print("Testing Top-Risk Visualization")
+    print("="*60)
+
+    graph = FraudKnowledgeGraph(top_risk_capacity=20)
+    rng = np.random.default_rng(3)
+    for step in range(400):
+        phone = f"555{rng.integers(0, 60):07d}"
+        graph.add_entity("phone", phone, int(rng.integers(0, 100)))
+        if step % 3 == 0:
+            graph.add_relationship(phone, f"555{rng.integers(0, 60):07d}", "same_campaign", 0.9)
+        if step % 7 == 0:
+            graph.propagate_risk(phone)
+
+        if step % 50 == 49:
+            for limit in (5, 20, 35):
+                check_visualization(graph, limit)
+
+    first = graph.get_graph_data_for_visualization(10)
+    assert graph.get_graph_data_for_visualization(10) is first, "Payload not cached"
+    graph.add_entity("phone", "5559999999", 100)
+    updated = graph.get_graph_data_for_visualization(10)
+    assert updated is not first and updated["nodes"][0]["id"] == "5559999999", "Cache not invalidated"
+
+    graph.prune(max_nodes=30)
+    payload = check_visualization(graph, 20)
+    print(f"Top nodes: {[node['id'] for node in payload['nodes'][:3]]}, edges: {len(payload['edges'])}")
+
+    print("\n✅ Top-risk visualization correct!")
+    return True
+
+
+def test_ego_network():
+    """Test breadth-first ego networks with filters and early stopping."""
+    print("\n" + "="*60)
+    print("Testing Ego Network Queries")
+    print("="*60)
+
+    graph = build_sample_graph()
+    records = list(graph.iter_ego_network("5550001111", depth=2))
+    nodes = [(record["id"], record["depth"]) for record in records if record["type"] == "node"]
+    print(f"Nodes: {nodes}")
+    assert nodes == [("5550001111", 0), ("5550002222", 1), ("pattern:urgency", 1), ("5550003333", 2)], "BFS order incorrect"
+    assert records[-1] == {"type": "summary", "nodes": 4, "edges": 3, "truncated": False}, "Summary incorrect"
+
+    filtered = [record["id"] for record in graph.iter_ego_network("5550001111", relationship_types=["exhibits_pattern"])
+                if record["type"] == "node"]
+    assert filtered == ["5550001111", "pattern:urgency"], "Type filter not applied"
+    weighted = [record["id"] for record in graph.iter_ego_network("5550001111", min_weight=0.9) if record["type"] == "node"]
+    assert "pattern:urgency" not in weighted, "Weight filter not applied"
+    assert [node["id"] for node in graph.get_connected_entities("5550001111")] == \
+        ["5550001111", "5550002222", "5550003333"], "Connected entities incorrect"
+
+    # A hub with many neighbours stops after the limit
+    for i in range(5000):
+        graph.add_relationship("5550004444", f"556{i:07d}", "same_campaign", 0.5)
+    records = list(graph.iter_ego_network("5550004444", depth=3, max_nodes=50))
+    node_records = [record for record in records if record["type"] == "node"]
+    assert len(node_records) == 50 and records[-1]["truncated"], "Limit not enforced"
+    seen = set()
+    for record in records[:-1]:
+        if record["type"] == "node":
+            seen.add(record["id"])
+        else:
+            assert record["source"] in seen and record["target"] in seen, "Edge before its endpoints"
+
+    print("\n✅ Ego network queries correct!")
+    return True
+
+
+def main():
+    """Run all graph snapshot tests."""
+    results = {
+        'structure': test_snapshot_matches_graph(),
+        'propagation': test_vectorised_propagation(),
+        'incremental': test_incremental_refresh(),
+        'pagerank': test_pagerank_scores(),
+        'visualization': test_top_risk_visualization(),
+        'ego_network': test_ego_network()
+    }
+
+    passed = sum(results.values())
+    print(f"\nTotal: {passed}/{len(results)} tests passed")
+    if passed != len(results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Test script for knowledge graph persistence.
+Runs in-process against GraphStore in a temporary directory (no server required).
+"""
+
+import os
+import sys
+import tempfile
+
+from graph_service import FraudKnowledgeGraph
+from graph_store import GraphStore, LOG_FILE, SNAPSHOT_FILE
+
+
+def graph_state(graph: FraudKnowledgeGraph):
+    nodes = {value: (node["risk_score"], node["incident_count"], node["created_at"]) for value, node in graph.nodes.items()}
+    edges = {(e["source"], e["target"], e["relationship_type"]): round(e["weight"], 6) for e in graph.edges}
+    return nodes, edges
+
+
+def populate(graph: FraudKnowledgeGraph):
+    graph.add_entity("phone", "5550001111", 90)
+    graph.add_entity("phone", "5550002222", 20)
+    graph.add_entity("phone", "5550002222", 40)
+    graph.add_relationship("5550001111", "5550002222", "same_campaign", 0.6)
+    graph.add_relationship("5550001111", "5550002222", "same_campaign", 0.6)
+    graph.add_relationship("5550001111", "pattern:urgency", "exhibits_pattern", 0.8)
+    graph.propagate_risk("5550001111", decay_factor=0.7)
+
+
+def test_log_replay():
+    """Test that a restart restores the graph from the log."""
+    print("\n" + "="*60)
+    print("Testing Log Replay")
+    print("="*60)
+
+    with tempfile.TemporaryDirectory() as directory:
+        graph = FraudKnowledgeGraph()
+        store = GraphStore(directory)
+        store.load(graph)
+        populate(graph)
+        store.close()
+
+        restored = FraudKnowledgeGraph()
+        result = GraphStore(directory).load(restored)
+        print(f"Load: {result}")
+
+        assert graph_state(restored) == graph_state(graph), "Restored graph differs"
+        assert restored.components.find(restored.node_index["5550001111"]) == \
+            restored.components.find(restored.node_index["5550002222"]), "Components not restored"
+
+    print("\n✅ Log replay restores the graph!")
+    return True
+
+
+def test_compaction_and_torn_tail():
+    """Test that compaction drops the log and a torn final record is ignored."""
+    print("\n" + "="*60)
+    print("Testing Compaction and Torn Records")
+    print("="*60)
+
+    with tempfile.TemporaryDirectory() as directory:
+        graph = FraudKnowledgeGraph()
+        store = GraphStore(directory)
+        store.load(graph)
+        populate(graph)
+        result = store.compact()
+        print(f"Compaction: {result}")
+        assert os.path.getsize(os.path.join(directory, LOG_FILE)) == 0, "Log not rotated"
+
+        graph.add_entity("phone", "5550003333", 55)
+        store.close()
+        expected = graph_state(graph)
+
+        # Simulate a crash in the middle of writing a record
+        with open(os.path.join(directory, LOG_FILE), "ab") as f:
+            f.write(b"\x40\x00\x00\x00\x01\x02")
+
+        restored = FraudKnowledgeGraph()
+        result = GraphStore(directory).load(restored)
+        print(f"Load: {result}")
+
+        assert result["snapshot_records"] > 0 and result["log_records"] == 1, "Snapshot or log not used"
+        assert graph_state(restored) == expected, "Restored graph differs"
+        assert os.path.exists(os.path.join(directory, SNAPSHOT_FILE)), "Snapshot missing"
+
+    print("\n✅ Compaction and torn-record recovery work!")
+    return True
+
+
+def main():
+    """Run all graph persistence tests."""
+    results = {
+        'replay': test_log_replay(),
+        'compaction': test_compaction_and_torn_tail()
+    }
+
+    passed = sum(results.values())
+    print(f"\nTotal: {passed}/{len(results)} tests passed")
+    if passed != len(results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
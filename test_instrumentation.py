@@ -0,0 +1,105 @@
+"""
+Test script for per-stage request instrumentation.
+Runs StageTimer against the in-process metrics registry with a fake clock
+(no server required).
+"""
+
+import sys
+from unittest import mock
+
+import instrumentation
+from instrumentation import (
+    ANALYZE_DURATION_SECONDS,
+    ANALYZE_STAGE_SECONDS,
+    StageTimer,
+    parse_server_timing
+)
+from metrics import registry
+
+
+def fake_clock(*readings_ms):
+    """Patch perf_counter_ns to return the given readings (milliseconds) in order."""
+    readings = iter(int(ms * 1e6) for ms in readings_ms)
+    return mock.patch.object(instrumentation, "perf_counter_ns", side_effect=lambda: next(readings))
+
+
+def test_histograms():
+    """Test that publish() records each stage and the total."""
+    print("\n" + "="*60)
+    print("Testing Stage Histograms")
+    print("="*60)
+
+    detection_before = ANALYZE_STAGE_SECONDS.snapshot("test_detection")
+    ml_before = ANALYZE_STAGE_SECONDS.snapshot("test_ml")
+    total_before = ANALYZE_DURATION_SECONDS.snapshot()
+
+    with fake_clock(1000, 1002, 1007.5):
+        timer = StageTimer()
+        timer.mark("test_detection")
+        timer.mark("test_ml")
+
+    assert timer.to_dict() == {"test_detection": 2.0, "test_ml": 5.5}
+    assert timer.total_ns() == 7_500_000
+    timer.publish()
+
+    detection = ANALYZE_STAGE_SECONDS.snapshot("test_detection")
+    ml = ANALYZE_STAGE_SECONDS.snapshot("test_ml")
+    total = ANALYZE_DURATION_SECONDS.snapshot()
+    assert detection["count"] == detection_before["count"] + 1
+    assert abs(detection["sum"] - detection_before["sum"] - 0.002) < 1e-9
+    assert abs(ml["sum"] - ml_before["sum"] - 0.0055) < 1e-9
+    assert total["count"] == total_before["count"] + 1
+    assert abs(total["sum"] - total_before["sum"] - 0.0075) < 1e-9
+
+    rendered = registry.render()
+    assert "# TYPE fraud_analyze_stage_seconds histogram" in rendered
+    assert 'fraud_analyze_stage_seconds_count{stage="test_detection"}' in rendered
+    assert 'fraud_analyze_stage_seconds_bucket{stage="test_ml",le="+Inf"}' in rendered
+
+    print("\n✅ Stage histograms working correctly!")
+    return True
+
+
+def test_server_timing():
+    """Test Server-Timing rendering and parsing."""
+    print("\n" + "="*60)
+    print("Testing Server-Timing Header")
+    print("="*60)
+
+    with fake_clock(0, 0.12, 1.62):
+        timer = StageTimer()
+        timer.mark("detection")
+        timer.mark("ml")
+
+    header = timer.to_server_timing()
+    print(f"Server-Timing: {header}")
+    assert header == "detection;dur=0.120, ml;dur=1.500, total;dur=1.620"
+    assert parse_server_timing(header) == {"detection": 0.12, "ml": 1.5, "total": 1.62}
+
+    # A timer without marks still reports its total
+    with fake_clock(5):
+        assert StageTimer().to_server_timing() == "total;dur=0.000"
+
+    # Unknown parameters and malformed durations are ignored
+    assert parse_server_timing('cache;desc="hit", db;dur=abc, ml;dur=2') == {"ml": 2.0}
+    assert parse_server_timing(None) == {}
+
+    print("\n✅ Server-Timing header working correctly!")
+    return True
+
+
+def main():
+    """Run all instrumentation tests."""
+    results = {
+        'histograms': test_histograms(),
+        'server_timing': test_server_timing()
+    }
+
+    passed = sum(results.values())
+    print(f"\nTotal: {passed}/{len(results)} tests passed")
+    if passed != len(results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Test script for CIDR-aware IP intelligence.
+Runs in-process against IPRangeIndex and IPAnalyzer with list files in a
+temporary directory (no server required).
+"""
+
+import os
+import random
+import sys
+import tempfile
+
+from ip_analyzer import IPAnalyzer
+from ip_index import IPRangeIndex, parse_address, parse_range
+
+
+def test_overlapping_ranges():
+    """Test that overlapping ranges resolve like a brute-force scan."""
+    print("\n" + "="*60)
+    print("Testing Overlapping Range Resolution")
+    print("="*60)
+
+    assert parse_range("10.1.2.3/8") == (4, 10 << 24, (11 << 24) - 1)
+    assert parse_range("1.2.3.4-1.2.3.9")[2] - parse_range("1.2.3.4-1.2.3.9")[1] == 5
+    assert parse_address("::ffff:10.0.0.1") == (4, (10 << 24) + 1)
+
+    rng = random.Random(7)
+    ranges = []
+    for i in range(300):
+        first = rng.randrange(0, 5000)
+        ranges.append((4, first, first + rng.randrange(0, 400), (rng.randrange(5), i)))
+    priority = lambda payload: payload[0]
+    index = IPRangeIndex.build(ranges, priority=priority)
+
+    for address in range(0, 5500):
+        covering = [(-priority(payload), last - first, payload) for _, first, last, payload in ranges
+                    if first <= address <= last]
+        expected = min(covering)[:2] if covering else None
+        found = index.lookup(4, address)
+        got = None
+        if found is not None:
+            first, last = next((r[1], r[2]) for r in ranges if r[3] == found)
+            got = (-priority(found), last - first)
+        assert got == expected, f"Address {address}: expected {expected}, got {got}"
+
+    print(f"Ranges: {index.range_count}, disjoint segments: {len(index)}")
+    print("\n✅ Overlapping ranges resolved correctly!")
+    return True
+
+
+def test_blocklists_and_asn():
+    """Test built-in ranges, blocklist and ASN files, IPv6 and hot reload."""
+    print("\n" + "="*60)
+    print("Testing Blocklists, ASN Ranges and Reload")
+    print("="*60)
+
+    with tempfile.TemporaryDirectory() as directory:
+        blocklists = os.path.join(directory, "blocklists")
+        os.makedirs(blocklists)
+        with open(os.path.join(blocklists, "botnet.netset"), "w") as f:
+            f.write("# botnet C2\n203.0.113.0/24\n198.51.100.7\n2001:db8:bad::/48,40,tor exit\n")
+        asn_file = os.path.join(directory, "ip2asn.tsv")
+        with open(asn_file, "w") as f:
+            f.write("203.0.113.0\t203.0.113.255\t64500\tNL\tBULLETPROOF-HOSTING\n")
+            f.write("2001:db8::\t2001:db8:ffff:ffff:ffff:ffff:ffff:ffff\t64501\tUS\tEXAMPLE-NET\n")
+            f.write("192.0.2.0\t192.0.2.255\t0\tNone\tNot routed\n")
+
+        analyzer = IPAnalyzer(blocklist_dir=blocklists, asn_file=asn_file, flagged_asns=[64500])
+        assert analyzer.analyze("127.0.0.1")["risk_adjustment"] == 15
+        assert analyzer.analyze("172.20.1.1")["reason"] == "Private network IP (172.16-31.x.x)"
+        assert analyzer.analyze("172.32.1.1")["risk_adjustment"] == 0
+        assert analyzer.analyze("testclient")["risk_adjustment"] == 0
+
+        load = analyzer.load()
+        print(f"Load: {load}")
+        assert load["blocklist_ranges"] == 3 and load["asn_ranges"] == 2
+
+        listed = analyzer.analyze("203.0.113.50")
+        print(f"Listed: {listed}")
+        assert listed["risk_adjustment"] == 35 and listed["blocklist"] == "botnet"
+        assert listed["asn"] == 64500 and listed["country"] == "NL"
+
+        ipv6 = analyzer.analyze("2001:db8:bad::1")
+        assert ipv6["risk_adjustment"] == 40 and "tor exit" in ipv6["reason"] and ipv6["asn"] == 64501
+        assert analyzer.analyze("2001:db8:1::1")["risk_adjustment"] == 0
+        assert analyzer.analyze("192.0.2.1")["asn"] is None
+
+        assert not analyzer.reload_if_changed()
+        with open(os.path.join(blocklists, "scanners.txt"), "w") as f:
+            f.write("192.0.2.0/24\n")
+        assert analyzer.reload_if_changed()
+        assert analyzer.analyze("192.0.2.1")["blocklist"] == "scanners"
+
+    print("\n✅ IP intelligence working correctly!")
+    return True
+
+
+def main():
+    """Run all IP intelligence tests."""
+    results = {
+        'overlaps': test_overlapping_ranges(),
+        'lists': test_blocklists_and_asn()
+    }
+
+    passed = sum(results.values())
+    print(f"\nTotal: {passed}/{len(results)} tests passed")
+    if passed != len(results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
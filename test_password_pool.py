@@ -0,0 +1,109 @@
+"""
+Test script for the password hashing pool.
+Runs PasswordHashPool and run_password_task on a local event loop
+(no server required).
+"""
+
+import asyncio
+import sys
+import threading
+
+from fastapi import HTTPException
+
+import auth
+from password_pool import PasswordHashPool, PasswordPoolSaturated
+
+
+def test_saturation():
+    """Test that work beyond workers + queue is rejected and surfaces as a 503."""
+    print("\n" + "="*60)
+    print("Testing Password Pool Saturation")
+    print("="*60)
+
+    release = threading.Event()
+
+    def slow_hash(password):
+        release.wait(5)
+        return f"hashed:{password}"
+
+    async def scenario():
+        pool = PasswordHashPool(max_workers=1, max_queue=1)
+        running = asyncio.ensure_future(pool.run(slow_hash, "a"))
+        waiting = asyncio.ensure_future(pool.run(slow_hash, "b"))
+        await asyncio.sleep(0.05)
+        print(f"Statistics: {pool.get_statistics()}")
+        assert pool.get_statistics()["in_flight"] == 2
+        assert pool.get_statistics()["queued"] == 1
+
+        try:
+            await pool.run(slow_hash, "c")
+            raise AssertionError("Saturated pool accepted a task")
+        except PasswordPoolSaturated:
+            pass
+        assert pool.rejected == 1
+
+        # The auth helper maps saturation to 503 with Retry-After
+        saved_pool = auth.password_pool
+        auth.password_pool = pool
+        try:
+            await auth.run_password_task(slow_hash, "d")
+            raise AssertionError("run_password_task did not reject")
+        except HTTPException as e:
+            assert e.status_code == 503
+            assert e.headers["Retry-After"] == "1"
+        finally:
+            auth.password_pool = saved_pool
+
+        release.set()
+        assert await running == "hashed:a" and await waiting == "hashed:b"
+        assert pool.get_statistics()["in_flight"] == 0
+        assert await pool.run(slow_hash, "e") == "hashed:e", "Pool should accept work again"
+        pool._executor.shutdown(wait=True)
+
+    asyncio.run(scenario())
+    print("\n✅ Password pool saturation working correctly!")
+    return True
+
+
+def test_slot_released_on_error():
+    """Test that a failing task gives its slot back."""
+    print("\n" + "="*60)
+    print("Testing Password Pool Error Handling")
+    print("="*60)
+
+    def broken_hash(password):
+        raise ValueError("bad salt")
+
+    async def scenario():
+        pool = PasswordHashPool(max_workers=1, max_queue=0)
+        for _ in range(3):
+            try:
+                await pool.run(broken_hash, "secret")
+                raise AssertionError("Error was swallowed")
+            except ValueError:
+                pass
+            assert pool.get_statistics()["in_flight"] == 0, "Slot leaked after an error"
+        assert pool.rejected == 0, "Sequential failures must not saturate the pool"
+        assert await pool.run(len, "secret") == 6
+        pool._executor.shutdown(wait=True)
+
+    asyncio.run(scenario())
+    print("\n✅ Password pool error handling working correctly!")
+    return True
+
+
+def main():
+    """Run all password pool tests."""
+    results = {
+        'saturation': test_saturation(),
+        'errors': test_slot_released_on_error()
+    }
+
+    passed = sum(results.values())
+    print(f"\nTotal: {passed}/{len(results)} tests passed")
+    if passed != len(results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Test script for phone number analysis.
+Checks the vectorized batch path against the scalar path (no server required).
+"""
+
+import random
+import sys
+
+from phone_analyzer import PhoneAnalyzer
+from phone_normalizer import normalize_phone
+
+
+def test_batch_matches_scalar():
+    """Test that analyze_batch() agrees with analyze() for every input."""
+    print("\n" + "="*60)
+    print("Testing Batch Phone Analysis")
+    print("="*60)
+
+    analyzer = PhoneAnalyzer()
+    generator = random.Random(11)
+    numbers = [
+        "", None, "+1 (555) 012-3456", "7777777", "1234", "98765432101",
+        "١٢٣٤٥٦٧٨٩٠", "٠٣٠٠١١١١١١١", "۰۹۱۲۳۴۵۶۷۸۹", "phone", "+", "5"
+    ]
+    numbers += ["".join(generator.choice("0123456789 -") for _ in range(generator.randint(0, 14))) for _ in range(500)]
+
+    assert normalize_phone("١٢٣٤٥٦٧٨٩٠") == "1234567890"
+    assert analyzer.analyze("١٢٣٤٥٦٧٨٩٠")["sequential_pattern"]
+    assert analyzer.analyze_batch(numbers) == [analyzer.analyze(number) for number in numbers]
+    assert analyzer.analyze_batch([]) == []
+
+    print("\n✅ Batch phone analysis working correctly!")
+    return True
+
+
+def main():
+    """Run all phone analysis tests."""
+    results = {
+        'batch': test_batch_matches_scalar()
+    }
+
+    passed = sum(results.values())
+    print(f"\nTotal: {passed}/{len(results)} tests passed")
+    if passed != len(results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
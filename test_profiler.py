@@ -0,0 +1,121 @@
+"""
+Test script for single-request profiling.
+Runs RequestProfilerMiddleware around a minimal app in-process with a
+temporary output directory (no server required).
+"""
+
+import os
+import pstats
+import sys
+import tempfile
+import time
+from unittest import mock
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from profiler import RequestProfilerMiddleware, SamplingProfiler
+
+
+def make_client(profiler: SamplingProfiler) -> TestClient:
+    app = FastAPI()
+    app.add_middleware(RequestProfilerMiddleware, profiler=profiler)
+
+    @app.get("/work")
+    def work():
+        return {"total": sum(i * i for i in range(1000))}
+
+    return TestClient(app)
+
+
+def test_armed_requests_only():
+    """Test that only armed request ids are captured, each exactly once."""
+    print("\n" + "="*60)
+    print("Testing Armed Request Capture")
+    print("="*60)
+
+    with tempfile.TemporaryDirectory() as directory:
+        profiler = SamplingProfiler(output_dir=directory)
+        client = make_client(profiler)
+
+        # Nothing armed: the middleware never looks at the request
+        with mock.patch.object(profiler, "take_armed_request") as take:
+            assert client.get("/work", headers={"X-Request-ID": "req-1"}).status_code == 200
+            take.assert_not_called()
+        assert os.listdir(directory) == []
+
+        profiler.arm_request("req-1")
+        assert client.get("/work", headers={"X-Request-ID": "other"}).status_code == 200
+        assert client.get("/work").status_code == 200
+        assert os.listdir(directory) == [], "Unarmed requests must not be profiled"
+
+        response = client.get("/work", headers={"X-Request-ID": "req-1"})
+        assert response.status_code == 200 and response.json()["total"] == 332833500
+        path = profiler.request_profile_path("req-1")
+        assert os.path.exists(path), "Armed request was not profiled"
+        assert pstats.Stats(path).total_calls > 0
+        assert profiler.armed_requests == {}, "Id should be disarmed after use"
+
+        # The id is used once: a second request with it is not captured
+        os.remove(path)
+        client.get("/work", headers={"X-Request-ID": "req-1"})
+        assert not os.path.exists(path), "Id was captured twice"
+
+        # Ids are sanitised into the file name
+        profiler.arm_request("../evil id")
+        client.get("/work", headers={"X-Request-ID": "../evil id"})
+        assert os.listdir(directory) == ["request-.._evil_id.prof"]
+
+    print("\n✅ Armed request capture working correctly!")
+    return True
+
+
+def test_armed_request_expiry():
+    """Test that ids never sent expire and the fast path comes back."""
+    print("\n" + "="*60)
+    print("Testing Armed Request Expiry")
+    print("="*60)
+
+    with tempfile.TemporaryDirectory() as directory:
+        profiler = SamplingProfiler(output_dir=directory, arm_ttl_seconds=0.05)
+        client = make_client(profiler)
+
+        profiler.arm_request("never-sent")
+        assert profiler.get_status()["armed_requests"] == ["never-sent"]
+        time.sleep(0.1)
+
+        # The next request drops the stale id
+        client.get("/work")
+        assert profiler.armed_requests == {}, "Stale id kept the middleware armed"
+
+        # Arming drops stale ids too
+        profiler.arm_request("stale")
+        time.sleep(0.1)
+        profiler.arm_request("fresh")
+        assert list(profiler.armed_requests) == ["fresh"]
+
+        # An id that arrives after its expiry is not profiled
+        time.sleep(0.1)
+        client.get("/work", headers={"X-Request-ID": "fresh"})
+        assert os.listdir(directory) == []
+        assert profiler.get_status()["armed_requests"] == []
+
+    print("\n✅ Armed request expiry working correctly!")
+    return True
+
+
+def main():
+    """Run all profiler tests."""
+    results = {
+        'armed_only': test_armed_requests_only(),
+        'expiry': test_armed_request_expiry()
+    }
+
+    passed = sum(results.values())
+    print(f"\nTotal: {passed}/{len(results)} tests passed")
+    if passed != len(results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+"""
+Test script for the declarative rule table.
+Runs RuleSet scoring and explanations and the versioned RuleEngine store
+in-process, with a temporary SQLite database (no server required).
+"""
+
+import copy
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from database import Base
+from rule_engine import DEFAULT_RULE_TABLE, RULE_SOURCE_DB, RULE_SOURCE_FILE, RuleEngine, RuleSet
+
+
+def random_cases(rules: RuleSet, count: int, seed: int = 7):
+    words = [keyword for keywords in rules.keywords.values() for keyword in keywords] + ["hello", "lunch", "the"]
+    generator = random.Random(seed)
+    detections, phones, scores = [], [], []
+    for _ in range(count):
+        message = " ".join(generator.choice(words) for _ in range(generator.randint(0, 6)))
+        detections.append(rules.detect(message))
+        phones.append({name: generator.random() < 0.2 for name in rules.phone_signals} if generator.random() < 0.7 else None)
+        scores.append(generator.randint(0, 100))
+    return detections, phones, scores
+
+
+def test_builtin_rules():
+    """Test the built-in table against the original scoring and explanation rules."""
+    print("\n" + "="*60)
+    print("Testing Built-in Rules")
+    print("="*60)
+
+    rules = RuleSet(DEFAULT_RULE_TABLE)
+    detection = rules.detect("URGENT: verify your bank account now or it will be suspended")
+    assert detection == {
+        "urgency_matches": ["urgent", "now"],
+        "financial_matches": ["bank", "account", "verify"],
+        "threat_matches": ["suspended"]
+    }
+    # 2 x 15 + 3 x 20 + 25, capped at 100; three categories give 85% confidence
+    assert rules.score(detection) == {"score": 100, "risk_level": "Critical", "confidence": 85}
+    explanation = rules.explain(100, detection)
+    print(f"Explanation: {explanation}")
+    assert explanation["primary_reason"] == "Contains threatening language: suspended"
+    assert explanation["threat_category"] == "Financial Scam"
+    assert explanation["contributing_factors"] == [
+        "Urgency keywords: urgent, now", "Financial keywords: bank, account, verify", "Threat keywords: suspended"
+    ]
+
+    quiet = rules.detect("See you at lunch")
+    sender = {"repeated_pattern": True, "sequential_pattern": False, "invalid_length": True}
+    assert rules.score(quiet, sender) == {"score": 25, "risk_level": "Low", "confidence": 10}
+    assert rules.explain(25, quiet, sender)["threat_category"] == "Suspicious Sender"
+    assert rules.explain(25, quiet)["threat_category"] == "Low Risk Communication"
+    assert rules.explain(45, quiet)["threat_category"] == "Potential Fraud"
+
+    assert rules.blacklisted_keyword("Pay by Western Union today") == "western union"
+    assert rules.blacklisted_keyword("") is None
+
+    # Band edges are inclusive upper bounds
+    assert [rules.risk_level(score) for score in (0, 30, 31, 60, 61, 85, 86, 100)] == [
+        "Low", "Low", "Medium", "Medium", "High", "High", "Critical", "Critical"
+    ]
+
+    print("\n✅ Built-in rules working correctly!")
+    return True
+
+
+def test_batch_matches_single():
+    """Test that vectorized batch scoring and explanations match the single-message path."""
+    print("\n" + "="*60)
+    print("Testing Batch Scoring")
+    print("="*60)
+
+    rules = RuleSet(DEFAULT_RULE_TABLE)
+    detections, phones, scores = random_cases(rules, 2000)
+    assert rules.score_batch(detections, phones) == [rules.score(d, p) for d, p in zip(detections, phones)]
+    assert rules.explain_batch(scores, detections, phones) == [
+        rules.explain(s, d, p) for s, d, p in zip(scores, detections, phones)
+    ]
+    assert rules.score_batch([]) == [] and rules.explain_batch([], []) == []
+
+    print("\n✅ Batch scoring working correctly!")
+    return True
+
+
+def test_custom_table():
+    """Test adding a rule through the table, and rejecting malformed tables."""
+    print("\n" + "="*60)
+    print("Testing Custom Rule Tables")
+    print("="*60)
+
+    table = copy.deepcopy(DEFAULT_RULE_TABLE)
+    table["version"] = "2024-06-gift-cards"
+    table["features"].append({"name": "gift_card", "keywords": ["gift card", "itunes"], "points": 40,
+                              "factor": "Asks for gift cards: {matches}"})
+    table["categories"].insert(0, {"category": "Gift Card Scam", "all": ["gift_card"]})
+    table["reasons"].insert(1, {"text": "Asks for payment in gift cards ({gift_card})", "all": ["gift_card"]})
+    rules = RuleSet(table)
+    assert rules.version == "2024-06-gift-cards"
+    assert RuleSet(DEFAULT_RULE_TABLE).version == RuleSet(copy.deepcopy(DEFAULT_RULE_TABLE)).version
+
+    detection = rules.detect("Buy an iTunes gift card urgently")
+    assert detection["gift_card_matches"] == ["gift card", "itunes"]
+    scored = rules.score(detection)
+    assert scored["score"] == 95 and scored["risk_level"] == "Critical"
+    explanation = rules.explain(scored["score"], detection)
+    assert explanation["threat_category"] == "Gift Card Scam"
+    assert explanation["primary_reason"] == "Asks for payment in gift cards (gift card, itunes)"
+    assert "Asks for gift cards: gift card, itunes" in explanation["contributing_factors"]
+
+    def rejected(change) -> bool:
+        broken = copy.deepcopy(DEFAULT_RULE_TABLE)
+        change(broken)
+        try:
+            RuleSet(broken)
+        except ValueError as e:
+            print(f"Rejected: {e}")
+            return True
+        return False
+
+    assert rejected(lambda t: t["categories"].append({"category": "Late", "all": ["urgency"]}))
+    assert rejected(lambda t: t["reasons"].insert(0, {"text": "x", "all": ["unknown"]}))
+    assert rejected(lambda t: t["reasons"].insert(0, {"text": "{missing}", "all": ["urgency"]}))
+    assert rejected(lambda t: t["bands"].reverse())
+    assert rejected(lambda t: t["features"].append(dict(t["features"][0])))
+
+    print("\n✅ Custom rule tables working correctly!")
+    return True
+
+
+def gift_card_table(version: str):
+    table = copy.deepcopy(DEFAULT_RULE_TABLE)
+    table["features"][0]["keywords"].append("gift card")
+    table["version"] = version
+    return table
+
+
+def test_versioned_store():
+    """Test publishing, hot reload in another worker and rejecting bad tables."""
+    print("\n" + "="*60)
+    print("Testing Versioned Rule Store")
+    print("="*60)
+
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f"sqlite:///{os.path.join(directory, 'rules.db')}")
+        Base.metadata.create_all(bind=engine)
+        session_factory = sessionmaker(bind=engine)
+
+        publisher = RuleEngine(source=RULE_SOURCE_DB, session_factory=session_factory)
+        worker = RuleEngine(source=RULE_SOURCE_DB, session_factory=session_factory)
+        assert worker.load()["version"] == RuleSet(DEFAULT_RULE_TABLE).version
+        assert not worker.reload_if_changed(), "Nothing published yet"
+
+        held = worker.rules
+        publisher.publish(gift_card_table("v2"), published_by="admin")
+        assert publisher.rules.version == "v2", "The publishing worker switches at once"
+        assert worker.rules is held and worker.reload_if_changed()
+        assert worker.rules.version == "v2" and held.version != "v2", "Swap must not mutate the old rule set"
+        assert worker.rules.detect("gift card")["urgency_matches"] == ["gift card"]
+
+        broken = gift_card_table("v3")
+        broken["reasons"].pop()
+        try:
+            publisher.publish(broken)
+            assert False, "A malformed table must be rejected"
+        except ValueError as e:
+            print(f"Rejected: {e}")
+        assert not worker.reload_if_changed() and worker.rules.version == "v2"
+
+        # Rolling back is publishing the old table again
+        publisher.publish(DEFAULT_RULE_TABLE, version="v1")
+        assert worker.reload_if_changed() and worker.rules.version == "v1"
+        print(f"History: {publisher.history()}")
+        assert [entry["version"] for entry in publisher.history()] == ["v1", "v2"]
+
+        # File source: publishing rewrites the file and other workers follow its mtime
+        path = os.path.join(directory, "rules.json")
+        with open(path, "w") as f:
+            json.dump(gift_card_table("file-1"), f)
+        file_worker = RuleEngine(path=path, source=RULE_SOURCE_FILE)
+        assert file_worker.load()["version"] == "file-1"
+        time.sleep(0.01)
+        RuleEngine(path=path, source=RULE_SOURCE_FILE).publish(DEFAULT_RULE_TABLE, version="file-2")
+        assert file_worker.reload_if_changed() and file_worker.rules.version == "file-2"
+
+        with open(path, "w") as f:
+            f.write("{not json")
+        assert not file_worker.reload_if_changed() and file_worker.rules.version == "file-2"
+        assert file_worker.last_error, "A bad file keeps the current rules and records the error"
+        engine.dispose()
+
+    print("\n✅ Versioned rule store working correctly!")
+    return True
+
+
+def main():
+    """Run all rule table tests."""
+    results = {
+        'builtin': test_builtin_rules(),
+        'batch': test_batch_matches_single(),
+        'custom': test_custom_table(),
+        'store': test_versioned_store()
+    }
+
+    passed = sum(results.values())
+    print(f"\nTotal: {passed}/{len(results)} tests passed")
+    if passed != len(results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Test script for runtime container size estimation.
+Runs estimate_container_bytes in-process (no server required).
+"""
+
+import sys
+from collections.abc import Mapping
+from unittest import mock
+
+import runtime_metrics
+from runtime_metrics import _shallow_bytes, estimate_container_bytes
+
+
+def test_small_containers():
+    """Test that containers within the sample are measured exactly."""
+    print("\n" + "="*60)
+    print("Testing Small Container Sizes")
+    print("="*60)
+
+    assert estimate_container_bytes({}) == sys.getsizeof({})
+    assert estimate_container_bytes([]) == sys.getsizeof([])
+
+    history = {f"+1555000{i:04d}": [{"risk_score": i, "level": "low"}] for i in range(50)}
+    exact = sys.getsizeof(history) + sum(
+        sys.getsizeof(key) + _shallow_bytes(value) for key, value in history.items()
+    )
+    print(f"History dict: {estimate_container_bytes(history)} bytes")
+    # Mean times count, so only float rounding separates it from the exact size
+    assert abs(estimate_container_bytes(history) - exact) <= 1
+
+    # Dicts inside lists are measured with their items
+    events = [{"phone": "+15550000001", "score": 0.5}] * 10
+    assert estimate_container_bytes(events) == sys.getsizeof(events) + 10 * _shallow_bytes(events[0])
+    assert _shallow_bytes(events[0]) > sys.getsizeof(events[0])
+
+    print("\n✅ Small container sizes working correctly!")
+    return True
+
+
+def test_sampling_and_extrapolation():
+    """Test that only a sample is inspected and the mean is scaled to the full size."""
+    print("\n" + "="*60)
+    print("Testing Sampling and Extrapolation")
+    print("="*60)
+
+    # 10 large entries followed by 990 small ones: a sample of 10 sees
+    # only the large ones and extrapolates their size to all 1000
+    large, small = "x" * 1000, "y"
+    items = [large] * 10 + [small] * 990
+    with mock.patch.object(runtime_metrics, "_shallow_bytes", wraps=_shallow_bytes) as measured:
+        estimate = estimate_container_bytes(items, sample=10)
+    print(f"Estimate: {estimate} bytes, entries measured: {measured.call_count}")
+    assert measured.call_count == 10, "Only the sample should be measured"
+    assert estimate == sys.getsizeof(items) + sys.getsizeof(large) * 1000
+
+    # Uniform entries extrapolate to the exact size
+    uniform = {i: "z" * 20 for i in range(5000)}
+    exact = sys.getsizeof(uniform) + sum(sys.getsizeof(k) + sys.getsizeof(v) for k, v in uniform.items())
+    sampled = estimate_container_bytes(uniform)
+    assert abs(sampled - exact) / exact < 0.01, f"{sampled} vs {exact}"
+
+    # A container that changes size while sampled reports only its own size
+    class Mutating(Mapping):
+        def __getitem__(self, key):
+            raise KeyError(key)
+
+        def __iter__(self):
+            raise RuntimeError("dictionary changed size during iteration")
+
+        def __len__(self):
+            return 3
+
+    mutating = Mutating()
+    assert estimate_container_bytes(mutating) == sys.getsizeof(mutating)
+
+    print("\n✅ Sampling and extrapolation working correctly!")
+    return True
+
+
+def main():
+    """Run all runtime metrics tests."""
+    results = {
+        'small': test_small_containers(),
+        'sampling': test_sampling_and_extrapolation()
+    }
+
+    passed = sum(results.values())
+    print(f"\nTotal: {passed}/{len(results)} tests passed")
+    if passed != len(results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()